@@ -0,0 +1,22 @@
+"""
+Allow Script Runner scripts to be run with python -m scriptrunner.
+See cli.py for the usage.
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import sys
+
+from cli import main
+
+sys.exit(main())
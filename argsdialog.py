@@ -1,17 +1,40 @@
+import sqlite3
+
 from PyQt4.QtCore import *
 from PyQt4.QtGui import *
 
 from qgis.core import *
 
+from script_args import ArgumentError, LAST_USED, argument_defaults, \
+    build_user_args
+from script_scanner import UnknownDefault
+
 
 class ArgsDialog(QDialog):
+    """
+    Collect the arguments for a script's run_script function. If a
+    store (the MetadataCache) is given, the arguments last used for the
+    script are filled in and named presets can be saved and recalled.
+    """
 
-    def __init__(self, argspec, script_name):
+    def __init__(self, argspec, script_name, script=None, store=None):
         QDialog.__init__(self)
         self.setWindowTitle("Enter Arguments for %s" % script_name)
         self.setMinimumWidth(400)
+        self.argspec = argspec
+        self.script = script
+        self.store = store
+        self.user_args = None
+        self.saved = dict()
+        if store is not None:
+            try:
+                self.saved = store.arguments(script)
+            except sqlite3.Error:
+                self.store = None
         self.grid = QGridLayout(self)
         self.build_dialog(argspec)
+        if LAST_USED in self.saved:
+            self.fill(self.saved[LAST_USED])
 
     def build_dialog(self, argspec):
         # args is an ArgSpec object
@@ -19,19 +42,30 @@ class ArgsDialog(QDialog):
         row = 0
         col = 0
         arg_count = 0
+        if self.store is not None:
+            row = self.build_presets(row)
         if len(argspec.args) > 1:
             self.grid.addWidget(QLabel(
-                "Enter arguments below. Strings must be quoted."), row, 0,
-                1, 2)
+                "Enter arguments below. Leave a value empty to use its "
+                "default."), row, 0, 1, 2)
+            row += 1
+            self.grid.addWidget(QLabel(
+                "Strings must be quoted unless the default is a string."),
+                row, 0, 1, 2)
             row += 1
+        # defaults known from the source are filled in
+        defaults = argument_defaults(argspec)
         for arg in argspec.args:
             if arg != 'iface':
                 # create a label and line edit
                 self.grid.addWidget(QLabel(arg), row, col)
                 col += 1
                 le = QLineEdit()
+                if arg in defaults and \
+                        not isinstance(defaults[arg], UnknownDefault):
+                    le.setText(repr(defaults[arg]))
                 self.grid.addWidget(le, row, col)
-                self.arg_map.append(le)
+                self.arg_map.append((arg, le))
                 row += 1
                 col = 0
                 arg_count += 1
@@ -66,27 +100,106 @@ class ArgsDialog(QDialog):
         h_layout.addWidget(btn_cancel)
         self.grid.addLayout(h_layout, row, 0, 1, 2)
 
+    def build_presets(self, row):
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Preset"))
+        self.presets = QComboBox()
+        self.presets.setMinimumWidth(150)
+        self.presets.activated[int].connect(self.preset_chosen)
+        h_layout.addWidget(self.presets, 1)
+        btn_save = QPushButton("Save As...")
+        btn_save.clicked.connect(self.save_preset)
+        h_layout.addWidget(btn_save)
+        self.btn_delete = QPushButton("Delete")
+        self.btn_delete.clicked.connect(self.delete_preset)
+        h_layout.addWidget(self.btn_delete)
+        self.grid.addLayout(h_layout, row, 0, 1, 2)
+        self.list_presets()
+        return row + 1
+
+    def list_presets(self, current=None):
+        self.presets.clear()
+        if LAST_USED in self.saved:
+            self.presets.addItem("Last used", LAST_USED)
+        for name in sorted(n for n in self.saved if n != LAST_USED):
+            self.presets.addItem(name, name)
+        if current is not None:
+            self.presets.setCurrentIndex(self.presets.findData(current))
+        self.btn_delete.setEnabled(self.presets.count() > 0)
+
+    def preset_name(self, index):
+        return unicode(self.presets.itemData(index))
+
+    def preset_chosen(self, index):
+        self.fill(self.saved[self.preset_name(index)])
+
+    def texts(self):
+        """
+        Return the text entered for each argument and the keywords.
+        """
+        texts = dict((arg, unicode(le.text())) for (arg, le)
+                     in self.arg_map)
+        keywords = None
+        if self.keywords:
+            keywords = unicode(self.keywords.text())
+        return {'args': texts, 'keywords': keywords}
+
+    def fill(self, texts):
+        for (arg, le) in self.arg_map:
+            if arg in texts['args']:
+                le.setText(texts['args'][arg])
+        if self.keywords and texts.get('keywords') is not None:
+            self.keywords.setText(texts['keywords'])
+
+    def save_preset(self):
+        (name, ok) = QInputDialog.getText(self, "Save Arguments",
+                                          "Name of the preset:")
+        name = unicode(name).strip()
+        if not ok or not name:
+            return
+        texts = self.texts()
+        try:
+            self.store.save_arguments(self.script, name, texts)
+        except sqlite3.Error as e:
+            QMessageBox.warning(self, "Save Arguments",
+                                "The preset could not be saved: %s" % e)
+            return
+        self.saved[name] = texts
+        self.list_presets(name)
+
+    def delete_preset(self):
+        index = self.presets.currentIndex()
+        if index < 0:
+            return
+        name = self.preset_name(index)
+        try:
+            self.store.delete_arguments(self.script, name)
+        except sqlite3.Error:
+            pass
+        del self.saved[name]
+        self.list_presets()
+
+    def accept(self):
+        texts = self.texts()
+        try:
+            self.user_args = build_user_args(self.argspec, texts['args'],
+                                             texts['keywords'])
+        except ArgumentError as e:
+            QMessageBox.warning(self, "Invalid Arguments", unicode(e))
+            return
+        if self.store is not None:
+            try:
+                self.store.save_arguments(self.script, LAST_USED, texts)
+            except sqlite3.Error:
+                # the run does not depend on it
+                pass
+        QDialog.accept(self)
+
     def show_dialog(self):
-        result = self.exec_()
-        if result == 1:
-            #print "fetching results"
-            arg_values = list()
-            arg_map = dict()
-            # fetch the args values
-            for line_edit in self.arg_map:
-                if line_edit.text() == None:
-                    arg_values.append(None)
-                else:
-                    arg_values.append(str(line_edit.text()))
-            arg_map['args'] = arg_values
-
-            if self.keywords:
-                arg_map['keywords'] = str(self.keywords.text())
-            else:
-                arg_map['keywords'] = None
-
-            print "arg_map returned from argsdialog", arg_map
-            # return a containing the args
-            return arg_map
-        else:
-            return None
+        """
+        Show the dialog and return the user_args entered (see
+        script_args.build_user_args), or None if it was cancelled.
+        """
+        if self.exec_() == QDialog.Accepted:
+            return self.user_args
+        return None
@@ -0,0 +1,206 @@
+"""
+Expand parameter sweeps and file lists into the runs of a batch and
+write the batch summary
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import ast
+import csv
+import glob
+import itertools
+import os
+import re
+
+from script_args import ArgumentError, build_user_args, format_args
+
+# how the value of an argument is given in a batch
+SWEEP_VALUE = 'value'
+SWEEP_RANGE = 'range'
+SWEEP_LIST = 'list'
+SWEEP_FILES = 'files'
+SWEEP_KINDS = [SWEEP_VALUE, SWEEP_RANGE, SWEEP_LIST, SWEEP_FILES]
+
+# states of a batch run besides those of script_host
+STATUS_PENDING = 'pending'
+STATUS_STOPPED = 'stopped'
+
+# the most runs a batch may have
+MAX_RUNS = 100000
+
+RANGE_PATTERN = re.compile(
+    r'^\s*(?P<start>[-+.\w]+)\s*\.\.\s*(?P<stop>[-+.\w]+)'
+    r'(\s+step\s+(?P<step>[-+.\w]+))?\s*$')
+
+
+def parse_number(text):
+    try:
+        value = ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        value = None
+    if isinstance(value, bool) or not isinstance(value, (int, long, float)):
+        raise ArgumentError("%s is not a number" % text)
+    return value
+
+
+def parse_range(text):
+    """
+    Return the values of a range written as "start..stop" or
+    "start..stop step n". Both ends are included; the values are ints
+    unless one of the numbers is a float. A range of more than MAX_RUNS
+    values is refused before any is made.
+    """
+    match = RANGE_PATTERN.match(text)
+    if match is None:
+        raise ArgumentError("A range is written as start..stop or "
+                            "start..stop step n: %s" % text)
+    start = parse_number(match.group('start'))
+    stop = parse_number(match.group('stop'))
+    step = 1
+    if match.group('step'):
+        step = parse_number(match.group('step'))
+    if step == 0 or (stop - start) * step < 0:
+        raise ArgumentError("The step of %s does not lead from start to "
+                            "stop" % text)
+    # the small margin keeps float ranges from losing their last value
+    count = int((stop - start) / float(step) + 1e-9) + 1
+    if count > MAX_RUNS:
+        raise ArgumentError("%s has %d values; a batch has at most %d "
+                            "runs" % (text, count, MAX_RUNS))
+    if all(isinstance(n, (int, long)) for n in (start, stop, step)):
+        return [start + index * step for index in range(count)]
+    return [round(start + index * step, 10) for index in range(count)]
+
+
+def parse_list(text):
+    """
+    Return the values of a comma separated list. Items are Python
+    literals, or strings taken as they stand if the list is not made of
+    literals.
+    """
+    try:
+        values = ast.literal_eval("[%s]" % text)
+    except (ValueError, SyntaxError):
+        values = [item.strip() for item in text.split(',')]
+    values = [value for value in values if value != '']
+    if not values:
+        raise ArgumentError("The list is empty")
+    return values
+
+
+def expand_files(pattern):
+    """
+    Return the files matching a glob pattern, sorted.
+    """
+    paths = sorted(path for path in glob.glob(os.path.expanduser(pattern))
+                   if os.path.isfile(path))
+    if not paths:
+        raise ArgumentError("No files match %s" % pattern)
+    return paths
+
+
+def sweep_values(kind, text):
+    if kind == SWEEP_RANGE:
+        return parse_range(text)
+    if kind == SWEEP_LIST:
+        return parse_list(text)
+    return expand_files(text)
+
+
+class BatchRun(object):
+    """
+    One run of a batch: the values swept for it, as (name, value) pairs,
+    the user_args it runs with and, once it is done, its status, how
+    long it took, its RunMetrics, its traceback and the file holding its
+    output.
+    """
+
+    def __init__(self, number, values, user_args, output):
+        self.number = number
+        self.values = values
+        self.user_args = user_args
+        self.output = output
+        self.status = STATUS_PENDING
+        self.seconds = None
+        self.metrics = None
+        self.traceback = None
+
+
+def build_batch(argspec, texts, kinds, keywords_text, output_dir):
+    """
+    Return the BatchRuns for a run_script with signature argspec. texts
+    holds the text entered for each argument and kinds how it is to be
+    read (one of SWEEP_KINDS); an argument missing from kinds is a
+    single value. One run is made for each combination of the swept
+    values, the first argument varying slowest. Raises ArgumentError if
+    a value or sweep is invalid, or if there would be more than MAX_RUNS
+    runs.
+    """
+    swept = [name for name in argspec.args[1:]
+             if kinds.get(name, SWEEP_VALUE) != SWEEP_VALUE]
+    choices = []
+    for name in swept:
+        try:
+            choices.append(sweep_values(kinds[name], texts[name]))
+        except ArgumentError as e:
+            raise ArgumentError("%s: %s" % (name, e))
+    # count the runs before making any
+    count = reduce(lambda product, values: product * len(values),
+                   choices, 1)
+    if count > MAX_RUNS:
+        raise ArgumentError("The sweeps make %d runs; a batch has at most "
+                            "%d" % (count, MAX_RUNS))
+    runs = []
+    for (number, combination) in enumerate(itertools.product(*choices), 1):
+        values = zip(swept, combination)
+        run_texts = dict(texts)
+        run_texts.update((name, repr(value)) for (name, value) in values)
+        user_args = build_user_args(argspec, run_texts, keywords_text)
+        runs.append(BatchRun(number, values, user_args, os.path.join(
+            output_dir, "run-%04d.log" % number)))
+    return runs
+
+
+def write_summary(path, runs):
+    """
+    Write a CSV table of the runs of a batch: the swept values, the full
+    arguments, status, duration, CPU time, peak RSS increase and output
+    file of each.
+    """
+    names = [name for (name, value) in runs[0].values] if runs else []
+    with open(path, 'wb') as summary:
+        writer = csv.writer(summary)
+        writer.writerow(['run'] + names +
+                        ['arguments', 'status', 'seconds', 'cpu_seconds',
+                         'peak_rss_mb', 'output'])
+        for run in runs:
+            swept = [value for (name, value) in run.values]
+            if run.seconds is None:
+                seconds = ''
+            else:
+                seconds = "%.3f" % run.seconds
+            (cpu, rss) = ('', '')
+            if run.metrics is not None and run.metrics.finished():
+                cpu = "%.3f" % run.metrics.cpu
+                if run.metrics.peak_rss_delta is not None:
+                    rss = "%.1f" % (run.metrics.peak_rss_delta / 1048576.0)
+            row = [run.number] + swept + [format_args(run.user_args),
+                                          run.status, seconds, cpu, rss,
+                                          run.output]
+            writer.writerow([csv_value(item) for item in row])
+
+
+def csv_value(item):
+    if isinstance(item, unicode):
+        return item.encode('utf-8')
+    return str(item)
@@ -0,0 +1,160 @@
+"""
+Dialog for setting up a batch: parameter sweeps and file lists for the
+arguments of a script
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import os
+from functools import partial
+
+from PyQt4.QtCore import *
+from PyQt4.QtGui import *
+
+from batch import SWEEP_KINDS, SWEEP_FILES, build_batch
+from script_args import ArgumentError, argument_defaults
+from script_scanner import UnknownDefault
+
+# labels of SWEEP_KINDS
+SWEEP_LABELS = ["Value", "Range", "List", "Files"]
+
+SWEEP_HINTS = [
+    "",
+    "start..stop step n, for example 10..500 step 10",
+    "comma separated values, for example 'a', 'b', 'c'",
+    "a file pattern, for example /data/*.shp",
+]
+
+
+class BatchDialog(QDialog):
+    """
+    Collect how each argument of a script varies across a batch. An
+    argument is a single value (as in the ArgsDialog), a range of
+    numbers, a list of values or the files matching a pattern; one run
+    is made for every combination.
+    """
+
+    def __init__(self, argspec, script_name, output_dir, max_workers,
+                 parent=None):
+        QDialog.__init__(self, parent)
+        self.setWindowTitle("Run Batch of %s" % script_name)
+        self.setMinimumWidth(500)
+        self.argspec = argspec
+        self.output_dir = output_dir
+        self.runs = None
+        self.grid = QGridLayout(self)
+
+        row = 0
+        self.grid.addWidget(QLabel(
+            "One run is made for each combination of the values given."),
+            row, 0, 1, 4)
+        row += 1
+        defaults = argument_defaults(argspec)
+        self.arg_map = list()
+        for arg in argspec.args[1:]:
+            self.grid.addWidget(QLabel(arg), row, 0)
+            kind = QComboBox()
+            kind.addItems(SWEEP_LABELS)
+            self.grid.addWidget(kind, row, 1)
+            le = QLineEdit()
+            if arg in defaults and \
+                    not isinstance(defaults[arg], UnknownDefault):
+                le.setText(repr(defaults[arg]))
+            self.grid.addWidget(le, row, 2)
+            browse = QToolButton()
+            browse.setText("...")
+            browse.setEnabled(False)
+            browse.clicked.connect(partial(self.browse, le))
+            self.grid.addWidget(browse, row, 3)
+            kind.currentIndexChanged[int].connect(
+                partial(self.kind_changed, le, browse))
+            self.arg_map.append((arg, kind, le))
+            row += 1
+
+        if argspec.keywords:
+            self.grid.addWidget(QLabel(
+                "Keyword arguments, the same for every run:"), row, 0, 1, 4)
+            row += 1
+            self.keywords = QLineEdit()
+            self.grid.addWidget(self.keywords, row, 0, 1, 4)
+            row += 1
+        else:
+            self.keywords = None
+
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Worker processes"))
+        self.workers = QSpinBox()
+        self.workers.setRange(1, 64)
+        self.workers.setValue(max_workers)
+        h_layout.addWidget(self.workers)
+        h_layout.addStretch()
+        self.grid.addLayout(h_layout, row, 0, 1, 4)
+        row += 1
+
+        self.grid.addWidget(QLabel("Output and summary are written to %s"
+                                   % output_dir), row, 0, 1, 4)
+        row += 1
+
+        h_layout = QHBoxLayout()
+        btn_run = QPushButton("Run")
+        btn_run.setMaximumWidth(80)
+        btn_run.clicked.connect(self.accept)
+        h_layout.addWidget(btn_run)
+        btn_cancel = QPushButton("Cancel")
+        btn_cancel.setMaximumWidth(80)
+        btn_cancel.clicked.connect(self.reject)
+        h_layout.addWidget(btn_cancel)
+        self.grid.addLayout(h_layout, row, 0, 1, 4)
+
+    def kind_changed(self, le, browse, index):
+        le.setPlaceholderText(SWEEP_HINTS[index])
+        browse.setEnabled(SWEEP_KINDS[index] == SWEEP_FILES)
+
+    def browse(self, le):
+        directory = QFileDialog.getExistingDirectory(
+            self, "Folder of the input files")
+        if directory:
+            le.setText(os.path.join(unicode(directory), '*'))
+
+    def accept(self):
+        texts = dict()
+        kinds = dict()
+        for (arg, kind, le) in self.arg_map:
+            texts[arg] = unicode(le.text())
+            kinds[arg] = SWEEP_KINDS[kind.currentIndex()]
+        keywords = None
+        if self.keywords:
+            keywords = unicode(self.keywords.text())
+        try:
+            runs = build_batch(self.argspec, texts, kinds, keywords,
+                               self.output_dir)
+        except ArgumentError as e:
+            QMessageBox.warning(self, "Invalid Batch", unicode(e))
+            return
+        choice = QMessageBox.question(
+            self, "Run Batch", "Start %d run(s) on %d worker process(es)?"
+            % (len(runs), min(len(runs), self.workers.value())),
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        if choice != QMessageBox.Yes:
+            return
+        self.runs = runs
+        QDialog.accept(self)
+
+    def show_dialog(self):
+        """
+        Show the dialog and return (runs, number of workers), or None if
+        it was cancelled.
+        """
+        if self.exec_() == QDialog.Accepted:
+            return (self.runs, self.workers.value())
+        return None
@@ -0,0 +1,216 @@
+"""
+Run the runs of a batch on a pool of headless QGIS worker processes
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import collections
+import json
+import os
+
+from PyQt4.QtCore import *
+
+from batch import STATUS_STOPPED
+from process_executor import host_environment, host_script, \
+    python_executable
+from run_metrics import RunMetrics
+from script_args import encode_args
+from script_host import READY_LINE, RESULT_PREFIX
+
+# bytes of a worker's stderr kept to explain why it died
+STDERR_TAIL = 4096
+
+
+class BatchWorker(QObject):
+    """
+    A script_host.py --worker process running one batch run at a time.
+    """
+    ready = pyqtSignal(object)
+    result = pyqtSignal(object, object)
+    exited = pyqtSignal(object)
+
+    def __init__(self, python, environment, working_dir, parent=None):
+        QObject.__init__(self, parent)
+        self.run = None
+        # set once QGIS is up in the worker
+        self.initialized = False
+        self.buffer = ''
+        self.stderr = ''
+        self.process = QProcess(self)
+        self.process.setProcessEnvironment(environment)
+        self.process.setWorkingDirectory(working_dir)
+        self.process.readyReadStandardOutput.connect(self.read_stdout)
+        self.process.readyReadStandardError.connect(self.read_stderr)
+        self.process.finished.connect(lambda code, status:
+                                      self.exited.emit(self))
+        self.process.error.connect(self.process_error)
+        self.process.start(python_executable(python),
+                           ['-u', host_script(), '--worker'])
+
+    def submit(self, script, run):
+        self.run = run
+        job = {'script': unicode(script), 'args': encode_args(run.user_args),
+               'output': run.output}
+        self.process.write(json.dumps(job) + '\n')
+
+    def read_stdout(self):
+        self.buffer += str(self.process.readAllStandardOutput())
+        lines = self.buffer.split('\n')
+        self.buffer = lines.pop()
+        for line in lines:
+            # anything else was written past sys.stdout by the script
+            if line == READY_LINE:
+                self.initialized = True
+                self.ready.emit(self)
+            elif line.startswith(RESULT_PREFIX):
+                self.result.emit(self, json.loads(line[len(RESULT_PREFIX):]))
+
+    def read_stderr(self):
+        self.stderr += str(self.process.readAllStandardError())
+        self.stderr = self.stderr[-STDERR_TAIL:]
+
+    def process_error(self, error):
+        if error == QProcess.FailedToStart:
+            self.stderr = "The worker process failed to start: %s\n" % \
+                self.process.errorString()
+            self.exited.emit(self)
+
+    def finish(self):
+        """
+        Let the worker exit once its run is done.
+        """
+        self.process.closeWriteChannel()
+
+    def kill(self):
+        self.process.kill()
+
+
+class BatchPool(QObject):
+    """
+    Run the runs of a batch on up to a number of worker processes. Each
+    worker initializes QGIS once and then takes runs one after another,
+    so a batch of hundreds of runs does not pay for hundreds of QGIS
+    start ups. A worker that dies fails the run it had and is replaced
+    while runs remain. A worker that dies before QGIS is up is not
+    replaced; if none is left, the rest of the batch fails with its
+    error.
+
+    run_finished is emitted with each BatchRun as it ends, progress with
+    the number of runs done, the total and the number that failed, and
+    finished once every run has ended or been stopped.
+    """
+    run_finished = pyqtSignal(object)
+    progress = pyqtSignal(int, int, int)
+    finished = pyqtSignal()
+
+    def __init__(self, python=None, parent=None):
+        QObject.__init__(self, parent)
+        self.python = python
+        self.workers = []
+        self.pending = collections.deque()
+        self.runs = []
+        self.done = 0
+        self.failed = 0
+        self.stopping = False
+
+    def is_running(self):
+        return bool(self.workers)
+
+    def start(self, script, runs, max_workers):
+        self.script = script
+        self.runs = list(runs)
+        self.pending = collections.deque(self.runs)
+        self.done = 0
+        self.failed = 0
+        self.stopping = False
+        self.environment = host_environment()
+        for number in range(min(max_workers, len(self.runs))):
+            self.start_worker()
+        self.progress.emit(0, len(self.runs), 0)
+        if not self.runs:
+            self.finished.emit()
+
+    def start_worker(self):
+        worker = BatchWorker(self.python, self.environment,
+                             os.path.dirname(unicode(self.script)), self)
+        worker.ready.connect(self.dispatch)
+        worker.result.connect(self.worker_result)
+        worker.exited.connect(self.worker_exited)
+        self.workers.append(worker)
+
+    def dispatch(self, worker):
+        if self.pending and not self.stopping:
+            worker.submit(self.script, self.pending.popleft())
+        else:
+            worker.finish()
+
+    def worker_result(self, worker, result):
+        run = worker.run
+        worker.run = None
+        run.status = result['status']
+        run.seconds = result.get('seconds')
+        run.metrics = RunMetrics.from_dict(result.get('metrics'))
+        run.traceback = result.get('traceback')
+        self.end_run(run)
+        self.dispatch(worker)
+
+    def worker_exited(self, worker):
+        if worker not in self.workers:
+            # FailedToStart may be followed by finished
+            return
+        self.workers.remove(worker)
+        worker.deleteLater()
+        run = worker.run
+        if run is not None:
+            if self.stopping:
+                run.status = STATUS_STOPPED
+            else:
+                run.status = 'error'
+                run.traceback = "The worker process exited while running " \
+                    "the script.\n%s" % worker.stderr
+            self.end_run(run)
+        if self.pending and not self.stopping:
+            if worker.initialized:
+                self.start_worker()
+            elif not self.workers:
+                # QGIS does not start; more workers will not help
+                self.fail_pending(worker.stderr)
+        if not self.workers:
+            self.finished.emit()
+
+    def fail_pending(self, reason):
+        while self.pending:
+            run = self.pending.popleft()
+            run.status = 'error'
+            run.traceback = reason
+            self.end_run(run)
+
+    def end_run(self, run):
+        self.done += 1
+        if run.status not in ('ok', STATUS_STOPPED):
+            self.failed += 1
+        self.run_finished.emit(run)
+        self.progress.emit(self.done, len(self.runs), self.failed)
+
+    def stop(self):
+        """
+        Stop the batch: runs not yet started are marked stopped and the
+        workers are killed.
+        """
+        self.stopping = True
+        while self.pending:
+            run = self.pending.popleft()
+            run.status = STATUS_STOPPED
+            self.end_run(run)
+        for worker in list(self.workers):
+            worker.kill()
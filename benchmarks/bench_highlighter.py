@@ -0,0 +1,239 @@
+"""
+Benchmark the single-pass highlighter against the one-search-per-rule
+highlighter it replaced, on a long generated script
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+Run from the plugin directory:
+
+    python benchmarks/bench_highlighter.py [LINES]
+
+The previous highlighter ran a search for each of its 50-odd rules over
+every line, then two passes for triple-quoted strings. Both ways of
+finding the spans are timed with Python's re, which needs no Qt; with
+PyQt4 the two QSyntaxHighlighters are also timed highlighting a
+QTextDocument, the first time and again (as when the same script is
+shown twice). The best of REPEATS runs is kept. Generated scripts
+repeat many lines, so the cache helps even the first time.
+"""
+import os
+import re
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import highlight_engine
+from highlight_engine import KEYWORDS, highlight_block, tokenize_block
+from corpus import long_source
+
+try:
+    from PyQt4.QtCore import QRegExp
+    from PyQt4.QtGui import QApplication, QTextDocument, QSyntaxHighlighter
+except ImportError:
+    QApplication = None
+
+LINES = 20000
+REPEATS = 3
+
+OPERATORS = [
+    '=', '==', '!=', '<', '<=', '>', '>=',
+    '\+', '-', '\*', '/', '//', '\%', '\*\*',
+    '\+=', '-=', '\*=', '/=', '\%=',
+    '\^', '\|', '\&', '\~', '>>', '<<',
+]
+BRACES = ['\{', '\}', '\(', '\)', '\[', '\]']
+
+# the rules of the previous highlighter: (pattern, group, style)
+LEGACY_RULES = (
+    [(r'\b%s\b' % w, 0, 'keyword') for w in KEYWORDS] +
+    [(o, 0, 'operator') for o in OPERATORS] +
+    [(b, 0, 'brace') for b in BRACES] + [
+        (r'\bself\b', 0, 'self'),
+        (r'"[^"\\]*(\\.[^"\\]*)*"', 0, 'string'),
+        (r"'[^'\\]*(\\.[^'\\]*)*'", 0, 'string'),
+        (r'\bdef\b\s*(\w+)', 1, 'defclass'),
+        (r'\bclass\b\s*(\w+)', 1, 'defclass'),
+        (r'#[^\n]*', 0, 'comment'),
+        (r'\b[+-]?[0-9]+[lL]?\b', 0, 'numbers'),
+        (r'\b[+-]?0[xX][0-9A-Fa-f]+[lL]?\b', 0, 'numbers'),
+        (r'\b[+-]?[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?\b', 0,
+         'numbers'),
+    ])
+
+
+def legacy_spans(rules, text, state):
+    """
+    Find the spans of a line as the previous highlighter did, with re.
+    """
+    spans = []
+    for (expression, nth, style) in rules:
+        for match in expression.finditer(text):
+            if match.group(nth):
+                spans.append((match.start(nth), len(match.group(nth)),
+                              style))
+    new_state = 0
+    for (delimiter, in_state) in (("'''", 1), ('"""', 2)):
+        if state == in_state:
+            start = 0
+            add = 0
+        else:
+            start = text.find(delimiter)
+            add = 3
+        while start >= 0:
+            end = text.find(delimiter, start + add)
+            if end >= add:
+                length = end - start + add + 3
+                new_state = 0
+            else:
+                new_state = in_state
+                length = len(text) - start + add
+            spans.append((start, length, 'string2'))
+            start = text.find(delimiter, start + length)
+        if new_state == in_state:
+            break
+    return (spans, new_state)
+
+
+def best_time(run):
+    best = None
+    for repeat in range(REPEATS):
+        start = time.time()
+        run()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def spans_of_lines(find, lines):
+    state = -1
+    for line in lines:
+        (spans, state) = find(line, state)
+
+
+def bench_spans(lines):
+    rules = [(re.compile(pattern), nth, style)
+             for (pattern, nth, style) in LEGACY_RULES]
+    results = []
+    results.append(('one search per rule', best_time(
+        lambda: spans_of_lines(lambda text, state:
+                               legacy_spans(rules, text, state), lines))))
+    results.append(('single pass', best_time(
+        lambda: spans_of_lines(tokenize_block, lines))))
+
+    def cold():
+        highlight_engine.cache.clear()
+        spans_of_lines(highlight_block, lines)
+    results.append(('single pass, cache filling', best_time(cold)))
+    results.append(('single pass, cache warm', best_time(
+        lambda: spans_of_lines(highlight_block, lines))))
+    return results
+
+
+def legacy_highlighter_class():
+    """
+    Return the previous PythonHighlighter, built on QRegExp.
+    """
+    class LegacyPythonHighlighter(QSyntaxHighlighter):
+
+        def __init__(self, document):
+            QSyntaxHighlighter.__init__(self, document)
+            from syntax import STYLES
+            self.tri_single = (QRegExp("'''"), 1, STYLES['string2'])
+            self.tri_double = (QRegExp('"""'), 2, STYLES['string2'])
+            self.rules = [(QRegExp(pattern), nth, STYLES[style])
+                          for (pattern, nth, style) in LEGACY_RULES]
+
+        def highlightBlock(self, text):
+            for expression, nth, format in self.rules:
+                index = expression.indexIn(text, 0)
+                while index >= 0:
+                    index = expression.pos(nth)
+                    length = len(expression.cap(nth))
+                    self.setFormat(index, length, format)
+                    index = expression.indexIn(text, index + length)
+            self.setCurrentBlockState(0)
+            in_multiline = self.match_multiline(text, *self.tri_single)
+            if not in_multiline:
+                in_multiline = self.match_multiline(text, *self.tri_double)
+
+        def match_multiline(self, text, delimiter, in_state, style):
+            if self.previousBlockState() == in_state:
+                start = 0
+                add = 0
+            else:
+                start = delimiter.indexIn(text)
+                add = delimiter.matchedLength()
+            while start >= 0:
+                end = delimiter.indexIn(text, start + add)
+                if end >= add:
+                    length = end - start + add + delimiter.matchedLength()
+                    self.setCurrentBlockState(0)
+                else:
+                    self.setCurrentBlockState(in_state)
+                    length = len(text) - start + add
+                self.setFormat(start, length, style)
+                start = delimiter.indexIn(text, start + length)
+            return self.currentBlockState() == in_state
+
+    return LegacyPythonHighlighter
+
+
+def bench_documents(source):
+    from syntax import PythonHighlighter
+    results = []
+    for (label, highlighter_class) in (
+            ('previous highlighter', legacy_highlighter_class()),
+            ('single pass highlighter', PythonHighlighter)):
+        highlight_engine.cache.clear()
+        document = QTextDocument()
+        document.setPlainText(source)
+        highlighter = highlighter_class(document)
+        for attempt in ('first', 'again'):
+            start = time.time()
+            highlighter.rehighlight()
+            results.append(('%s, %s' % (label, attempt),
+                            time.time() - start))
+    return results
+
+
+def print_results(title, results, lines):
+    print title
+    base = results[0][1]
+    for (label, elapsed) in results:
+        print "  %-34s %8.3f s %10.0f lines/s %7.1fx" % (
+            label, elapsed, lines / elapsed, base / elapsed)
+
+
+def main():
+    lines = LINES
+    if len(sys.argv) > 1:
+        lines = int(sys.argv[1])
+    source = long_source(lines)
+    text_lines = unicode(source).split('\n')
+    print "%d lines" % len(text_lines)
+    print_results("Finding the spans (re, no Qt):", bench_spans(text_lines),
+                  len(text_lines))
+    if QApplication is None:
+        print "PyQt4 is not available; QTextDocument not timed"
+        return
+    app = QApplication(sys.argv)
+    print_results("Highlighting a QTextDocument:", bench_documents(source),
+                  len(text_lines))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark loading scripts the old way (directory appended to sys.path,
+imported by file name) against the ScriptLoader
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+Run from the plugin directory:
+
+    python benchmarks/bench_loader.py
+
+For each number of registered scripts, every script (each in its own
+directory) is loaded once, then an import of a module that does not
+exist is timed. That failing import searches all of sys.path, so it
+shows what every later import in QGIS pays for the directories left
+behind.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from script_loader import ScriptLoader, is_script_module
+
+SIZES = (10, 100, 1000)
+MISSING_IMPORTS = 200
+
+SCRIPT = '''
+def run_script(iface):
+    return %d
+'''
+
+
+def make_scripts(root, count):
+    scripts = []
+    for number in range(count):
+        directory = os.path.join(root, 'dir%04d' % number)
+        os.mkdir(directory)
+        # the same file name in every directory, as often happens
+        script = os.path.join(directory, 'process.py')
+        with open(script, 'w') as out:
+            out.write(SCRIPT % number)
+        scripts.append(script)
+    return scripts
+
+
+def old_load(script):
+    (script_dir, script_name) = os.path.split(script)
+    user_module = os.path.splitext(script_name)[0]
+    if script_dir not in sys.path:
+        sys.path.append(script_dir)
+    if user_module in sys.modules:
+        return reload(sys.modules[user_module])
+    return __import__(user_module)
+
+
+def new_load(script, loader=ScriptLoader()):
+    return loader.load(script)
+
+
+def missing_import_time():
+    start = time.time()
+    for number in range(MISSING_IMPORTS):
+        try:
+            __import__('no_such_module_%d' % number)
+        except ImportError:
+            pass
+    return (time.time() - start) / MISSING_IMPORTS
+
+
+def measure(load, scripts):
+    saved_path = list(sys.path)
+    saved_modules = set(sys.modules)
+    try:
+        start = time.time()
+        wrong = 0
+        for (number, script) in enumerate(scripts):
+            if load(script).run_script(None) != number:
+                # the wrong process.py was returned
+                wrong += 1
+        per_script = (time.time() - start) / len(scripts)
+        return (per_script, missing_import_time(), wrong,
+                len(sys.path) - len(saved_path))
+    finally:
+        sys.path[:] = saved_path
+        for name in set(sys.modules) - saved_modules:
+            del sys.modules[name]
+
+
+def main():
+    print "%-8s %-8s %12s %14s %8s %10s" % (
+        'scripts', 'loader', 'load (ms)', 'missing (us)', 'wrong',
+        'path added')
+    for count in SIZES:
+        root = tempfile.mkdtemp(prefix='bench_loader_')
+        try:
+            scripts = make_scripts(root, count)
+            for (label, load) in (('old', old_load), ('new', new_load)):
+                (per_script, missing, wrong, added) = measure(load,
+                                                             scripts)
+                print "%-8d %-8s %12.3f %14.1f %8d %10d" % (
+                    count, label, per_script * 1000, missing * 1e6,
+                    wrong, added)
+        finally:
+            shutil.rmtree(root)
+    assert not [name for name in sys.modules if is_script_module(name)]
+
+
+if __name__ == '__main__':
+    main()
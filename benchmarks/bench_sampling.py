@@ -0,0 +1,129 @@
+"""
+Benchmark the overhead of cProfile and the sampling profiler on a
+script making many small calls
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+Run from the plugin directory:
+
+    python benchmarks/bench_sampling.py
+
+The workload stands in for a script looping over features and calling
+small API methods on each. Every way of running it is timed REPEATS
+times and the best time kept; the overhead is relative to the run
+without a profiler. On a busy machine the timings are noisy, so the
+cost of taking one sample of a STACK_DEPTH deep stack is measured as
+well: the sampling overhead is about that cost times the rate.
+"""
+import cProfile
+import os
+import sys
+import thread
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from sampling_profiler import SamplingProfiler, sample_rows
+
+FEATURES = 200000
+REPEATS = 5
+STACK_DEPTH = 30
+SAMPLES = 20000
+
+
+class Feature(object):
+
+    def __init__(self, fid):
+        self.fid = fid
+        self.values = {'name': 'feature %d' % fid, 'area': fid * 1.5}
+
+    def id(self):
+        return self.fid
+
+    def attribute(self, name):
+        return self.values[name]
+
+
+def total_area(features):
+    total = 0.0
+    for feature in features:
+        if feature.id() % 2:
+            total += feature.attribute('area')
+        else:
+            total -= len(feature.attribute('name'))
+    return total
+
+
+def workload():
+    return total_area(Feature(fid) for fid in xrange(FEATURES))
+
+
+def best_time(run):
+    best = None
+    for repeat in range(REPEATS):
+        start = time.time()
+        run()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def sample_cost(depth=STACK_DEPTH):
+    """
+    Return the seconds taken by one sample of a stack depth frames deep.
+    """
+    if depth:
+        return sample_cost(depth - 1)
+    profiler = SamplingProfiler()
+    profiler.thread_id = thread.get_ident()
+    start = time.time()
+    for number in xrange(SAMPLES):
+        profiler.sample()
+    return (time.time() - start) / SAMPLES
+
+
+def main():
+    base = best_time(workload)
+    print "%-20s %10s %10s %10s" % ('profiler', 'seconds', 'overhead',
+                                    'samples')
+    print "%-20s %10.3f %9s%% %10s" % ('none', base, '0.0', '')
+    elapsed = best_time(lambda: cProfile.Profile().runcall(workload))
+    print "%-20s %10.3f %9.1f%% %10s" % ('cProfile', elapsed,
+                                         100 * (elapsed / base - 1), '')
+    for rate in (100, 1000):
+        profilers = []
+
+        def sampled():
+            profiler = SamplingProfiler(rate)
+            profilers.append(profiler)
+            profiler.runcall(workload)
+        elapsed = best_time(sampled)
+        print "%-20s %10.3f %9.1f%% %10d" % (
+            'sampling %d/s' % rate, elapsed, 100 * (elapsed / base - 1),
+            profilers[-1].samples)
+    cost = sample_cost()
+    print
+    print "One sample of a %d frame stack: %.1f us, %.2f%% at 100/s, " \
+        "%.1f%% at 1000/s" % (STACK_DEPTH, cost * 1e6, cost * 100 * 100,
+                               cost * 1000 * 100)
+    print
+    print "Hottest frames of the last sampled run:"
+    for row in sample_rows(profilers[-1].stacks, 5):
+        print "  %-14s own %5d  total %5d" % (row.function, row.own,
+                                              row.cumulative)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Microbenchmark for the console: lines per second written through
+StdoutTextEdit, compared with the previous unbatched write().
+
+Usage:
+    python benchmarks/bench_stdout.py [LINES]
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from PyQt4.QtCore import *
+from PyQt4.QtGui import *
+
+from stdout_textwidget import StdoutTextEdit
+
+
+class LegacyStdoutTextEdit(StdoutTextEdit):
+    """
+    StdoutTextEdit with the write() used before output was batched: one
+    document update, processEvents() and flush per call.
+    """
+
+    def write(self, text, warning=False):
+        cursor = QTextCursor(self.textCursor())
+        cursor.movePosition(QTextCursor.End)
+        self.setTextCursor(cursor)
+        if warning:
+            self.setTextColor(QColor(Qt.red))
+            self.insertPlainText(text)
+        else:
+            self.insertPlainText(text)
+        self.ensureCursorVisible()
+        QCoreApplication.processEvents()
+        sys.__stdout__.flush()
+        self.new_output.emit(str(text))
+
+
+def lines_per_second(widget_class, lines):
+    widget = widget_class()
+    widget.show()
+    start = time.time()
+    for i in xrange(lines):
+        # a print statement writes the text and the newline separately
+        widget.write("line %d of the benchmark output" % i)
+        widget.write("\n")
+    widget.flush()
+    QCoreApplication.processEvents()
+    elapsed = time.time() - start
+    widget.close()
+    return lines / elapsed
+
+
+def main():
+    lines = 20000
+    if len(sys.argv) > 1:
+        lines = int(sys.argv[1])
+    app = QApplication(sys.argv)
+    before = lines_per_second(LegacyStdoutTextEdit, lines)
+    after = lines_per_second(StdoutTextEdit, lines)
+    print "%d lines" % lines
+    print "unbatched write: %10.0f lines/s" % before
+    print "batched write:   %10.0f lines/s" % after
+    print "speedup:         %10.1fx" % (after / before)
+
+
+if __name__ == '__main__':
+    main()
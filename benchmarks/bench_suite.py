@@ -0,0 +1,361 @@
+"""
+Benchmark the hot paths of ScriptRunner over synthetic script corpora
+and write the results as JSON
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+Run from the plugin directory:
+
+    python benchmarks/bench_suite.py [--sizes 10,1000,10000]
+        [--output results.json] [--compare earlier.json]
+
+QGIS is not needed: the qgis package in benchmarks/stubs stands in for
+qgis.core and qgis.utils.iface, and its settings directory is a
+temporary one. Qt runs on the offscreen platform where the Qt build
+has one; a Qt 4 build for X11 needs a display, e.g. xvfb-run. Without
+PyQt4 the benchmarks that need Qt are skipped and listed as such.
+
+For each corpus size the suite measures:
+
+    scan             scan_script on every script (scripts/s, MB/s)
+    have_run_method  the line-by-line check scanning replaced, for
+                     comparison (scripts/s)
+    metadata_cold    MetadataCache.scan with an empty cache (scripts/s)
+    metadata_warm    the same with every entry valid (scripts/s)
+    info_html        outline_html of a scanned script (ms)
+    startup          ScriptRunner(iface) and initGui until every script
+                     is listed, with an empty then a full cache (s)
+
+and once each: PythonHighlighter on a 10,000 line file (lines/s),
+StdoutTextEdit.write (lines/s) and argument parsing (sets/s).
+
+Each result is written with its unit and whether higher is better.
+--compare prints the change from an earlier results file and marks
+those that got worse by more than the threshold.
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, os.path.join(BENCH_DIR, 'stubs'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import __init__ as plugin_metadata
+import qgis.utils
+from qgis.core import QgsApplication
+
+from corpus import make_corpus, long_source
+from metadata_cache import MetadataCache
+from script_args import build_user_args, decode_args, encode_args
+from script_scanner import scan_script, outline_html
+
+try:
+    from PyQt4.QtCore import QT_VERSION_STR, QSettings, QCoreApplication
+    from PyQt4.QtGui import QApplication, QTextDocument
+except ImportError:
+    QApplication = None
+
+SIZES = (10, 1000, 10000)
+HIGHLIGHT_LINES = 10000
+STDOUT_LINES = 20000
+ARGUMENT_SETS = 20000
+# seconds to wait for the registry to load at startup
+STARTUP_LIMIT = 600
+# a change worse than this fraction is reported as a regression
+THRESHOLD = 0.10
+
+
+def result(value, unit, higher_is_better=True):
+    return {'value': value, 'unit': unit,
+            'higher_is_better': higher_is_better}
+
+
+def skipped(reason):
+    return {'skipped': reason}
+
+
+def have_run_method(script_path):
+    """
+    The check made before a script was added until scripts were scanned
+    with ast: a regular expression over each line.
+    """
+    script = open(script_path, 'r')
+    pattern = re.compile('\s*def run_script\(*')
+    run_method = False
+    uses_args = False
+    for line in script:
+        if pattern.search(line):
+            run_method = True
+            parts = line.split(',')
+            if len(parts) > 1:
+                uses_args = True
+                break
+    script.close()
+    return run_method, uses_args
+
+
+def bench_scanning(scripts, cache_dir):
+    results = dict()
+    size = sum(os.path.getsize(script) for script in scripts)
+
+    start = time.time()
+    infos = [scan_script(script) for script in scripts]
+    elapsed = time.time() - start
+    results['scan'] = result(len(scripts) / elapsed, 'scripts/s')
+    results['scan_bytes'] = result(size / elapsed / 1e6, 'MB/s')
+
+    start = time.time()
+    for script in scripts:
+        have_run_method(script)
+    results['have_run_method'] = result(
+        len(scripts) / (time.time() - start), 'scripts/s')
+
+    metadata = MetadataCache(os.path.join(cache_dir, 'metadata.sqlite'),
+                             max_entries=len(scripts))
+    try:
+        for state in ('cold', 'warm'):
+            start = time.time()
+            for script in scripts:
+                metadata.scan(script)
+            metadata.flush()
+            results['metadata_%s' % state] = result(
+                len(scripts) / (time.time() - start), 'scripts/s')
+    finally:
+        metadata.close()
+
+    start = time.time()
+    for (script, info) in zip(scripts, infos):
+        outline_html(script, info)
+    results['info_html'] = result(
+        (time.time() - start) * 1000 / len(scripts), 'ms', False)
+    return results
+
+
+def startup_time(app, scripts):
+    """
+    Return the seconds taken to create ScriptRunner and run initGui until
+    every script has answered, and the number that timed out.
+    """
+    from scriptrunner import ScriptRunner
+    settings = QSettings()
+    settings.setValue("ScriptRunner/scripts", scripts)
+    settings.sync()
+    iface = qgis.utils.initInterface()
+    start = time.time()
+    runner = ScriptRunner(iface)
+    runner.initGui()
+    loader = runner.registry_loader
+    while loader.pending and time.time() - start < STARTUP_LIMIT:
+        app.processEvents()
+        loader.pool.waitForDone(5)
+    app.processEvents()
+    elapsed = time.time() - start
+    runner.unload()
+    runner.mw.close()
+    runner.mw.deleteLater()
+    iface.mainWindow().deleteLater()
+    app.processEvents()
+    return (elapsed, len(loader.timed_out) + len(loader.pending))
+
+
+def bench_startup(app, scripts):
+    results = dict()
+    for state in ('cold', 'warm'):
+        (elapsed, unanswered) = startup_time(app, scripts)
+        results['startup_%s' % state] = result(elapsed, 's', False)
+        if unanswered:
+            results['startup_%s_unanswered' % state] = result(
+                unanswered, 'scripts', False)
+    return results
+
+
+def bench_highlighter():
+    from syntax import PythonHighlighter
+    document = QTextDocument()
+    document.setPlainText(long_source(HIGHLIGHT_LINES))
+    highlighter = PythonHighlighter(document)
+    start = time.time()
+    highlighter.rehighlight()
+    elapsed = time.time() - start
+    return result(document.blockCount() / elapsed, 'lines/s')
+
+
+def bench_stdout():
+    from stdout_textwidget import StdoutTextEdit
+    from bench_stdout import lines_per_second
+    return result(lines_per_second(StdoutTextEdit, STDOUT_LINES), 'lines/s')
+
+
+def bench_arguments():
+    """
+    Parse the arguments of a run_script with a typical mix of paths,
+    numbers, sequences and keywords, as entered in the ArgsDialog.
+    """
+    argspec = inspect.ArgSpec(
+        ['iface', 'layer', 'distance', 'fields', 'options', 'overwrite'],
+        None, 'extra', ('roads', 250.0, ('name',), {}, False))
+    texts = {'layer': '/data/gis/roads.shp', 'distance': '1e3',
+             'fields': "['name', 'type', u'r\\xe9gion']",
+             'options': "{'buffer': 5, 'dissolve': True}",
+             'overwrite': 'True'}
+    keywords = "tolerance=0.5, tag='run 1'"
+    start = time.time()
+    for number in xrange(ARGUMENT_SETS):
+        decode_args(encode_args(build_user_args(argspec, texts, keywords)))
+    return result(ARGUMENT_SETS / (time.time() - start), 'sets/s')
+
+
+def run_suite(sizes, log):
+    app = None
+    if QApplication is not None:
+        app = QApplication.instance() or QApplication(sys.argv)
+        QCoreApplication.setOrganizationName("ScriptRunnerBenchmarks")
+        QSettings.setDefaultFormat(QSettings.IniFormat)
+    results = dict()
+    for count in sizes:
+        root = tempfile.mkdtemp(prefix='bench_suite_')
+        try:
+            log("%d scripts: generating" % count)
+            scripts = make_corpus(os.path.join(root, 'scripts'), count)
+            log("%d scripts: scanning" % count)
+            for (name, value) in bench_scanning(scripts, root).items():
+                results['%s/%d' % (name, count)] = value
+            QgsApplication.settings_dir = os.path.join(root, 'qgis')
+            os.mkdir(QgsApplication.settings_dir)
+            if app is None:
+                results['startup_cold/%d' % count] = skipped('no PyQt4')
+                results['startup_warm/%d' % count] = skipped('no PyQt4')
+            else:
+                log("%d scripts: startup" % count)
+                QSettings.setPath(QSettings.IniFormat, QSettings.UserScope,
+                                  QgsApplication.settings_dir)
+                for (name, value) in bench_startup(app, scripts).items():
+                    results['%s/%d' % (name, count)] = value
+        finally:
+            QgsApplication.settings_dir = None
+            shutil.rmtree(root)
+    log("parsing arguments")
+    results['arguments'] = bench_arguments()
+    if app is None:
+        results['highlighter'] = skipped('no PyQt4')
+        results['stdout_write'] = skipped('no PyQt4')
+    else:
+        log("highlighting")
+        results['highlighter'] = bench_highlighter()
+        log("writing to the console")
+        results['stdout_write'] = bench_stdout()
+    return results
+
+
+def environment():
+    return {'scriptrunner': plugin_metadata.version(),
+            'python': platform.python_version(),
+            'qt': QT_VERSION_STR if QApplication is not None else None,
+            'platform': platform.platform(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def format_value(value):
+    if 'skipped' in value:
+        return 'skipped (%s)' % value['skipped']
+    return '%.4g %s' % (value['value'], value['unit'])
+
+
+def change(old, new):
+    """
+    Return the relative change from old to new, positive when new is
+    better, or None if either was skipped.
+    """
+    if 'skipped' in old or 'skipped' in new or not old['value']:
+        return None
+    ratio = new['value'] / float(old['value']) - 1
+    if not new['higher_is_better']:
+        ratio = -ratio
+    return ratio
+
+
+def print_results(results, earlier=None, threshold=THRESHOLD):
+    if earlier is None:
+        for name in sorted(results):
+            print "%-28s %s" % (name, format_value(results[name]))
+        return 0
+    print "compared with ScriptRunner %s (%s)" % (
+        earlier['environment']['scriptrunner'],
+        earlier['environment']['date'])
+    regressions = 0
+    for name in sorted(results):
+        value = results[name]
+        old = earlier['results'].get(name)
+        if old is None:
+            print "%-28s %-24s (new)" % (name, format_value(value))
+            continue
+        ratio = change(old, value)
+        if ratio is None:
+            print "%-28s %s" % (name, format_value(value))
+            continue
+        mark = ''
+        if ratio < -threshold:
+            mark = '  REGRESSION'
+            regressions += 1
+        print "%-28s %-24s %+7.1f%%%s" % (name, format_value(value),
+                                          ratio * 100, mark)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark ScriptRunner without QGIS.")
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                        help="comma separated corpus sizes "
+                        "(default %(default)s)")
+    parser.add_argument('--output', default='bench-%s.json' %
+                        plugin_metadata.version(),
+                        help="where to write the results "
+                        "(default %(default)s)")
+    parser.add_argument('--compare', metavar='JSON',
+                        help="results of an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="fraction by which a result may get worse "
+                        "before it counts as a regression "
+                        "(default %(default)s)")
+    options = parser.parse_args()
+    sizes = [int(size) for size in options.sizes.split(',')]
+
+    def log(message):
+        sys.stderr.write("%s\n" % message)
+
+    earlier = None
+    if options.compare:
+        with open(options.compare, 'r') as previous:
+            earlier = json.load(previous)
+    results = run_suite(sizes, log)
+    with open(options.output, 'w') as output:
+        json.dump({'environment': environment(), 'results': results},
+                  output, indent=2, sort_keys=True)
+    regressions = print_results(results, earlier, options.threshold)
+    print
+    print "results written to %s" % options.output
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
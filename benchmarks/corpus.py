@@ -0,0 +1,181 @@
+"""
+Synthetic scripts for the benchmarks: corpora of registered scripts and
+long single files
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+The scripts look like the ones users register: a docstring, some
+imports, helper functions, a class or two and a run_script, with or
+without arguments. A few lack run_script or have a syntax error, as in
+a real list. The same seed always gives the same files.
+"""
+import os
+import random
+
+# scripts per directory, so no directory gets huge
+PER_DIRECTORY = 100
+# one script in this many has no run_script, one in ERROR_EVERY has a
+# syntax error
+NO_RUN_SCRIPT_EVERY = 25
+ERROR_EVERY = 50
+
+HEADER = '''"""
+%(title)s
+
+Loads the layers under a directory, filters their features and writes
+a summary. Generated for the ScriptRunner benchmarks.
+"""
+import os
+import sys
+from collections import defaultdict
+
+from PyQt4.QtCore import *
+from qgis.core import *
+
+TOLERANCE = %(tolerance)s
+NAMES = ['roads', 'rivers', 'parcels']  # layers looked for
+'''
+
+HELPER = '''
+
+def %(name)s(features, field='%(field)s', limit=%(limit)d):
+    """
+    Total the values of field over at most limit features.
+    """
+    total = 0.0
+    counts = defaultdict(int)
+    for (number, feature) in enumerate(features):
+        if number >= limit:
+            break
+        value = feature[field]
+        if value is None or value < TOLERANCE:
+            continue
+        # integers and floats alike
+        total += value * 1.5e-3
+        counts[feature.id() %% 7] += 1
+    return total, dict(counts)
+'''
+
+CLASS = '''
+
+class %(name)s(object):
+    """
+    Keep the layers found under root by name.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.layers = {}
+
+    def find(self, extension='.shp'):
+        for (directory, dirs, files) in os.walk(self.root):
+            for name in files:
+                if name.endswith(extension):
+                    self.layers[name[:-4]] = os.path.join(directory, name)
+        return len(self.layers)
+
+    def load(self):
+        loaded = []
+        for (name, path) in sorted(self.layers.items()):
+            layer = QgsVectorLayer(path, name, "ogr")
+            if layer.isValid():
+                loaded.append(layer)
+        return loaded
+'''
+
+RUN_SCRIPT = '''
+
+def run_script(iface%(arguments)s):
+    """
+    Entry point called by ScriptRunner.
+    """
+    finder = %(cls)s(%(root)s)
+    if not finder.find():
+        print "nothing found under %%s" %% finder.root
+        return
+    registry = QgsMapLayerRegistry.instance()
+    for layer in finder.load():
+        registry.addMapLayer(layer)
+        print "%%-20s %%s" %% (layer.name(), layer.source())
+'''
+
+ARGUMENTS = [
+    ('', "'/tmp'"),
+    (", root='/data/gis'", 'root'),
+    (", root, distance=250.0, fields=('name', 'type')", 'root'),
+    (", root='/data', **options", 'root'),
+]
+
+
+def script_source(number, rng):
+    """
+    Return the source of the numberth script of a corpus.
+    """
+    parts = [HEADER % {'title': 'Benchmark script %d' % number,
+                       'tolerance': rng.choice(['0.5', '1e-6', '10'])}]
+    for helper in range(rng.randint(2, 8)):
+        parts.append(HELPER % {'name': 'summarize_%d' % helper,
+                               'field': rng.choice(['area', 'length',
+                                                    'population']),
+                               'limit': rng.randint(10, 100000)})
+    for cls in range(rng.randint(1, 2)):
+        parts.append(CLASS % {'name': 'LayerFinder%d' % cls})
+    if number % NO_RUN_SCRIPT_EVERY != NO_RUN_SCRIPT_EVERY - 1:
+        (arguments, root) = rng.choice(ARGUMENTS)
+        parts.append(RUN_SCRIPT % {'arguments': arguments,
+                                   'cls': 'LayerFinder0', 'root': root})
+    if number % ERROR_EVERY == ERROR_EVERY - 2:
+        parts.append("\ndef broken(:\n    pass\n")
+    return ''.join(parts)
+
+
+def make_corpus(root, count, seed=0):
+    """
+    Write count scripts under root and return their paths.
+    """
+    rng = random.Random(seed)
+    if not os.path.isdir(root):
+        os.makedirs(root)
+    scripts = []
+    for number in range(count):
+        directory = os.path.join(root, 'dir%03d' % (number // PER_DIRECTORY))
+        if not os.path.isdir(directory):
+            os.mkdir(directory)
+        script = os.path.join(directory, 'script%05d.py' % number)
+        with open(script, 'w') as out:
+            out.write(script_source(number, rng))
+        scripts.append(script)
+    return scripts
+
+
+def long_source(lines, seed=0):
+    """
+    Return the source of one script at least lines long, made of the
+    parts of the corpus scripts.
+    """
+    rng = random.Random(seed)
+    parts = [HEADER % {'title': 'A long benchmark script',
+                       'tolerance': '0.5'}]
+    total = parts[0].count('\n')
+    number = 0
+    while total < lines:
+        part = HELPER % {'name': 'summarize_%d' % number,
+                         'field': rng.choice(['area', 'length']),
+                         'limit': rng.randint(10, 100000)}
+        if number % 5 == 4:
+            part = CLASS % {'name': 'LayerFinder%d' % number}
+        parts.append(part)
+        total += part.count('\n')
+        number += 1
+    source = ''.join(parts)
+    return '\n'.join(source.split('\n')[:lines]) + '\n'
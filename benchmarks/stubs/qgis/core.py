@@ -0,0 +1,114 @@
+"""
+Stand-in for qgis.core with just what ScriptRunner uses
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+The settings directory is a temporary directory unless settings_dir is
+set first, so a benchmark never touches the caches of a real profile.
+"""
+import os
+import tempfile
+
+
+class QgsApplication(object):
+    """
+    The static methods of QgsApplication that ScriptRunner calls.
+    Creating one does nothing; there is no QGIS to initialize.
+    """
+    settings_dir = None
+    prefix = ''
+
+    def __init__(self, argv=None, gui_enabled=True):
+        pass
+
+    @classmethod
+    def qgisSettingsDirPath(cls):
+        if cls.settings_dir is None:
+            cls.settings_dir = tempfile.mkdtemp(prefix='scriptrunner_qgis_')
+        return os.path.join(cls.settings_dir, '')
+
+    @classmethod
+    def qgisUserDbFilePath(cls):
+        return os.path.join(cls.qgisSettingsDirPath(), 'qgis.db')
+
+    @classmethod
+    def setPrefixPath(cls, prefix, use_default_paths=False):
+        cls.prefix = prefix
+
+    @classmethod
+    def prefixPath(cls):
+        return cls.prefix
+
+    @staticmethod
+    def initQgis():
+        pass
+
+    @staticmethod
+    def exitQgis():
+        pass
+
+
+class QgsMessageLog(object):
+
+    @staticmethod
+    def logMessage(message, tag='', level=0):
+        pass
+
+
+class QgsVectorLayer(object):
+    """
+    A layer that remembers how it was created and is always valid.
+    """
+
+    def __init__(self, path='', name='', provider='ogr'):
+        self.path = path
+        self.layer_name = name
+        self.provider = provider
+
+    def name(self):
+        return self.layer_name
+
+    def source(self):
+        return self.path
+
+    def isValid(self):
+        return True
+
+
+class QgsMapLayerRegistry(object):
+    """
+    A registry that keeps the layers added to it in a dict by name.
+    """
+    registry = None
+
+    def __init__(self):
+        self.layers = dict()
+
+    @classmethod
+    def instance(cls):
+        if cls.registry is None:
+            cls.registry = cls()
+        return cls.registry
+
+    def addMapLayer(self, layer, add_to_legend=True):
+        self.layers[layer.name()] = layer
+        return layer
+
+    def addMapLayers(self, layers, add_to_legend=True):
+        return [self.addMapLayer(layer) for layer in layers]
+
+    def mapLayers(self):
+        return dict(self.layers)
+
+    def removeAllMapLayers(self):
+        self.layers.clear()
@@ -0,0 +1,61 @@
+"""
+Stand-in for qgis.utils: an iface that records what plugins add to it
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+
+# set by initInterface, as QGIS does when it starts
+iface = None
+
+
+class StubInterface(object):
+    """
+    The QgisInterface methods ScriptRunner calls. The main window is a
+    plain QMainWindow, created when first asked for so that this module
+    can be imported before the QApplication exists, or without Qt.
+    """
+
+    def __init__(self):
+        self.main_window = None
+        self.toolbar_actions = []
+        self.plugin_menus = []
+
+    def mainWindow(self):
+        if self.main_window is None:
+            from PyQt4.QtGui import QMainWindow
+            self.main_window = QMainWindow()
+        return self.main_window
+
+    def mapCanvas(self):
+        return None
+
+    def addToolBarIcon(self, action):
+        self.toolbar_actions.append(action)
+
+    def removeToolBarIcon(self, action):
+        if action in self.toolbar_actions:
+            self.toolbar_actions.remove(action)
+
+    def addPluginToMenu(self, menu, action):
+        self.plugin_menus.append((menu, action))
+
+    def removePluginMenu(self, menu, action):
+        if (menu, action) in self.plugin_menus:
+            self.plugin_menus.remove((menu, action))
+
+
+def initInterface():
+    global iface
+    iface = StubInterface()
+    return iface
@@ -0,0 +1,154 @@
+"""
+Cache of compiled scripts kept under the user profile, so scripts on
+read-only shares are not compiled again in every session
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import hashlib
+import imp
+import marshal
+import os
+import tempfile
+import threading
+import time
+
+# entries not used by a registered script are removed after this long
+MAX_AGE = 7 * 24 * 3600
+# seconds between scripts during a precompile pass
+PRECOMPILE_PAUSE = 0.05
+
+
+class BytecodeCache(object):
+    """
+    Marshalled code objects stored in a directory, one file per entry.
+    The key is a hash of the interpreter's bytecode magic number, the
+    script path (which ends up in tracebacks) and the source, so an entry
+    is never stale: an edited script or another Python version simply
+    has a different key.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, path, source):
+        digest = hashlib.sha1(imp.get_magic())
+        digest.update(os.path.abspath(path).encode('utf-8'))
+        digest.update('\0')
+        digest.update(source)
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key + '.code')
+
+    def load(self, key):
+        """
+        Return the code stored under key, or None.
+        """
+        try:
+            with open(self.entry_path(key), 'rb') as entry:
+                return marshal.load(entry)
+        except (IOError, EOFError, ValueError, TypeError):
+            # missing or damaged; it will be compiled again
+            return None
+
+    def store(self, key, code):
+        """
+        Store code under key. The entry is written to a temporary file
+        and renamed so a reader never sees half an entry.
+        """
+        (handle, temp_path) = tempfile.mkstemp(dir=self.directory,
+                                               suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as entry:
+                marshal.dump(code, entry)
+            if os.name == 'nt' and os.path.exists(self.entry_path(key)):
+                os.remove(self.entry_path(key))
+            os.rename(temp_path, self.entry_path(key))
+        except (IOError, OSError):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def code(self, path):
+        """
+        Return the code object of the script at path, compiling and
+        storing it if it is not cached. Raises IOError if the script
+        cannot be read and SyntaxError if it does not compile.
+        """
+        (code, key) = self.code_and_key(path)
+        return code
+
+    def code_and_key(self, path):
+        path = os.path.abspath(unicode(path))
+        with open(path, 'rU') as src:
+            source = src.read()
+        key = self.key(path, source)
+        code = self.load(key)
+        if code is None:
+            code = compile(source, path, 'exec', 0, True)
+            self.store(key, code)
+        return (code, key)
+
+    def prune(self, live_keys, max_age=MAX_AGE):
+        """
+        Remove entries not in live_keys that were written more than
+        max_age seconds ago.
+        """
+        cutoff = time.time() - max_age
+        for name in os.listdir(self.directory):
+            (key, ext) = os.path.splitext(name)
+            if ext not in ('.code', '.tmp') or key in live_keys:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+class Precompiler(threading.Thread):
+    """
+    Compile a list of scripts into a BytecodeCache on a background
+    thread, pausing between scripts so it stays out of the way, then
+    prune the entries no script uses. Scripts that cannot be read or do
+    not compile are skipped; they will fail when run, as they would
+    without the cache.
+    """
+
+    def __init__(self, cache, scripts):
+        threading.Thread.__init__(self, name='ScriptRunnerPrecompiler')
+        self.daemon = True
+        self.cache = cache
+        self.scripts = list(scripts)
+        self.stop_requested = False
+        self.cached = 0
+
+    def run(self):
+        live_keys = set()
+        for script in self.scripts:
+            if self.stop_requested:
+                return
+            try:
+                (code, key) = self.cache.code_and_key(script)
+            except (IOError, OSError, SyntaxError, TypeError):
+                continue
+            live_keys.add(key)
+            self.cached += 1
+            time.sleep(PRECOMPILE_PAUSE)
+        self.cache.prune(live_keys)
+
+    def stop(self):
+        self.stop_requested = True
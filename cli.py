@@ -0,0 +1,267 @@
+"""
+Command line interface for running Script Runner scripts without the
+QGIS desktop.
+
+Usage:
+    python -m scriptrunner run SCRIPT [NAME=VALUE ...] [SCRIPT ...]
+    python -m scriptrunner list
+    python -m scriptrunner history [--script SCRIPT] [--since TIME]
+                                   [--until TIME] [--limit N]
+    python -m scriptrunner show RUN_ID
+    python -m scriptrunner export-index BUNDLE ROOT
+    python -m scriptrunner import-index BUNDLE ROOT
+
+A SCRIPT is either a path or the file name of a script registered in
+Script Runner (with or without the .py extension). The NAME=VALUE pairs
+following a script are passed to its run_script function: a name that
+matches a parameter of run_script fills it; other names are passed as
+keyword arguments. Values are Python literals; anything else is passed
+as a string.
+
+All scripts given are run in one process with one headless
+QgsApplication. The exit status is 0 if every script completed, 1 if
+any script failed and 2 if the command line could not be used.
+
+The history and show commands read the archive of run output Script
+Runner keeps when logging to disk is enabled; QGIS does not need to be
+running. TIME is YYYY-MM-DD or YYYY-MM-DD HH:MM[:SS].
+
+export-index scans every script under ROOT into BUNDLE, a metadata
+cache with paths relative to ROOT. import-index adds the entries of a
+bundle to the metadata cache for scripts copied to ROOT, so Script
+Runner does not have to scan them.
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+import traceback
+
+from headless import init_qgis, exit_qgis, HeadlessIface
+from script_runtime import call_run_script, import_script, \
+    user_args_from_pairs
+from run_archive import RunArchive
+from run_metrics import RunMetrics
+from metadata_cache import MetadataCache, default_cache_path
+
+# organization and application names QGIS uses for its settings
+SETTINGS_ORGANIZATION = "QGIS"
+SETTINGS_APPLICATION = "QGIS2"
+
+
+def qgis_settings():
+    from PyQt4.QtCore import QSettings
+    return QSettings(SETTINGS_ORGANIZATION, SETTINGS_APPLICATION)
+
+
+def registered_scripts():
+    """
+    Return the list of scripts registered in Script Runner.
+    """
+    settings = qgis_settings()
+    scripts = settings.value("ScriptRunner/scripts")
+    if not scripts:
+        return []
+    if not isinstance(scripts, list):
+        scripts = [scripts]
+    return [unicode(script) for script in scripts]
+
+
+def resolve_script(name, registry):
+    """
+    Return the path of the script given on the command line, looking it
+    up in the registry if it is not an existing file.
+    """
+    if os.path.isfile(name):
+        return os.path.abspath(name)
+    for script in registry:
+        base = os.path.basename(script)
+        if name == base or name == os.path.splitext(base)[0]:
+            return script
+    raise ValueError("%s is neither a file nor a registered script" % name)
+
+
+def archive_directory():
+    """
+    Return the directory of the run archive kept by Script Runner.
+    """
+    log_dir = qgis_settings().value("ScriptRunner/log_directory")
+    if not log_dir:
+        raise ValueError("no log directory is set in the Script Runner "
+                         "preferences; use --archive")
+    return os.path.join(unicode(log_dir), "runs")
+
+
+def parse_time(text):
+    """
+    Return the seconds since the epoch for a date or date and time.
+    """
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return time.mktime(time.strptime(text, fmt))
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError("%s is not a date or date and time"
+                                     % text)
+
+
+def list_history(archive, options):
+    for run in archive.find(options.script, options.since, options.until,
+                            options.limit):
+        started = datetime.datetime.fromtimestamp(run.started)
+        print "%6d  %s  %8.1fs  %-7s  %s" % (
+            run.run_id, started.strftime('%Y-%m-%d %H:%M:%S'),
+            run.finished - run.started, run.status, run.script)
+        if run.metrics is not None:
+            print "        %s" % run.metrics.summary()
+
+
+def parse_run_arguments(tokens, registry):
+    """
+    Split the tokens of the run command into a list of
+    (script path, [(name, value), ...]).
+    """
+    runs = []
+    for token in tokens:
+        if '=' in token and not os.path.isfile(token):
+            if not runs:
+                raise ValueError("argument %s given before any script"
+                                 % token)
+            (name, value) = token.split('=', 1)
+            runs[-1][1].append((name.strip(), value))
+        else:
+            runs.append((resolve_script(token, registry), []))
+    return runs
+
+
+def run_scripts(runs, stop_on_error=False):
+    """
+    Run each script with its arguments and return the number of scripts
+    that failed.
+    """
+    iface = HeadlessIface()
+    failures = 0
+    for (script, pairs) in runs:
+        print "----------%s----------" % datetime.datetime.now()
+        print "Running %s" % script
+        try:
+            user_script = import_script(script)
+            user_args = user_args_from_pairs(user_script, pairs)
+            metrics = RunMetrics()
+            metrics.measure(call_run_script, user_script, iface, user_args)
+        except:
+            failures += 1
+            sys.stderr.write(traceback.format_exc())
+            print "Abnormal termination: %s" % script
+            if stop_on_error:
+                break
+        else:
+            print "Completed script: %s (%s)" % (script, metrics.summary())
+        sys.stdout.flush()
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m scriptrunner',
+        description="Run Script Runner scripts in a headless QGIS")
+    commands = parser.add_subparsers(dest='command')
+    run_parser = commands.add_parser(
+        'run', help="run one or more scripts",
+        description="Run scripts given as SCRIPT [NAME=VALUE ...] ...")
+    run_parser.add_argument('--stop-on-error', action='store_true',
+                            help="do not run the remaining scripts after "
+                            "one fails")
+    run_parser.add_argument('--prefix', help="QGIS prefix path (defaults "
+                            "to $QGIS_PREFIX_PATH)")
+    run_parser.add_argument('scripts', nargs='+', metavar='SCRIPT')
+    commands.add_parser('list', help="list the registered scripts")
+    history_parser = commands.add_parser(
+        'history', help="list archived runs, most recent first")
+    history_parser.add_argument('--script', help="only runs of this "
+                                "script (path or file name)")
+    history_parser.add_argument('--since', type=parse_time,
+                                help="only runs started at or after TIME")
+    history_parser.add_argument('--until', type=parse_time,
+                                help="only runs started before TIME")
+    history_parser.add_argument('--limit', type=int,
+                                help="list at most N runs")
+    show_parser = commands.add_parser(
+        'show', help="print the output of an archived run")
+    show_parser.add_argument('run_id', type=int, metavar='RUN_ID')
+    for (command, summary) in (
+            ('export-index', "write a metadata bundle for the scripts "
+             "under ROOT"),
+            ('import-index', "add a metadata bundle for the scripts "
+             "copied to ROOT")):
+        index_parser = commands.add_parser(command, help=summary)
+        index_parser.add_argument('bundle', metavar='BUNDLE')
+        index_parser.add_argument('root', metavar='ROOT')
+        index_parser.add_argument(
+            '--cache', default=default_cache_path(),
+            help="metadata cache (defaults to %(default)s)")
+    for archive_parser in (history_parser, show_parser):
+        archive_parser.add_argument(
+            '--archive', help="archive directory (defaults to the runs "
+            "directory under the Script Runner log directory)")
+    options = parser.parse_args(argv)
+
+    if options.command in ('export-index', 'import-index'):
+        cache = MetadataCache(options.cache)
+        if options.command == 'export-index':
+            count = cache.export_bundle(options.bundle, options.root)
+            print "Exported %d scripts to %s" % (count, options.bundle)
+        else:
+            count = cache.import_bundle(options.bundle, options.root)
+            print "Imported %d scripts from %s" % (count, options.bundle)
+        cache.close()
+        return 0
+
+    if options.command in ('history', 'show'):
+        try:
+            archive = RunArchive(options.archive or archive_directory(),
+                                 create=False)
+            if options.command == 'history':
+                list_history(archive, options)
+            else:
+                sys.stdout.write(
+                    archive.output(options.run_id).encode('utf-8'))
+        except (ValueError, KeyError) as e:
+            sys.stderr.write("%s\n" % e.args[0])
+            return 2
+        return 0
+
+    registry = registered_scripts()
+    if options.command == 'list':
+        for script in registry:
+            print script
+        return 0
+
+    try:
+        runs = parse_run_arguments(options.scripts, registry)
+    except ValueError as e:
+        sys.stderr.write("%s\n" % e)
+        return 2
+
+    app = init_qgis(options.prefix)
+    try:
+        failures = run_scripts(runs, options.stop_on_error)
+    finally:
+        exit_qgis(app)
+    if failures:
+        return 1
+    return 0
@@ -0,0 +1,146 @@
+"""
+On-disk history of console output and a pager for browsing it
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import tempfile
+from array import array
+
+from PyQt4.QtCore import *
+from PyQt4.QtGui import *
+
+
+class ConsoleHistory(object):
+    """
+    Lines that no longer fit in the console, kept in a temporary segment
+    file. The offset of each line is kept in memory so any range of lines
+    can be read without scanning the file.
+    """
+
+    def __init__(self):
+        self.segment = None
+        self.offsets = array('L')
+        self.end = 0
+
+    def append(self, text):
+        """
+        Append text to the history. A trailing partial line is kept as a
+        line of its own.
+        """
+        if not text:
+            return
+        if self.segment is None:
+            self.segment = tempfile.TemporaryFile(prefix='scriptrunner_')
+        lines = text.split(u'\n')
+        if lines[-1] == u'':
+            lines.pop()
+        self.segment.seek(self.end)
+        for line in lines:
+            data = line.encode('utf-8') + '\n'
+            self.offsets.append(self.end)
+            self.segment.write(data)
+            self.end += len(data)
+
+    def line_count(self):
+        return len(self.offsets)
+
+    def read_lines(self, start, count):
+        """
+        Return up to count lines starting at line number start.
+        """
+        start = max(0, start)
+        stop = min(start + count, len(self.offsets))
+        if start >= stop:
+            return []
+        if stop < len(self.offsets):
+            end = self.offsets[stop]
+        else:
+            end = self.end
+        self.segment.seek(self.offsets[start])
+        data = self.segment.read(end - self.offsets[start])
+        return data.decode('utf-8', 'replace').split(u'\n')[:stop - start]
+
+    def clear(self):
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+        self.offsets = array('L')
+        self.end = 0
+
+
+class HistoryPager(QDialog):
+    """
+    Browse a ConsoleHistory. Only the lines that fit in the view are read
+    from disk; the scroll bar spans the whole history.
+    """
+
+    def __init__(self, history, parent=None):
+        QDialog.__init__(self, parent)
+        self.history = history
+        self.setWindowTitle("Script Runner - Earlier Output")
+
+        layout = QVBoxLayout(self)
+        h_layout = QHBoxLayout()
+        self.view = QPlainTextEdit()
+        self.view.setReadOnly(True)
+        self.view.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.view.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.view.installEventFilter(self)
+        self.view.viewport().installEventFilter(self)
+        h_layout.addWidget(self.view)
+        self.scroll_bar = QScrollBar(Qt.Vertical)
+        self.scroll_bar.valueChanged.connect(self.show_page)
+        h_layout.addWidget(self.scroll_bar)
+        layout.addLayout(h_layout)
+        self.position = QLabel()
+        layout.addWidget(self.position)
+
+        self.resize(700, 450)
+        self.update_range()
+        self.scroll_bar.setValue(self.scroll_bar.maximum())
+
+    def page_size(self):
+        line_height = self.view.fontMetrics().lineSpacing()
+        return max(1, self.view.viewport().height() / line_height - 1)
+
+    def update_range(self):
+        page = self.page_size()
+        self.scroll_bar.setPageStep(page)
+        self.scroll_bar.setMaximum(max(0, self.history.line_count() - page))
+        self.show_page(self.scroll_bar.value())
+
+    def show_page(self, first_line):
+        lines = self.history.read_lines(first_line, self.page_size())
+        self.view.setPlainText(u'\n'.join(lines))
+        if lines:
+            self.position.setText("Lines %d to %d of %d earlier lines" % (
+                first_line + 1, first_line + len(lines),
+                self.history.line_count()))
+        else:
+            self.position.setText("No earlier output")
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Wheel:
+            self.scroll_bar.event(event)
+            return True
+        if event.type() == QEvent.KeyPress:
+            if event.key() in (Qt.Key_PageUp, Qt.Key_PageDown, Qt.Key_Up,
+                               Qt.Key_Down, Qt.Key_Home, Qt.Key_End):
+                self.scroll_bar.event(event)
+                return True
+        return QDialog.eventFilter(self, obj, event)
+
+    def resizeEvent(self, event):
+        QDialog.resizeEvent(self, event)
+        self.update_range()
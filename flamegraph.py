@@ -0,0 +1,223 @@
+"""
+Render collapsed stacks as a flame graph in a self-contained HTML page
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import cgi
+import os
+import zlib
+
+WIDTH = 1200
+FRAME_HEIGHT = 16
+# frames narrower than this many pixels are left out
+MIN_WIDTH = 0.5
+# pixels per character of the 11px labels
+CHAR_WIDTH = 6.5
+
+PAGE = u"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>%(title)s</title>
+<style>
+body { font-family: sans-serif; margin: 10px; }
+svg text { font-size: 11px; fill: #000; pointer-events: none; }
+svg rect { stroke: #fff; stroke-width: 0.5; cursor: pointer; }
+svg g:hover rect { stroke: #000; }
+#details { height: 1.5em; font-family: monospace; }
+</style>
+</head>
+<body>
+<h3>%(title)s</h3>
+<p>%(subtitle)s Click a frame to zoom in, <a href="#" id="reset">reset
+zoom</a>.</p>
+<div id="details"></div>
+<svg id="flamegraph" xmlns="http://www.w3.org/2000/svg" width="%(width)d"
+ height="%(height)d">
+%(frames)s
+</svg>
+<script>
+(function () {
+    var svg = document.getElementById('flamegraph');
+    var details = document.getElementById('details');
+    var frames = svg.getElementsByTagName('g');
+    var width = %(width)d;
+    var charWidth = %(char_width)s;
+
+    function label(g, w) {
+        var text = g.getElementsByTagName('text')[0];
+        var name = g.getAttribute('data-name');
+        var chars = Math.floor((w - 6) / charWidth);
+        if (chars < 3) {
+            text.textContent = '';
+        } else if (name.length > chars) {
+            text.textContent = name.substring(0, chars - 2) + '..';
+        } else {
+            text.textContent = name;
+        }
+    }
+
+    function zoom(x, w, depth) {
+        var scale = width / w;
+        for (var i = 0; i < frames.length; i++) {
+            var g = frames[i];
+            var fx = parseFloat(g.getAttribute('data-x'));
+            var fw = parseFloat(g.getAttribute('data-w'));
+            var fd = parseInt(g.getAttribute('data-depth'), 10);
+            var inside = fx >= x - 1e-6 && fx + fw <= x + w + 1e-6;
+            var below = fd < depth && fx <= x + 1e-6 &&
+                fx + fw >= x + w - 1e-6;
+            if (!(inside || below)) {
+                g.style.display = 'none';
+                continue;
+            }
+            g.style.display = '';
+            var nx = below ? 0 : (fx - x) * scale;
+            var nw = below ? width : fw * scale;
+            var rect = g.getElementsByTagName('rect')[0];
+            rect.setAttribute('x', nx);
+            rect.setAttribute('width', nw);
+            g.getElementsByTagName('text')[0].setAttribute('x', nx + 3);
+            label(g, nw);
+        }
+    }
+
+    for (var i = 0; i < frames.length; i++) {
+        frames[i].onclick = function () {
+            zoom(parseFloat(this.getAttribute('data-x')),
+                 parseFloat(this.getAttribute('data-w')),
+                 parseInt(this.getAttribute('data-depth'), 10));
+        };
+        frames[i].onmouseover = function () {
+            details.textContent = this.getElementsByTagName('title')[0]
+                .textContent;
+        };
+    }
+    document.getElementById('reset').onclick = function () {
+        zoom(0, width, 0);
+        return false;
+    };
+    zoom(0, width, 0);
+})();
+</script>
+</body>
+</html>
+"""
+
+
+class Node(object):
+
+    def __init__(self, key):
+        self.key = key
+        self.count = 0
+        self.children = dict()
+
+
+def build_tree(stacks):
+    root = Node(None)
+    for (stack, count) in stacks.iteritems():
+        root.count += count
+        node = root
+        for key in stack:
+            child = node.children.get(key)
+            if child is None:
+                child = node.children[key] = Node(key)
+            child.count += count
+            node = child
+    return root
+
+
+def frame_color(key):
+    """
+    Return a warm colour that is the same for every frame of a function.
+    """
+    value = zlib.crc32(repr(key)) & 0xffffffff
+    red = 205 + value % 50
+    green = 80 + (value >> 8) % 150
+    blue = (value >> 16) % 60
+    return "rgb(%d,%d,%d)" % (red, green, blue)
+
+
+def frame_name(key):
+    (path, line, function) = key
+    if not line:
+        return function
+    return "%s (%s:%d)" % (function, os.path.basename(path), line)
+
+
+def render_frames(root, height):
+    """
+    Return the SVG groups of the frames under root, callers at the
+    bottom.
+    """
+    parts = []
+    scale = float(WIDTH) / root.count
+
+    def render(node, x, depth):
+        for child in sorted(node.children.values(), key=lambda n: n.key):
+            w = child.count * scale
+            if w >= MIN_WIDTH:
+                y = height - (depth + 1) * FRAME_HEIGHT
+                name = frame_name(child.key)
+                title = "%s: %d sample%s, %.2f%%" % (
+                    name, child.count, '' if child.count == 1 else 's',
+                    100.0 * child.count / root.count)
+                parts.append(
+                    u'<g data-name="%s" data-x="%.2f" data-w="%.2f" '
+                    u'data-depth="%d"><title>%s</title>'
+                    u'<rect x="%.2f" y="%d" width="%.2f" height="%d" '
+                    u'fill="%s"/><text x="%.2f" y="%d"></text></g>' % (
+                        escape(name), x, w, depth + 1, escape(title), x, y,
+                        w, FRAME_HEIGHT - 1, frame_color(child.key),
+                        x + 3, y + FRAME_HEIGHT - 4))
+                render(child, x, depth + 1)
+            x += w
+
+    render(root, 0.0, 0)
+    return parts
+
+
+def escape(text):
+    if not isinstance(text, unicode):
+        text = text.decode('utf-8', 'replace')
+    return cgi.escape(text, quote=True)
+
+
+def stack_depth(stacks):
+    return max(len(stack) for stack in stacks) if stacks else 0
+
+
+def flamegraph_html(stacks, title, subtitle=''):
+    """
+    Return a self-contained HTML page drawing stacks (as collected by
+    sampling_profiler.SamplingProfiler) as a flame graph: each frame is
+    as wide as the share of samples it was on the stack in and sits on
+    top of its caller.
+    """
+    root = build_tree(stacks)
+    height = (stack_depth(stacks) + 1) * FRAME_HEIGHT
+    if root.count:
+        parts = render_frames(root, height)
+    else:
+        parts = []
+        subtitle = "No samples were taken; the run was too short. " + \
+            subtitle
+    return PAGE % {'title': escape(title), 'subtitle': escape(subtitle),
+                   'width': WIDTH, 'height': height,
+                   'char_width': CHAR_WIDTH, 'frames': u'\n'.join(parts)}
+
+
+def write_flamegraph(path, stacks, title, subtitle=''):
+    with open(path, 'w') as page:
+        page.write(flamegraph_html(stacks, title, subtitle).encode('utf-8'))
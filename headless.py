@@ -0,0 +1,79 @@
+"""
+Headless QGIS support for running scripts outside of the QGIS desktop
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import os
+import sys
+
+
+def init_qgis(prefix_path=None):
+    """
+    Create and initialize a QgsApplication without a GUI. The prefix
+    path is taken from prefix_path or the QGIS_PREFIX_PATH environment
+    variable. Returns the application; pass it to exit_qgis when done.
+    """
+    from qgis.core import QgsApplication
+    app = QgsApplication([], False)
+    if prefix_path is None:
+        prefix_path = os.environ.get('QGIS_PREFIX_PATH')
+    if prefix_path:
+        QgsApplication.setPrefixPath(prefix_path, True)
+    QgsApplication.initQgis()
+    return app
+
+
+def exit_qgis(app):
+    from qgis.core import QgsApplication
+    QgsApplication.exitQgis()
+
+
+class _NullObject(object):
+    """
+    Accepts any attribute access or call and does nothing. Returned for
+    parts of the QGIS interface that have no meaning without a GUI.
+    """
+
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __nonzero__(self):
+        return False
+
+
+class HeadlessIface(object):
+    """
+    Stand-in for qgis.utils.iface when a script runs outside of the QGIS
+    desktop. Scripts that only use qgis.core work unchanged; calls to GUI
+    methods such as mapCanvas().refresh() are accepted and ignored. The
+    first use of each GUI method is reported on stderr.
+    """
+
+    def __init__(self):
+        self._reported = set()
+
+    def mainWindow(self):
+        return None
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if name not in self._reported:
+            self._reported.add(name)
+            sys.stderr.write("ScriptRunner: iface.%s() is not available "
+                             "when running headless---ignored\n" % name)
+        return _NullObject()
@@ -0,0 +1,135 @@
+"""
+Tokenize Python source a line at a time for the syntax highlighter
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import re
+
+# block states: the line ends outside a string or inside a triple-quoted
+# string opened with ''' or """. QSyntaxHighlighter gives -1 for the
+# state before the first block.
+STATE_NORMAL = 0
+STATE_TRIPLE_SINGLE = 1
+STATE_TRIPLE_DOUBLE = 2
+
+# lines whose spans are kept; the cache is emptied when it fills up
+MAX_CACHED_BLOCKS = 50000
+
+KEYWORDS = [
+    'and', 'assert', 'break', 'class', 'continue', 'def',
+    'del', 'elif', 'else', 'except', 'exec', 'finally',
+    'for', 'from', 'global', 'if', 'import', 'in',
+    'is', 'lambda', 'not', 'or', 'pass', 'print',
+    'raise', 'return', 'try', 'while', 'yield',
+    'None', 'True', 'False',
+]
+
+# style of each name that is not a plain identifier
+NAME_STYLES = dict((keyword, 'keyword') for keyword in KEYWORDS)
+NAME_STYLES['self'] = 'self'
+
+# one alternation tried left to right at each position; whatever a match
+# covers is not looked at again, so a keyword in a string or a quote in
+# a comment is not highlighted as such
+TOKEN = re.compile(r"""
+    (?P<comment>\#.*)
+  | (?P<triple>[uUbB]?[rR]?(?:'''|\"\"\"))
+  | (?P<string>[uUbB]?[rR]?(?:'(?:[^'\\]|\\.)*'?|"(?:[^"\\]|\\.)*"?))
+  | (?P<define>\b(?:def|class)\b)[ \t]*(?P<defined>[A-Za-z_]\w*)?
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<number>(?:0[xX][0-9A-Fa-f]+|[0-9]+\.?[0-9]*(?:[eE][+-]?[0-9]+)?|
+                \.[0-9]+(?:[eE][+-]?[0-9]+)?)[lLjJ]?\b)
+  | (?P<operator>\*\*=?|//=?|>>=?|<<=?|[=!<>]=|[-+*/%&|^~<>=]=?)
+  | (?P<brace>[{}()\[\]])
+""", re.VERBOSE)
+
+# the rest of a triple-quoted string up to and including its end
+TRIPLE_END = {
+    STATE_TRIPLE_SINGLE: re.compile(r"(?:[^'\\]|\\.|'(?!''))*'''", re.S),
+    STATE_TRIPLE_DOUBLE: re.compile(r'(?:[^"\\]|\\.|"(?!""))*"""', re.S),
+}
+
+TRIPLE_STATES = {"'''": STATE_TRIPLE_SINGLE, '"""': STATE_TRIPLE_DOUBLE}
+
+cache = dict()
+
+
+def tokenize_block(text, state):
+    """
+    Return the styled spans of a line of Python, as a list of (start,
+    length, style name), and the state at its end. state is the state
+    at the end of the previous line.
+    """
+    spans = []
+    position = 0
+    end = len(text)
+    if state in TRIPLE_END:
+        match = TRIPLE_END[state].match(text)
+        if match is None:
+            # the whole line is inside the string
+            if end:
+                spans.append((0, end, 'string2'))
+            return (spans, state)
+        position = match.end()
+        spans.append((0, position, 'string2'))
+    search = TOKEN.search
+    while position < end:
+        match = search(text, position)
+        if match is None:
+            break
+        kind = match.lastgroup
+        start = match.start()
+        position = match.end()
+        if kind == 'name':
+            style = NAME_STYLES.get(match.group(kind))
+            if style is not None:
+                spans.append((start, position - start, style))
+        elif kind == 'defined':
+            # def or class, then the name it defines
+            spans.append((start, match.end('define') - start, 'keyword'))
+            spans.append((match.start('defined'),
+                          position - match.start('defined'), 'defclass'))
+        elif kind == 'define':
+            spans.append((start, position - start, 'keyword'))
+        elif kind == 'triple':
+            delimiter = text[position - 3:position]
+            triple_state = TRIPLE_STATES[delimiter]
+            closing = TRIPLE_END[triple_state].match(text, position)
+            if closing is None:
+                spans.append((start, end - start, 'string2'))
+                return (spans, triple_state)
+            position = closing.end()
+            spans.append((start, position - start, 'string2'))
+        elif kind == 'number':
+            spans.append((start, position - start, 'numbers'))
+        else:
+            spans.append((start, position - start, kind))
+    return (spans, STATE_NORMAL)
+
+
+def highlight_block(text, state):
+    """
+    Return what tokenize_block does for text after a line ending in
+    state, from the cache where that line was seen after that state
+    before.
+    """
+    if state not in TRIPLE_END:
+        state = STATE_NORMAL
+    key = (state, text)
+    result = cache.get(key)
+    if result is None:
+        if len(cache) >= MAX_CACHED_BLOCKS:
+            cache.clear()
+        result = cache[key] = tokenize_block(text, state)
+    return result
@@ -0,0 +1,251 @@
+"""
+Reload a script together with the helper modules it imports from its
+own directory
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import os
+import sys
+import time
+
+from script_loader import is_script_module, script_path
+from script_scanner import scan_script
+
+
+def source_path(module):
+    """
+    Return the source file of a module, or None for a built-in one.
+    """
+    path = getattr(module, '__file__', None)
+    if not path:
+        return None
+    (base, ext) = os.path.splitext(path)
+    if ext in ('.pyc', '.pyo'):
+        path = base + '.py'
+    return os.path.abspath(path)
+
+
+def file_state(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime, stat.st_size)
+
+
+def resolve_import(name, importer, is_package, local):
+    """
+    Return the local modules that importing name from module importer
+    may load. Python 2 resolves a plain "import b" inside package a to
+    a.b first, so that is tried too.
+    """
+    if is_package:
+        package = importer
+    else:
+        package = importer.rpartition('.')[0]
+    if name.startswith('.'):
+        rest = name.lstrip('.')
+        for level in range(len(name) - len(rest) - 1):
+            package = package.rpartition('.')[0]
+        name = '.'.join(part for part in (package, rest) if part)
+        candidates = [name]
+    else:
+        candidates = [name]
+        if package:
+            candidates.append("%s.%s" % (package, name))
+    found = set()
+    for candidate in candidates:
+        # importing a.b also imports a
+        parts = candidate.split('.')
+        for end in range(1, len(parts) + 1):
+            prefix = '.'.join(parts[:end])
+            if prefix in local and prefix != importer:
+                found.add(prefix)
+    return found
+
+
+class HotReloader(object):
+    """
+    Track the modules each script loads from its own directory and
+    reload the ones that changed, with the modules that depend on them.
+
+    The state of each local module's source file is recorded when the
+    script is imported and after each reload. On reload, only the local
+    modules the script imports, directly or not, are considered: those
+    whose file changed (or that were never recorded) are reloaded,
+    followed by every one of them importing a changed one, the script
+    included, so a script picks up edits to its helpers. Dependencies
+    are read from the import statements in the source and modules are
+    reloaded with dependencies before dependents; modules in a cycle are
+    reloaded in name order. Other scripts and modules in the directory,
+    and modules that did not change and do not depend on a changed one,
+    are left alone.
+
+    Script modules are run again by the ScriptLoader that loaded them;
+    helper modules are reloaded with the script's directory on sys.path.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        # module name -> (source path, file state)
+        self.recorded = dict()
+
+    def local_modules(self, script_dir):
+        """
+        Return the loaded modules whose source is under script_dir, by
+        name.
+        """
+        script_dir = os.path.abspath(script_dir) + os.sep
+        local = dict()
+        for (name, module) in sys.modules.items():
+            if module is None:
+                continue
+            path = source_path(module)
+            if path and path.startswith(script_dir):
+                local[name] = module
+        return local
+
+    def used_modules(self, script):
+        """
+        Return the local modules by name, the local modules each of those
+        the script imports imports, and the names of the script's module
+        and those it imports, directly or not; None if the script has not
+        been imported.
+        """
+        script = os.path.abspath(unicode(script))
+        local = self.local_modules(os.path.dirname(script))
+        roots = [name for (name, module) in local.items()
+                 if source_path(module) == script]
+        if not roots:
+            return None
+        graph = self.dependencies(local)
+        # sibling scripts and their helpers are not the script's own
+        used = self.closure(roots, graph)
+        graph = dict((name, graph[name] & used) for name in used)
+        return (local, graph, used)
+
+    def record(self, script):
+        """
+        Record the state of the script's module and the local modules it
+        imports.
+        """
+        found = self.used_modules(script)
+        if found is None:
+            return
+        (local, graph, used) = found
+        for name in used:
+            path = source_path(local[name])
+            self.recorded[name] = (path, file_state(path))
+
+    def dependencies(self, local):
+        """
+        Return the local modules each local module imports.
+        """
+        graph = dict()
+        for (name, module) in local.items():
+            path = source_path(module)
+            try:
+                imports = scan_script(path).imports
+            except (IOError, OSError):
+                imports = []
+            is_package = os.path.basename(path).startswith('__init__.')
+            deps = set()
+            for imported in imports:
+                deps.update(resolve_import(imported, name, is_package,
+                                           local))
+            graph[name] = deps
+        return graph
+
+    def changed(self, local):
+        changed = set()
+        for (name, module) in local.items():
+            path = source_path(module)
+            if self.recorded.get(name) != (path, file_state(path)):
+                changed.add(name)
+        return changed
+
+    def closure(self, roots, graph):
+        """
+        Return roots and the local modules they import, directly or not.
+        """
+        found = set()
+        todo = list(roots)
+        while todo:
+            name = todo.pop()
+            if name not in found:
+                found.add(name)
+                todo.extend(graph.get(name, ()))
+        return found
+
+    def reload_order(self, changed, graph):
+        """
+        Return the changed modules and their dependents, dependencies
+        first.
+        """
+        dependents = dict((name, set()) for name in graph)
+        for (name, deps) in graph.items():
+            for dep in deps:
+                dependents[dep].add(name)
+        affected = set()
+        todo = list(changed)
+        while todo:
+            name = todo.pop()
+            if name not in affected:
+                affected.add(name)
+                todo.extend(dependents[name])
+
+        waiting = dict((name, graph[name] & affected) for name in affected)
+        order = []
+        while waiting:
+            ready = sorted(name for (name, deps) in waiting.items()
+                           if not deps)
+            if not ready:
+                # a cycle; break it at the first name
+                ready = [min(waiting)]
+            for name in ready:
+                del waiting[name]
+                order.append(name)
+                for deps in waiting.values():
+                    deps.discard(name)
+        return order
+
+    def reload_script(self, script):
+        """
+        Reload what changed among the local modules of script. Returns
+        a list of (module name, seconds taken) in the order they were
+        reloaded, or None if the script has not been imported. An error
+        raised by a reload is passed on; the modules reloaded before it
+        are recorded.
+        """
+        found = self.used_modules(script)
+        if found is None:
+            return None
+        (local, graph, used) = found
+        script_dir = os.path.dirname(os.path.abspath(unicode(script)))
+        changed = self.changed(dict((name, local[name]) for name in used))
+        order = self.reload_order(changed, graph)
+        report = []
+        for name in order:
+            start = time.time()
+            if is_script_module(name):
+                self.loader.reload(sys.modules[name])
+            else:
+                with script_path(script_dir):
+                    reload(sys.modules[name])
+            report.append((name, time.time() - start))
+            path = source_path(sys.modules[name])
+            self.recorded[name] = (path, file_state(path))
+        # pick up helpers the new code imports
+        self.record(script)
+        return report
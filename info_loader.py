@@ -0,0 +1,272 @@
+"""
+Build the Info and Source tabs of scripts in the background
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import os
+import sqlite3
+import traceback
+from collections import OrderedDict
+
+from PyQt4.QtCore import *
+
+from metadata_cache import check_script
+from script_scanner import outline_html
+
+# milliseconds the selection must stay on a script before it is loaded
+DEBOUNCE_INTERVAL = 150
+# scripts on each side of the selected one loaded ahead of time
+PREFETCH_NEIGHBORS = 2
+# pages kept, least recently shown dropped first
+MAX_PAGES = 64
+# worker threads building pages at once
+INFO_THREADS = 2
+
+# pool priorities: the selected script goes ahead of its neighbors
+PRIORITY_SELECTED = 1
+PRIORITY_PREFETCH = 0
+
+
+def script_version(script):
+    """
+    Return what tells one version of a script from another: its mtime
+    and size, as checked by the metadata cache.
+    """
+    stat = os.stat(script)
+    return (stat.st_mtime, stat.st_size)
+
+
+class InfoPage(object):
+    """
+    The Info tab HTML and the source of one version of a script, with
+    the outcome of check_script that produced them. The source of a
+    large script is not kept; large is True and the Source tab reads
+    the file itself.
+    """
+
+    def __init__(self, check, large=False):
+        self.script = check.script
+        self.version = (check.stat.st_mtime, check.stat.st_size)
+        self.check = check
+        self.large = large
+        self.source = check.source
+        self.html = outline_html(check.script, check.info)
+
+
+def build_page(script, entry, large_file_size=0):
+    """
+    Read and scan script, unless entry (its metadata cache entry, or
+    None) is still valid, and return its InfoPage. A script larger than
+    large_file_size bytes, unless that is 0, gets a large page. Raises
+    IOError or OSError if the script cannot be read.
+    """
+    large = bool(large_file_size) and \
+        os.path.getsize(script) > large_file_size
+    return InfoPage(check_script(script, entry, keep_source=not large),
+                    large)
+
+
+class InfoTaskSignals(QObject):
+    """
+    Signals emitted by an InfoTask; see ScriptJobSignals.
+    """
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str, str)
+
+
+class InfoTask(QRunnable):
+    """
+    Build the InfoPage of one script.
+    """
+
+    def __init__(self, script, entry, large_file_size=0):
+        QRunnable.__init__(self)
+        self.script = script
+        self.entry = entry
+        self.large_file_size = large_file_size
+        self.signals = InfoTaskSignals()
+
+    def run(self):
+        try:
+            self.signals.loaded.emit(build_page(self.script, self.entry,
+                                                self.large_file_size))
+        except:
+            self.signals.failed.emit(self.script, traceback.format_exc())
+
+
+class InfoLoader(QObject):
+    """
+    Build the InfoPages of scripts on a thread pool and keep the recent
+    ones, so moving through the script list never waits on the disk.
+
+    select() is called as the selection moves. A page already built for
+    the current version of the script is emitted through page_ready at
+    once; otherwise the script is loaded once the selection has stayed
+    on it for DEBOUNCE_INTERVAL, and its neighbors after it. load()
+    skips the wait. Every page built is emitted, so the receiver checks
+    that it is still the one wanted.
+
+    As with RegistryLoader, the metadata cache is only used on the GUI
+    thread: the entry of a script is read before its task starts and
+    the outcome recorded when it arrives.
+
+    Scripts larger than large_file_size bytes get large pages; 0 means
+    none do.
+    """
+    page_ready = pyqtSignal(object)
+    page_failed = pyqtSignal(str, str)
+
+    def __init__(self, metadata=None, parent=None):
+        QObject.__init__(self, parent)
+        self.metadata = metadata
+        self.large_file_size = 0
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(INFO_THREADS)
+        self.pages = OrderedDict()
+        # scripts being built, with their tasks
+        self.tasks = dict()
+        self.selected = None
+        self.neighbors = []
+        self.debounce = QTimer(self)
+        self.debounce.setSingleShot(True)
+        self.debounce.setInterval(DEBOUNCE_INTERVAL)
+        self.debounce.timeout.connect(self.settle)
+
+    def page(self, script):
+        """
+        Return the page of the current version of script, or None.
+        """
+        script = unicode(script)
+        page = self.pages.get(script)
+        if page is None:
+            return None
+        try:
+            if page.version != script_version(script):
+                del self.pages[script]
+                return None
+        except OSError:
+            del self.pages[script]
+            return None
+        # most recently used last
+        del self.pages[script]
+        self.pages[script] = page
+        return page
+
+    def select(self, script, neighbors=()):
+        """
+        The selection moved to script, with neighbors next to it in the
+        list.
+        """
+        self.selected = unicode(script)
+        self.neighbors = [unicode(neighbor) for neighbor in neighbors]
+        page = self.page(self.selected)
+        if page is not None:
+            self.page_ready.emit(page)
+        self.debounce.start()
+
+    def settle(self):
+        if self.selected is not None:
+            self.request(self.selected, PRIORITY_SELECTED)
+        for neighbor in self.neighbors:
+            self.request(neighbor, PRIORITY_PREFETCH)
+
+    def load(self, script):
+        """
+        Emit the page of script now if it is built, or build it now.
+        """
+        self.selected = unicode(script)
+        page = self.page(self.selected)
+        if page is not None:
+            self.page_ready.emit(page)
+        else:
+            self.request(self.selected, PRIORITY_SELECTED)
+
+    def load_now(self, script):
+        """
+        Return the page of script, building it on this thread if need
+        be. Raises IOError or OSError if the script cannot be read.
+        """
+        page = self.page(script)
+        if page is None:
+            page = build_page(unicode(script), self.entry(script),
+                              self.large_file_size)
+            self.store(page)
+        return page
+
+    def request(self, script, priority):
+        if script in self.tasks or self.page(script) is not None:
+            return
+        task = InfoTask(script, self.entry(script), self.large_file_size)
+        # the pool must not delete a task we may still hear from
+        task.setAutoDelete(False)
+        task.signals.loaded.connect(self.loaded)
+        task.signals.failed.connect(self.failed)
+        self.tasks[script] = task
+        self.pool.start(task, priority)
+
+    def entry(self, script):
+        if self.metadata is None:
+            return None
+        try:
+            return self.metadata.entry(script)
+        except sqlite3.Error:
+            return None
+
+    def loaded(self, page):
+        self.tasks.pop(page.script, None)
+        self.store(page)
+        self.page_ready.emit(page)
+
+    def failed(self, script, tb):
+        script = unicode(script)
+        self.tasks.pop(script, None)
+        self.pages.pop(script, None)
+        self.page_failed.emit(script, tb)
+
+    def store(self, page):
+        if self.metadata is not None:
+            try:
+                self.metadata.apply(page.check)
+            except sqlite3.Error:
+                # the page is still good without the cache
+                pass
+        self.pages.pop(page.script, None)
+        self.pages[page.script] = page
+        while len(self.pages) > MAX_PAGES:
+            self.pages.popitem(last=False)
+
+    def set_large_file_size(self, size):
+        """
+        Change the size above which pages are large, dropping the pages
+        built with the old one.
+        """
+        if size != self.large_file_size:
+            self.large_file_size = size
+            self.pages.clear()
+
+    def invalidate(self, script):
+        """
+        Drop the page of script, e.g. after it was reloaded.
+        """
+        self.pages.pop(unicode(script), None)
+
+    def stop(self):
+        """
+        Stop loading and wait for the pages being built.
+        """
+        self.debounce.stop()
+        self.selected = None
+        self.neighbors = []
+        self.pool.waitForDone()
+        self.tasks.clear()
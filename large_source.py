@@ -0,0 +1,232 @@
+"""
+Show very large scripts on the Source tab: memory-mapped, filled in
+chunks and highlighted only around the part on screen
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import mmap
+import os
+
+from PyQt4.QtCore import *
+from PyQt4.QtGui import *
+
+from highlight_engine import highlight_block
+from syntax import STYLES
+
+# scripts larger than this many KB are shown in large file mode unless
+# configured otherwise
+LARGE_FILE_KB = 1024
+# bytes added to the document per turn of the event loop
+CHUNK_SIZE = 256 * 1024
+# blocks highlighted above and below those on screen
+MARGIN_BLOCKS = 100
+# milliseconds after scrolling stops before highlighting
+HIGHLIGHT_DELAY = 30
+
+
+class MappedSource(object):
+    """
+    A script opened memory-mapped and read as text in chunks that end at
+    a line break, so a line is never split between two chunks.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.map = None
+        if self.size:
+            self.map = mmap.mmap(self.file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        self.offset = 0
+
+    def at_end(self):
+        return self.offset >= self.size
+
+    def read_chunk(self, size=CHUNK_SIZE):
+        """
+        Return the next chunk of about size bytes as unicode. Raises
+        IOError if the file was cut short since it was opened: reading
+        the mapping past its new end would crash QGIS.
+        """
+        if os.fstat(self.file.fileno()).st_size < self.size:
+            raise IOError("%s was truncated while being read" %
+                          self.file.name)
+        start = self.offset
+        end = min(start + size, self.size)
+        if end < self.size:
+            newline = self.map.rfind('\n', start, end)
+            if newline >= start:
+                end = newline + 1
+        self.offset = end
+        text = self.map[start:end].decode('utf-8', 'replace')
+        return text.replace(u'\r\n', u'\n')
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+
+class LargeSourceView(QObject):
+    """
+    Fill a QTextEdit with a large script a chunk at a time, so QGIS
+    keeps responding while it loads, and highlight only the blocks on
+    screen and MARGIN_BLOCKS either side, more as the user scrolls.
+
+    No QSyntaxHighlighter may be attached to the document meanwhile; the
+    formats are set on each block's layout as QSyntaxHighlighter would.
+    The state at the end of every block up to the last one highlighted
+    is kept, since a triple-quoted string may start far above the
+    screen; working it out costs a tokenize per block, not a layout.
+    """
+
+    def __init__(self, text_edit, parent=None):
+        QObject.__init__(self, parent)
+        self.edit = text_edit
+        self.document = text_edit.document()
+        # the Source tab is read only; keep no undo history of the fill
+        self.document.setUndoRedoEnabled(False)
+        self.source = None
+        self.active = False
+        self.select_line = None
+        # block state at the end of each block, from the first on
+        self.states = []
+        self.formatted = set()
+        self.fill_timer = QTimer(self)
+        self.fill_timer.setInterval(0)
+        self.fill_timer.timeout.connect(self.fill_chunk)
+        self.highlight_timer = QTimer(self)
+        self.highlight_timer.setSingleShot(True)
+        self.highlight_timer.setInterval(HIGHLIGHT_DELAY)
+        self.highlight_timer.timeout.connect(self.highlight_visible)
+        text_edit.verticalScrollBar().valueChanged.connect(
+            self.schedule_highlight)
+
+    def show(self, path):
+        """
+        Start showing the script at path. Raises IOError if it cannot
+        be opened.
+        """
+        self.stop()
+        self.edit.clear()
+        self.source = MappedSource(unicode(path))
+        self.active = True
+        self.fill_timer.start()
+
+    def stop(self):
+        self.fill_timer.stop()
+        self.highlight_timer.stop()
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+        self.active = False
+        self.select_line = None
+        self.states = []
+        self.formatted = set()
+
+    def fill_chunk(self):
+        try:
+            text = self.source.read_chunk()
+        except (IOError, ValueError):
+            # the script is being rewritten; the watcher will show it
+            # again once it has settled
+            self.fill_timer.stop()
+            self.source.close()
+            self.source = None
+            return
+        # the last block takes the start of the new text
+        self.forget(self.document.blockCount() - 1)
+        cursor = QTextCursor(self.document)
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        if self.source.at_end():
+            self.fill_timer.stop()
+            self.source.close()
+            self.source = None
+        if self.select_line is not None:
+            self.go_to_line(self.select_line)
+        self.schedule_highlight()
+
+    def go_to_line(self, line):
+        """
+        Select line and scroll to it, as soon as it has been loaded.
+        """
+        if self.document.blockCount() <= line and self.source is not None:
+            self.select_line = line
+            return
+        self.select_line = None
+        cursor = QTextCursor(self.document.findBlockByNumber(line - 1))
+        cursor.select(QTextCursor.LineUnderCursor)
+        self.edit.setTextCursor(cursor)
+        self.edit.ensureCursorVisible()
+
+    def forget(self, number):
+        """
+        Forget the states and formats of the blocks from number on.
+        """
+        del self.states[number:]
+        self.formatted = set(block for block in self.formatted
+                             if block < number)
+
+    def schedule_highlight(self):
+        if self.active:
+            self.highlight_timer.start()
+
+    def visible_blocks(self):
+        """
+        Return the numbers of the first and last blocks to highlight.
+        """
+        height = self.edit.viewport().height()
+        first = self.edit.cursorForPosition(QPoint(0, 0)).blockNumber()
+        last = self.edit.cursorForPosition(
+            QPoint(0, max(height - 1, 0))).blockNumber()
+        return (max(first - MARGIN_BLOCKS, 0),
+                min(last + MARGIN_BLOCKS, self.document.blockCount() - 1))
+
+    def highlight_visible(self):
+        (first, last) = self.visible_blocks()
+        number = min(len(self.states), first)
+        block = self.document.findBlockByNumber(number)
+        dirty_start = None
+        dirty_end = None
+        while block.isValid() and number <= last:
+            if number:
+                state = self.states[number - 1]
+            else:
+                state = -1
+            (spans, state) = highlight_block(unicode(block.text()), state)
+            if number == len(self.states):
+                self.states.append(state)
+            if number >= first and number not in self.formatted:
+                self.apply_formats(block, spans)
+                self.formatted.add(number)
+                if dirty_start is None:
+                    dirty_start = block.position()
+                dirty_end = block.position() + block.length()
+            block = block.next()
+            number += 1
+        if dirty_start is not None:
+            self.document.markContentsDirty(dirty_start,
+                                            dirty_end - dirty_start)
+
+    def apply_formats(self, block, spans):
+        ranges = []
+        for (start, length, style) in spans:
+            format_range = QTextLayout.FormatRange()
+            format_range.start = start
+            format_range.length = length
+            format_range.format = STYLES[style]
+            ranges.append(format_range)
+        block.layout().setAdditionalFormats(ranges)
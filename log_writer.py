@@ -0,0 +1,227 @@
+"""
+Asynchronous, rotating writer for scriptrunner.log
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import gzip
+import os
+import Queue
+import shutil
+import threading
+import time
+
+# fsync policies
+FSYNC_NEVER = 'never'
+FSYNC_RUN = 'run'
+FSYNC_ALWAYS = 'always'
+FSYNC_POLICIES = [FSYNC_NEVER, FSYNC_RUN, FSYNC_ALWAYS]
+
+# queue markers
+_FLUSH = object()
+_STOP = object()
+
+
+class LogWriter(threading.Thread):
+    """
+    Write log text to a file on a dedicated thread, so a slow disk never
+    stalls the GUI. write() only puts the text on a bounded queue; if the
+    queue is full the text is dropped and the number of dropped writes is
+    noted in the log once there is room again.
+
+    The file is rotated when it reaches max_bytes or when rotate_hours
+    have passed since it was opened (0 disables either). Rotated files
+    are named <file>.1, <file>.2, ... with .1 the newest; at most
+    backup_count are kept and they are gzipped if compress is set.
+
+    fsync is one of FSYNC_NEVER, FSYNC_RUN (on each flush(), which
+    ScriptRunner calls at the end of a script) or FSYNC_ALWAYS (after
+    every batch of writes).
+
+    If the log cannot be opened or written, the writer is disabled: the
+    message is kept in error and passed to on_error (called on the writer
+    thread), later writes are ignored and the queue is still drained, so
+    close() never waits on a full queue.
+    """
+
+    def __init__(self, path, overwrite=False, max_bytes=0, rotate_hours=0,
+                 backup_count=5, compress=False, fsync=FSYNC_NEVER,
+                 queue_size=10000, on_error=None):
+        threading.Thread.__init__(self, name='ScriptRunnerLogWriter')
+        self.daemon = True
+        self.path = path
+        self.overwrite = overwrite
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_hours * 3600
+        self.backup_count = backup_count
+        self.compress = compress
+        self.fsync = fsync
+        self.queue = Queue.Queue(queue_size)
+        self.dropped = 0
+        self.dropped_lock = threading.Lock()
+        self.log_file = None
+        self.on_error = on_error
+        self.error = None
+
+    def write(self, text):
+        if self.error is not None:
+            return
+        if isinstance(text, unicode):
+            text = text.encode('utf-8')
+        try:
+            self.queue.put_nowait(text)
+        except Queue.Full:
+            with self.dropped_lock:
+                self.dropped += 1
+
+    def flush(self):
+        """
+        Ask the writer thread to flush (and fsync, depending on the
+        policy) once the text queued so far is written.
+        """
+        try:
+            self.queue.put_nowait(_FLUSH)
+        except Queue.Full:
+            pass
+
+    def close(self, timeout=5.0):
+        """
+        Write what is queued, close the file and stop the thread, waiting
+        at most timeout seconds.
+        """
+        if not self.is_alive():
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except Queue.Full:
+            return
+        self.join(timeout)
+
+    def run(self):
+        try:
+            self.open_log(self.overwrite)
+        except (IOError, OSError) as e:
+            self.fail(e)
+        while True:
+            item = self.queue.get()
+            # take whatever else is waiting so it is written in one go
+            batch = [item]
+            while len(batch) < 1000:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except Queue.Empty:
+                    break
+            if self.log_file is None:
+                # disabled: keep draining until asked to stop
+                stop = _STOP in batch
+            else:
+                try:
+                    stop = self.write_batch(batch)
+                except (IOError, OSError) as e:
+                    self.fail(e)
+                    stop = _STOP in batch
+            if stop:
+                break
+        if self.log_file is not None:
+            try:
+                self.sync()
+                self.log_file.close()
+            except (IOError, OSError) as e:
+                self.fail(e)
+
+    def fail(self, error):
+        """
+        Disable the writer after error and report it.
+        """
+        self.error = "ScriptRunner: cannot write %s: %s" % (self.path, error)
+        if self.log_file is not None:
+            try:
+                self.log_file.close()
+            except (IOError, OSError):
+                pass
+            self.log_file = None
+        if self.on_error is not None:
+            self.on_error(self.error)
+
+    def write_batch(self, batch):
+        """
+        Write a batch of queued items. Returns True if the writer was
+        asked to stop.
+        """
+        flush = False
+        stop = False
+        with self.dropped_lock:
+            dropped = self.dropped
+            self.dropped = 0
+        if dropped:
+            self.log_file.write("\n[ScriptRunner: %d log writes dropped; "
+                                "the log queue was full]\n" % dropped)
+        for item in batch:
+            if item is _FLUSH:
+                flush = True
+            elif item is _STOP:
+                stop = True
+            else:
+                self.log_file.write(item)
+        if self.should_rotate():
+            self.rotate()
+        if self.fsync == FSYNC_ALWAYS or (flush and self.fsync == FSYNC_RUN):
+            self.sync()
+        elif flush:
+            self.log_file.flush()
+        return stop
+
+    def open_log(self, overwrite):
+        if overwrite:
+            mode = 'w'
+        else:
+            mode = 'a'
+        self.log_file = open(self.path, mode)
+        self.rollover_at = time.time() + self.rotate_seconds
+
+    def sync(self):
+        self.log_file.flush()
+        os.fsync(self.log_file.fileno())
+
+    def should_rotate(self):
+        if self.max_bytes and self.log_file.tell() >= self.max_bytes:
+            return True
+        if self.rotate_seconds and time.time() >= self.rollover_at:
+            return True
+        return False
+
+    def backup_name(self, number):
+        name = "%s.%d" % (self.path, number)
+        if self.compress:
+            name += '.gz'
+        return name
+
+    def rotate(self):
+        self.sync()
+        self.log_file.close()
+        if self.backup_count > 0:
+            oldest = self.backup_name(self.backup_count)
+            if os.path.exists(oldest):
+                os.remove(oldest)
+            for number in range(self.backup_count - 1, 0, -1):
+                name = self.backup_name(number)
+                if os.path.exists(name):
+                    os.rename(name, self.backup_name(number + 1))
+            if self.compress:
+                with open(self.path, 'rb') as src:
+                    with gzip.open(self.backup_name(1), 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+                os.remove(self.path)
+            else:
+                os.rename(self.path, self.backup_name(1))
+        self.open_log(True)
@@ -0,0 +1,294 @@
+"""
+Memory profiler: where a run allocated memory and how much of it the
+run kept
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import gc
+import json
+import linecache
+import os
+import sys
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2 has it only when patched for pytracemalloc
+    tracemalloc = None
+
+from profile_stats import ProfileRow, TOP_FUNCTIONS
+from run_metrics import format_bytes, peak_rss
+
+# file extension of saved memory profiles
+MEMORY_EXTENSION = '.memory.json'
+
+# frames kept for each allocation traced by tracemalloc
+TRACEMALLOC_FRAMES = 25
+
+try:
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = 4096
+
+
+class ResidentSize(object):
+    """
+    Read the resident set size of the process: the current size where
+    /proc/self/statm exists, otherwise the peak size (so growth is how
+    far the peak was raised), otherwise 0.
+    """
+
+    def __init__(self):
+        self.fd = None
+        try:
+            self.fd = os.open('/proc/self/statm', os.O_RDONLY)
+        except OSError:
+            pass
+
+    def is_current(self):
+        return self.fd is not None
+
+    def read(self):
+        if self.fd is not None:
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            return int(os.read(self.fd, 128).split()[1]) * PAGE_SIZE
+        return peak_rss() or 0
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class MemoryProfiler(object):
+    """
+    Find the lines of a script, and of the helper modules in its
+    directory, that allocate memory during a call.
+
+    With tracemalloc, snapshots taken before and after the call are
+    compared and each allocation still alive is charged to the last line
+    of the script or its helpers on its traceback, with the number of
+    memory blocks it holds. Without it, the call is traced line by line:
+    the growth of the resident set size between two lines is charged to
+    the line that ran, including what the functions it called outside
+    the script allocated. Counting objects as well would mean walking
+    every object at every line, so the line tracer counts none.
+
+    sites maps (path, line) to [bytes, blocks], blocks being None when
+    they were not counted. After the call,
+    retained holds the bytes the process still used beyond what it used
+    before (None where only the peak size can be read),
+    retained_objects the objects still alive and peak_delta how far the
+    call raised the peak resident set size.
+    """
+
+    def __init__(self, script):
+        self.directory = os.path.dirname(os.path.abspath(unicode(script)))
+        if tracemalloc is not None:
+            self.backend = 'tracemalloc'
+        else:
+            self.backend = 'line tracer'
+        self.sites = dict()
+        self.retained = None
+        self.retained_objects = None
+        self.peak_delta = None
+        # whether each code object seen is in the script's directory
+        self.traced = dict()
+        self.last = None
+
+    def in_directory(self, path):
+        return os.path.abspath(path).startswith(self.directory + os.sep)
+
+    def runcall(self, function, *args, **kwargs):
+        """
+        Call function with the given arguments, profiling the memory it
+        allocates, and return its result.
+        """
+        rss = ResidentSize()
+        gc.collect()
+        start_rss = rss.read()
+        start_peak = peak_rss()
+        start_objects = len(gc.get_objects())
+        try:
+            if tracemalloc is not None:
+                return self.trace_snapshots(function, args, kwargs)
+            return self.trace_lines(rss, function, args, kwargs)
+        finally:
+            gc.collect()
+            if rss.is_current():
+                self.retained = rss.read() - start_rss
+            self.retained_objects = len(gc.get_objects()) - start_objects
+            if start_peak is not None:
+                self.peak_delta = peak_rss() - start_peak
+            rss.close()
+
+    def trace_snapshots(self, function, args, kwargs):
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        try:
+            before = tracemalloc.take_snapshot()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+            for stat in after.compare_to(before, 'traceback'):
+                if stat.size_diff <= 0:
+                    continue
+                # pytracemalloc lists the most recent frame first
+                for frame in stat.traceback:
+                    if self.in_directory(frame.filename):
+                        self.charge((frame.filename, frame.lineno),
+                                    stat.size_diff, max(stat.count_diff, 0))
+                        break
+
+    def trace_lines(self, rss, function, args, kwargs):
+        self.rss = rss
+        self.last = None
+        self.last_rss = rss.read()
+        sys.settrace(self.trace_call)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            sys.settrace(None)
+            self.account()
+            self.rss = None
+
+    def is_traced(self, code):
+        traced = self.traced.get(code)
+        if traced is None:
+            traced = self.traced[code] = self.in_directory(code.co_filename)
+        return traced
+
+    def trace_call(self, frame, event, arg):
+        if event == 'call' and self.is_traced(frame.f_code):
+            return self.trace_line
+        return None
+
+    def trace_line(self, frame, event, arg):
+        if event == 'line':
+            self.account()
+            self.last = (frame.f_code.co_filename, frame.f_lineno)
+        elif event == 'return':
+            self.account()
+            # what happens next belongs to the calling line, if it is
+            # one of ours
+            caller = frame.f_back
+            if caller is not None and self.is_traced(caller.f_code):
+                self.last = (caller.f_code.co_filename, caller.f_lineno)
+            else:
+                self.last = None
+        return self.trace_line
+
+    def account(self):
+        """
+        Charge the growth since the last line event to the line that ran.
+        """
+        size = self.rss.read()
+        if self.last is not None:
+            self.charge(self.last, max(size - self.last_rss, 0))
+        self.last_rss = size
+
+    def charge(self, site, size, blocks=None):
+        totals = self.sites.get(site)
+        if totals is None:
+            totals = self.sites[site] = [0, None if blocks is None else 0]
+        totals[0] += size
+        if blocks is not None:
+            totals[1] += blocks
+
+    def to_dict(self):
+        return {'backend': self.backend,
+                'sites': [[path, line, size, objects] for
+                          ((path, line), (size, objects)) in
+                          self.sites.iteritems()],
+                'retained': self.retained,
+                'retained_objects': self.retained_objects,
+                'peak_delta': self.peak_delta}
+
+    def save(self, path):
+        with open(path, 'w') as report:
+            json.dump(self.to_dict(), report)
+
+
+class MemoryReport(object):
+    """
+    A memory profile read back from MemoryProfiler.save, with the same
+    attributes as the profiler.
+    """
+
+    def __init__(self, values):
+        self.backend = values.get('backend')
+        # reports of the line tracer once held counts that meant nothing
+        counted = self.backend != 'line tracer'
+        self.sites = dict(((path, line), [size, blocks if counted else None])
+                          for (path, line, size, blocks) in values['sites'])
+        self.retained = values.get('retained')
+        self.retained_objects = values.get('retained_objects')
+        self.peak_delta = values.get('peak_delta')
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as report:
+            return cls(json.load(report))
+
+
+class MemoryRow(ProfileRow):
+    """
+    One line of a memory profile: its code, the bytes charged to it
+    (own and cumulative alike) and the memory blocks it still held
+    (calls, for sorting; None if they were not counted).
+    """
+
+    def __init__(self, site, totals):
+        (self.filename, self.line) = site
+        (self.own, self.calls) = totals
+        self.cumulative = self.own
+        self.function = linecache.getline(self.filename,
+                                          self.line).strip()
+
+    def call_count(self):
+        if self.calls is None:
+            return ''
+        return str(self.calls)
+
+
+def memory_rows(sites, limit=TOP_FUNCTIONS):
+    """
+    Return the MemoryRows of the lines among the top limit by bytes or,
+    where they were counted, by blocks, most bytes first.
+    """
+    rows = [MemoryRow(site, totals) for (site, totals) in sites.iteritems()]
+    chosen = set(sorted(rows, key=lambda row: row.own,
+                        reverse=True)[:limit])
+    counted = [row for row in rows if row.calls is not None]
+    chosen.update(sorted(counted, key=lambda row: row.calls,
+                         reverse=True)[:limit])
+    return sorted(chosen, key=lambda row: row.own, reverse=True)
+
+
+def memory_summary(profile):
+    """
+    Return a line saying how much memory a run kept and how far it
+    raised the peak.
+    """
+    parts = []
+    if profile.retained is not None:
+        parts.append("kept %s" % format_bytes(profile.retained))
+    if profile.retained_objects is not None:
+        parts.append("%+d objects" % profile.retained_objects)
+    if profile.peak_delta is not None:
+        parts.append("peak RSS +%s" % format_bytes(profile.peak_delta))
+    return "%s (%s)" % (", ".join(parts) or "nothing measured",
+                        profile.backend)
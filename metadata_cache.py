@@ -0,0 +1,355 @@
+"""
+Persistent cache of what the scanner found in each script, with the
+rendered Info tab HTML
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from script_scanner import ScriptInfo, scan_source, outline_html
+
+# entries kept before the least recently used are evicted
+DEFAULT_MAX_ENTRIES = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scripts (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    info TEXT NOT NULL,
+    html TEXT,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scripts_used ON scripts (used);
+CREATE TABLE IF NOT EXISTS arguments (
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    texts TEXT NOT NULL,
+    saved REAL NOT NULL,
+    PRIMARY KEY (path, name)
+);
+"""
+
+
+def default_cache_path():
+    """
+    Return where the cache is kept for the current user when QGIS is not
+    running to say where its settings directory is.
+    """
+    return os.path.join(os.path.expanduser('~'), '.qgis2', 'scriptrunner',
+                        'metadata.sqlite')
+
+
+def source_digest(source):
+    return hashlib.sha1(source).hexdigest()
+
+
+def file_digest(path):
+    """
+    Return the digest of a script as stored in the cache.
+    """
+    with open(path, 'rU') as src:
+        return source_digest(src.read())
+
+
+# outcomes of check_script
+CHECK_FRESH = 'fresh'
+CHECK_TOUCHED = 'touched'
+CHECK_SCANNED = 'scanned'
+
+
+class ScriptCheck(object):
+    """
+    Outcome of check_script: the script, its state, its stat result,
+    the digest of its source (unless it was fresh), its ScriptInfo and,
+    if it was asked for, its source.
+    """
+
+    def __init__(self, script, state, stat, digest, info, source=None):
+        self.script = script
+        self.state = state
+        self.stat = stat
+        self.digest = digest
+        self.info = info
+        self.source = source
+
+
+def check_script(script, entry, keep_source=False):
+    """
+    Check script against its stored entry (or None) and scan it if it
+    changed. This does the file I/O of a cache lookup but does not use
+    the database, so it can run on a worker thread; MetadataCache.apply
+    records the outcome. With keep_source the script is read even if
+    its entry is fresh, and the source is kept on the outcome. Raises
+    IOError or OSError if the script cannot be read.
+    """
+    script = unicode(script)
+    stat = os.stat(script)
+    source = None
+    if keep_source:
+        with open(script, 'rU') as src:
+            source = src.read()
+    if entry is not None and entry[0] == stat.st_mtime and \
+            entry[1] == stat.st_size:
+        return ScriptCheck(script, CHECK_FRESH, stat, entry[2],
+                           ScriptInfo.from_dict(json.loads(entry[3])),
+                           source)
+
+    if source is None:
+        with open(script, 'rU') as src:
+            source = src.read()
+    digest = source_digest(source)
+    if entry is not None and entry[2] == digest:
+        state = CHECK_TOUCHED
+        info = ScriptInfo.from_dict(json.loads(entry[3]))
+        info.path = script
+    else:
+        state = CHECK_SCANNED
+        info = scan_source(source, script)
+    if not keep_source:
+        source = None
+    return ScriptCheck(script, state, stat, digest, info, source)
+
+
+class MetadataCache(object):
+    """
+    ScriptInfo and Info tab HTML for each script, stored in sqlite.
+
+    An entry is valid while the script's mtime and size are unchanged,
+    so checking one costs a stat. When they differ the file is read and
+    its SHA-1 compared with the stored one; if the content is the same
+    (the file was touched or copied) only the stat fields are updated,
+    otherwise it is scanned again.
+
+    The argument presets of each script, and the arguments last entered
+    for it, are kept here too. They are what the user typed, so they are
+    neither evicted nor pruned with the scans.
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.max_entries = max_entries
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        # paths looked up since the last flush; their use time is
+        # written in one go
+        self.touched = set()
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def flush(self):
+        """
+        Record the use of the entries looked up and evict the least
+        recently used entries beyond max_entries.
+        """
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "UPDATE scripts SET used = ? WHERE path = ?",
+                [(now, path) for path in self.touched])
+            self.db.execute(
+                "DELETE FROM scripts WHERE path IN (SELECT path FROM "
+                "scripts ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,))
+        self.touched.clear()
+
+    def entry(self, script):
+        """
+        Return the stored (mtime, size, digest, info) of script, or None.
+        """
+        return self.db.execute(
+            "SELECT mtime, size, digest, info FROM scripts WHERE path = ?",
+            (unicode(script),)).fetchone()
+
+    def entries(self, scripts):
+        """
+        Return a dict of the stored entries of scripts, by path.
+        """
+        entries = dict()
+        for script in scripts:
+            row = self.entry(script)
+            if row is not None:
+                entries[unicode(script)] = row
+        return entries
+
+    def scan(self, script):
+        """
+        Return the ScriptInfo for script, from the cache if it is still
+        valid. Raises IOError or OSError if the script cannot be read.
+        """
+        return self.apply(check_script(script, self.entry(script)))
+
+    def apply(self, check):
+        """
+        Update the cache with the outcome of check_script and return the
+        ScriptInfo.
+        """
+        if check.state == CHECK_FRESH:
+            self.touched.add(check.script)
+        elif check.state == CHECK_TOUCHED:
+            with self.db:
+                self.db.execute(
+                    "UPDATE scripts SET mtime = ?, size = ?, used = ? "
+                    "WHERE path = ?",
+                    (check.stat.st_mtime, check.stat.st_size, time.time(),
+                     check.script))
+        else:
+            self.store(check.script, check.stat, check.digest, check.info)
+        return check.info
+
+    def store(self, script, stat, digest, info, html=None):
+        """
+        Store the scan of a script; any cached HTML is replaced.
+        """
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO scripts "
+                "(path, mtime, size, digest, info, html, used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (script, stat.st_mtime, stat.st_size, digest,
+                 json.dumps(info.to_dict()), html, time.time()))
+
+    def html(self, script):
+        """
+        Return the Info tab HTML for script, rendering and storing it if
+        the cache has none.
+        """
+        script = unicode(script)
+        info = self.scan(script)
+        row = self.db.execute("SELECT html FROM scripts WHERE path = ?",
+                              (script,)).fetchone()
+        if row is not None and row[0] is not None:
+            return row[0]
+        html = outline_html(script, info)
+        with self.db:
+            self.db.execute("UPDATE scripts SET html = ? WHERE path = ?",
+                            (html, script))
+        return html
+
+    def arguments(self, script):
+        """
+        Return the argument sets saved for script, as a dict of preset
+        name to the texts given to save_arguments. The last used
+        arguments are under script_args.LAST_USED.
+        """
+        return dict((name, json.loads(texts)) for (name, texts) in
+                    self.db.execute("SELECT name, texts FROM arguments "
+                                    "WHERE path = ?", (unicode(script),)))
+
+    def save_arguments(self, script, name, texts):
+        """
+        Save the texts entered for the arguments of script (any JSON
+        serializable value) under the preset name.
+        """
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO arguments (path, name, texts, "
+                "saved) VALUES (?, ?, ?, ?)",
+                (unicode(script), unicode(name), json.dumps(texts),
+                 time.time()))
+
+    def delete_arguments(self, script, name):
+        with self.db:
+            self.db.execute(
+                "DELETE FROM arguments WHERE path = ? AND name = ?",
+                (unicode(script), unicode(name)))
+
+    def evict(self, script):
+        with self.db:
+            self.db.execute("DELETE FROM scripts WHERE path = ?",
+                            (unicode(script),))
+
+    def prune(self):
+        """
+        Evict the entries of scripts that no longer exist.
+        """
+        paths = [row[0] for row in
+                 self.db.execute("SELECT path FROM scripts")]
+        missing = [(path,) for path in paths if not os.path.exists(path)]
+        with self.db:
+            self.db.executemany("DELETE FROM scripts WHERE path = ?",
+                                missing)
+        return len(missing)
+
+    def export_bundle(self, bundle, root):
+        """
+        Scan every script under root and write their entries to a new
+        cache file at bundle, with paths relative to root, so it can be
+        shipped with the scripts and imported wherever they are copied.
+        Returns the number of scripts exported.
+        """
+        root = os.path.abspath(unicode(root))
+        if os.path.exists(bundle):
+            os.remove(bundle)
+        target = MetadataCache(bundle)
+        count = 0
+        for (directory, dirs, files) in os.walk(root):
+            for name in sorted(files):
+                if not name.endswith('.py'):
+                    continue
+                script = os.path.join(directory, name)
+                self.scan(script)
+                row = self.db.execute(
+                    "SELECT mtime, size, digest, info FROM scripts "
+                    "WHERE path = ?", (script,)).fetchone()
+                relative = os.path.relpath(script, root)
+                # the HTML holds the full path, so it is rendered again
+                # where the bundle is imported
+                with target.db:
+                    target.db.execute(
+                        "INSERT OR REPLACE INTO scripts (path, mtime, size, "
+                        "digest, info, html, used) "
+                        "VALUES (?, ?, ?, ?, ?, NULL, ?)",
+                        (relative,) + tuple(row) + (time.time(),))
+                count += 1
+        self.flush()
+        target.close()
+        return count
+
+    def import_bundle(self, bundle, root):
+        """
+        Add the entries of a bundle made by export_bundle, resolving its
+        relative paths against root. The first lookup of each script
+        checks it by hash, since copying changes mtime; later lookups
+        are stat-only. Returns the number of entries imported.
+        """
+        root = os.path.abspath(unicode(root))
+        source = sqlite3.connect(bundle)
+        rows = source.execute(
+            "SELECT path, mtime, size, digest, info FROM scripts")
+        count = 0
+        with self.db:
+            for row in rows:
+                script = os.path.join(root, row[0])
+                state = json.loads(row[4])
+                state['path'] = script
+                self.db.execute(
+                    "INSERT OR REPLACE INTO scripts (path, mtime, size, "
+                    "digest, info, html, used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (script, row[1], row[2], row[3], json.dumps(state),
+                     None, time.time()))
+                count += 1
+        source.close()
+        return count
@@ -19,6 +19,13 @@ from PyQt4 import QtCore, QtGui
 from PyQt4.QtCore import Qt
 from ui_preferences import Ui_PrefsDialog
 
+# values stored for ScriptRunner/run_mode, in the order of the combo box
+RUN_MODES = ['gui', 'thread', 'process']
+# values stored for ScriptRunner/log_fsync, in the order of the combo box
+LOG_FSYNC_POLICIES = ['never', 'run', 'always']
+# values stored for ScriptRunner/profiler, in the order of the combo box
+PROFILERS = ['cprofile', 'sampling']
+
 
 class PreferencesDialog(QtGui.QDialog):
     """
@@ -42,6 +49,11 @@ class PreferencesDialog(QtGui.QDialog):
 
         # connect the checkbox state change
         self.ui.cbLogToDisk.stateChanged.connect(self.changed_log_to_disk)
+        # connect the run mode change
+        self.ui.cbxRunMode.currentIndexChanged.connect(self.changed_run_mode)
+        # connect the profiler and sampling changes
+        self.ui.cbxProfiler.currentIndexChanged.connect(self.changed_sampling)
+        self.ui.cbSampleAllRuns.stateChanged.connect(self.changed_sampling)
 
         self.settings = QtCore.QSettings()
         self.restore_settings()
@@ -56,6 +68,9 @@ class PreferencesDialog(QtGui.QDialog):
         clear_console = self.settings.value(
             "ScriptRunner/clear_console", False, type=bool)
         self.ui.cbClearConsole.setChecked(clear_console)
+        console_max_lines = self.settings.value(
+            "ScriptRunner/console_max_lines", 10000, type=int)
+        self.ui.sbConsoleMaxLines.setValue(console_max_lines)
         log_output = self.settings.value(
             "ScriptRunner/log_output_to_disk", False, type=bool)
         self.ui.cbLogToDisk.setChecked(log_output)
@@ -68,6 +83,24 @@ class PreferencesDialog(QtGui.QDialog):
             "ScriptRunner/log_overwrite", False, type=bool)
         self.ui.cbOverwriteLogFile.setChecked(log_overwite)
 
+        log_max_size = self.settings.value(
+            "ScriptRunner/log_max_size_mb", 0, type=int)
+        self.ui.sbLogMaxSize.setValue(log_max_size)
+        log_rotate_hours = self.settings.value(
+            "ScriptRunner/log_rotate_hours", 0, type=int)
+        self.ui.sbLogRotateHours.setValue(log_rotate_hours)
+        log_backup_count = self.settings.value(
+            "ScriptRunner/log_backup_count", 5, type=int)
+        self.ui.sbLogBackupCount.setValue(log_backup_count)
+        log_compress = self.settings.value(
+            "ScriptRunner/log_compress", False, type=bool)
+        self.ui.cbLogCompress.setChecked(log_compress)
+        log_fsync = self.settings.value(
+            "ScriptRunner/log_fsync", "never", type=unicode)
+        if log_fsync in LOG_FSYNC_POLICIES:
+            self.ui.cbxLogFsync.setCurrentIndex(
+                LOG_FSYNC_POLICIES.index(log_fsync))
+
         use_custom_editor = self.settings.value(
             "ScriptRunner/use_custom_editor", False, type=bool)
         self.ui.cbCustomEditor.setChecked(use_custom_editor)
@@ -76,8 +109,41 @@ class PreferencesDialog(QtGui.QDialog):
             "ScriptRunner/custom_editor", "", type=unicode)
         self.ui.leCustomEditorPath.setText(custom_editor)
 
+        run_mode = self.settings.value(
+            "ScriptRunner/run_mode", "gui", type=unicode)
+        if run_mode in RUN_MODES:
+            self.ui.cbxRunMode.setCurrentIndex(RUN_MODES.index(run_mode))
+
+        host_python = self.settings.value(
+            "ScriptRunner/host_python", "", type=unicode)
+        self.ui.leHostPython.setText(host_python)
+
+        queue_concurrency = self.settings.value(
+            "ScriptRunner/queue_concurrency", 1, type=int)
+        self.ui.sbQueueConcurrency.setValue(queue_concurrency)
+
+        fresh_namespace = self.settings.value(
+            "ScriptRunner/fresh_namespace", False, type=bool)
+        self.ui.cbFreshNamespace.setChecked(fresh_namespace)
+
+        profiler = self.settings.value(
+            "ScriptRunner/profiler", "cprofile", type=unicode)
+        if profiler in PROFILERS:
+            self.ui.cbxProfiler.setCurrentIndex(PROFILERS.index(profiler))
+        sample_rate = self.settings.value(
+            "ScriptRunner/sample_rate", 100, type=int)
+        self.ui.sbSampleRate.setValue(sample_rate)
+        sample_all_runs = self.settings.value(
+            "ScriptRunner/sample_all_runs", False, type=bool)
+        self.ui.cbSampleAllRuns.setChecked(sample_all_runs)
+        large_file_kb = self.settings.value(
+            "ScriptRunner/large_file_kb", 1024, type=int)
+        self.ui.sbLargeFile.setValue(large_file_kb)
+
         # disable controls based on parent settings
         self.changed_log_to_disk(self.ui.cbLogToDisk.checkState())
+        self.changed_run_mode(self.ui.cbxRunMode.currentIndex())
+        self.changed_sampling()
 
     def set_log_dir(self):
         self.log_dir = QtGui.QFileDialog.getExistingDirectory(
@@ -97,6 +163,15 @@ class PreferencesDialog(QtGui.QDialog):
         self.ui.leLogDirectory.setEnabled(state == Qt.Checked)
         self.ui.tbSetLogDirectory.setEnabled(state == Qt.Checked)
         self.ui.cbOverwriteLogFile.setEnabled(state == Qt.Checked)
+        self.ui.groupBoxLogRotation.setEnabled(state == Qt.Checked)
+
+    def changed_run_mode(self, index):
+        self.ui.leHostPython.setEnabled(RUN_MODES[index] == 'process')
+
+    def changed_sampling(self, *args):
+        self.ui.sbSampleRate.setEnabled(
+            PROFILERS[self.ui.cbxProfiler.currentIndex()] == 'sampling' or
+            self.ui.cbSampleAllRuns.checkState() == Qt.Checked)
 
     def save_settings(self):
         self.settings.setValue(
@@ -105,6 +180,9 @@ class PreferencesDialog(QtGui.QDialog):
         self.settings.setValue(
             "ScriptRunner/clear_console",
             self.ui.cbClearConsole.checkState() == Qt.Checked)
+        self.settings.setValue(
+            "ScriptRunner/console_max_lines",
+            self.ui.sbConsoleMaxLines.value())
         self.settings.setValue(
             "ScriptRunner/show_console",
             self.ui.cbShowConsole.checkState() == Qt.Checked)
@@ -117,9 +195,48 @@ class PreferencesDialog(QtGui.QDialog):
         self.settings.setValue(
             "ScriptRunner/log_overwrite",
             self.ui.cbOverwriteLogFile.checkState() == Qt.Checked)
+        self.settings.setValue(
+            "ScriptRunner/log_max_size_mb",
+            self.ui.sbLogMaxSize.value())
+        self.settings.setValue(
+            "ScriptRunner/log_rotate_hours",
+            self.ui.sbLogRotateHours.value())
+        self.settings.setValue(
+            "ScriptRunner/log_backup_count",
+            self.ui.sbLogBackupCount.value())
+        self.settings.setValue(
+            "ScriptRunner/log_compress",
+            self.ui.cbLogCompress.checkState() == Qt.Checked)
+        self.settings.setValue(
+            "ScriptRunner/log_fsync",
+            LOG_FSYNC_POLICIES[self.ui.cbxLogFsync.currentIndex()])
         self.settings.setValue(
             "ScriptRunner/use_custom_editor",
             self.ui.cbCustomEditor.checkState() == Qt.Checked)
         self.settings.setValue(
             "ScriptRunner/custom_editor",
             self.ui.leCustomEditorPath.text())
+        self.settings.setValue(
+            "ScriptRunner/run_mode",
+            RUN_MODES[self.ui.cbxRunMode.currentIndex()])
+        self.settings.setValue(
+            "ScriptRunner/host_python",
+            self.ui.leHostPython.text())
+        self.settings.setValue(
+            "ScriptRunner/queue_concurrency",
+            self.ui.sbQueueConcurrency.value())
+        self.settings.setValue(
+            "ScriptRunner/fresh_namespace",
+            self.ui.cbFreshNamespace.checkState() == Qt.Checked)
+        self.settings.setValue(
+            "ScriptRunner/profiler",
+            PROFILERS[self.ui.cbxProfiler.currentIndex()])
+        self.settings.setValue(
+            "ScriptRunner/sample_rate",
+            self.ui.sbSampleRate.value())
+        self.settings.setValue(
+            "ScriptRunner/sample_all_runs",
+            self.ui.cbSampleAllRuns.checkState() == Qt.Checked)
+        self.settings.setValue(
+            "ScriptRunner/large_file_kb",
+            self.ui.sbLargeFile.value())
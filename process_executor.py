@@ -0,0 +1,227 @@
+"""
+Execute scripts in a child Python process with a headless QGIS
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import json
+import os
+import sys
+import tempfile
+
+from PyQt4.QtCore import *
+
+from run_metrics import RunMetrics
+from script_args import encode_args
+
+
+def python_executable(configured=None):
+    """
+    Return the Python interpreter used to start child processes. Inside
+    QGIS sys.executable is often the QGIS binary, so fall back to
+    'python' on the PATH when it does not look like an interpreter.
+    """
+    if configured:
+        return configured
+    name = os.path.basename(sys.executable or '').lower()
+    if name.startswith('python'):
+        return sys.executable
+    return 'python'
+
+
+def host_environment():
+    """
+    Environment for a child process: the parent's environment, plus the
+    current sys.path so the child finds the qgis and PyQt4 modules the
+    way QGIS itself does.
+    """
+    from qgis.core import QgsApplication
+    env = QProcessEnvironment.systemEnvironment()
+    env.insert('PYTHONPATH', os.pathsep.join(
+        [p for p in sys.path if p]))
+    env.insert('QGIS_PREFIX_PATH', QgsApplication.prefixPath())
+    return env
+
+
+def host_script():
+    return os.path.join(os.path.dirname(__file__), 'script_host.py')
+
+
+class ProcessJob(QObject):
+    """
+    A script running in a child process started with QProcess.
+    """
+    output = pyqtSignal(int, str, bool)
+    done = pyqtSignal(int, str, str)
+
+    def __init__(self, job_id, process, result_file):
+        QObject.__init__(self)
+        self.job_id = job_id
+        self.process = process
+        self.result_file = result_file
+        self.stop_requested = False
+        # RunMetrics reported by the child
+        self.metrics = None
+        process.readyReadStandardOutput.connect(self.read_stdout)
+        process.readyReadStandardError.connect(self.read_stderr)
+        process.finished.connect(self.process_finished)
+        process.error.connect(self.process_error)
+
+    def read_stdout(self):
+        data = str(self.process.readAllStandardOutput())
+        self.output.emit(self.job_id, data.decode('utf-8', 'replace'),
+                         False)
+
+    def read_stderr(self):
+        data = str(self.process.readAllStandardError())
+        self.output.emit(self.job_id, data.decode('utf-8', 'replace'), True)
+
+    def process_error(self, error):
+        if error == QProcess.FailedToStart:
+            if os.path.exists(self.result_file):
+                os.remove(self.result_file)
+            self.done.emit(self.job_id, 'error',
+                           "The script host process failed to start: %s\n"
+                           % self.process.errorString())
+
+    def process_finished(self, exit_code, exit_status):
+        self.read_stdout()
+        self.read_stderr()
+        result = None
+        try:
+            with open(self.result_file, 'r') as f:
+                result = json.load(f)
+        except (IOError, ValueError):
+            pass
+        finally:
+            if os.path.exists(self.result_file):
+                os.remove(self.result_file)
+
+        if self.stop_requested:
+            self.done.emit(self.job_id, 'stopped', '')
+        elif result is None or exit_status == QProcess.CrashExit:
+            self.done.emit(self.job_id, 'error',
+                           "The script host process exited abnormally "
+                           "(exit code %d) without reporting a result.\n"
+                           % exit_code)
+        else:
+            self.metrics = RunMetrics.from_dict(result.get('metrics'))
+            self.done.emit(self.job_id, result['status'],
+                           result['traceback'] or '')
+
+    def stop(self):
+        self.stop_requested = True
+        self.process.kill()
+
+
+class ProcessExecutor(QObject):
+    """
+    Run scripts in child processes using script_host.py. Offers the same
+    job signals as ScriptExecutor, plus output for the streamed stdout
+    and stderr of the child.
+    """
+    job_started = pyqtSignal(int)
+    job_finished = pyqtSignal(int)
+    job_failed = pyqtSignal(int, str)
+    job_stopped = pyqtSignal(int)
+    output = pyqtSignal(int, str, bool)
+
+    def __init__(self, python=None, parent=None):
+        QObject.__init__(self, parent)
+        self.python = python
+        self.host_script = host_script()
+        self.jobs = dict()
+        self.next_id = 1
+        # RunMetrics of finished jobs, until taken
+        self.metrics = dict()
+
+    def environment(self):
+        return host_environment()
+
+    def submit(self, script, user_args=None, profile=None,
+               sample_rate=None, memory=False):
+        """
+        Start script in a new child process and return the job id. If
+        profile is a path, the child saves the cProfile statistics of
+        the run there or, given a sample_rate, the collapsed stacks of
+        the sampling profiler or, with memory set, the report of the
+        memory profiler.
+        """
+        (fd, result_file) = tempfile.mkstemp(prefix='scriptrunner_',
+                                             suffix='.json')
+        os.close(fd)
+        process = QProcess(self)
+        process.setProcessEnvironment(self.environment())
+        process.setWorkingDirectory(os.path.dirname(str(script)))
+
+        job = ProcessJob(self.next_id, process, result_file)
+        self.next_id += 1
+        job.output.connect(self.output)
+        job.done.connect(self.job_done)
+        self.jobs[job.job_id] = job
+
+        args = ['-u', self.host_script, '--result', result_file]
+        if user_args is not None:
+            args += ['--args', json.dumps(encode_args(user_args))]
+        if profile is not None:
+            args += ['--profile', profile]
+            if sample_rate:
+                args += ['--sample-rate', str(sample_rate)]
+            elif memory:
+                args.append('--memory')
+        args.append(str(script))
+        process.start(python_executable(self.python), args)
+        self.job_started.emit(job.job_id)
+        return job.job_id
+
+    def stop(self, job_id=None):
+        """
+        Kill the given job, or all active jobs if job_id is None.
+        """
+        if job_id is None:
+            job_ids = self.jobs.keys()
+        else:
+            job_ids = [job_id]
+        for jid in job_ids:
+            if jid in self.jobs:
+                self.jobs[jid].stop()
+
+    def active_jobs(self):
+        """Return the ids of jobs that are running."""
+        return sorted(self.jobs.keys())
+
+    def is_busy(self):
+        return len(self.jobs) > 0
+
+    def take_metrics(self, job_id):
+        """
+        Return the RunMetrics the child of a finished job reported, or
+        None if it reported none (it crashed, failed to start or was
+        stopped).
+        """
+        return self.metrics.pop(job_id, None)
+
+    def job_done(self, job_id, status, tb):
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            # already reported, e.g. a failed start followed by finished
+            return
+        job.process.deleteLater()
+        if job.metrics is not None:
+            self.metrics[job_id] = job.metrics
+        if status == 'ok':
+            self.job_finished.emit(job_id)
+        elif status == 'stopped':
+            self.job_stopped.emit(job_id)
+        else:
+            self.job_failed.emit(job_id, tb)
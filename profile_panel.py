@@ -0,0 +1,169 @@
+"""
+Profile tab listing the functions that took the most time in a run,
+measured by cProfile or by the sampling profiler
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import os
+
+from PyQt4.QtCore import *
+from PyQt4.QtGui import *
+
+
+class SortKeyItem(QTableWidgetItem):
+    """
+    Item shown as text but sorted by the number kept under UserRole.
+    """
+
+    def __lt__(self, other):
+        return self.data(Qt.UserRole) < other.data(Qt.UserRole)
+
+
+class ProfilePanel(QWidget):
+    """
+    Sortable table of the functions of a profile (see
+    profile_stats.profile_rows), of the hottest frames of a sampled run
+    (see sampling_profiler.sample_rows) or of the lines allocating the
+    most memory (see memory_profile.memory_rows). Activating a row of a
+    function or line in the profiled script emits location_selected
+    with its line.
+    """
+    COLUMNS = ['Function', 'Location', 'Calls', 'Own (s)',
+               'Cumulative (s)']
+    SAMPLE_COLUMNS = ['Function', 'Location', 'Samples', 'Own %',
+                      'Total %']
+    MEMORY_COLUMNS = ['Code', 'Location', 'Blocks', 'Size (MB)',
+                      'Share %']
+    location_selected = pyqtSignal(str, int)
+
+    def __init__(self, parent=None):
+        QWidget.__init__(self, parent)
+        self.script = None
+        self.rows = []
+        self.flamegraph = None
+
+        layout = QVBoxLayout(self)
+        h_layout = QHBoxLayout()
+        self.summary = QLabel("Use Run with Profiler to profile a script.")
+        self.summary.setWordWrap(True)
+        self.summary.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        h_layout.addWidget(self.summary, 1)
+        self.flamegraph_button = QPushButton("Open Flame Graph")
+        self.flamegraph_button.setVisible(False)
+        self.flamegraph_button.clicked.connect(self.open_flamegraph)
+        h_layout.addWidget(self.flamegraph_button)
+        layout.addLayout(h_layout)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.cellActivated.connect(self.row_activated)
+        self.table.cellClicked.connect(self.row_activated)
+        layout.addWidget(self.table)
+
+    def show_profile(self, script, rows, total, saved_to):
+        summary = "%s: %.3f s profiled, top %d function(s)." % (
+            os.path.basename(unicode(script)), total, len(rows))
+        if saved_to:
+            summary += " Statistics saved to %s" % saved_to
+        self.flamegraph = None
+        self.flamegraph_button.setVisible(False)
+        self.show_rows(script, rows, summary, self.COLUMNS,
+                       lambda seconds: "%.4f" % seconds)
+
+    def show_samples(self, script, rows, samples, rate, saved_to,
+                     flamegraph):
+        """
+        Show the hottest frames of a sampled run: samples were taken at
+        rate a second; saved_to holds the collapsed stacks and
+        flamegraph the flame graph page, if they were written.
+        """
+        summary = "%s: %d sample(s) at %d a second, top %d function(s)." % (
+            os.path.basename(unicode(script)), samples, rate, len(rows))
+        if saved_to:
+            summary += " Stacks saved to %s" % saved_to
+        self.flamegraph = flamegraph
+        self.flamegraph_button.setVisible(flamegraph is not None)
+        total = max(samples, 1)
+        self.show_rows(script, rows, summary, self.SAMPLE_COLUMNS,
+                       lambda count: "%.1f" % (100.0 * count / total))
+
+    def show_memory(self, script, rows, total, summary, saved_to):
+        """
+        Show the lines that allocated the most memory in a run, total
+        bytes in all, with summary saying what the run kept.
+        """
+        summary = "%s: %s. Top %d line(s)." % (
+            os.path.basename(unicode(script)), summary, len(rows))
+        if saved_to:
+            summary += " Report saved to %s" % saved_to
+        self.flamegraph = None
+        self.flamegraph_button.setVisible(False)
+        total = max(total, 1)
+        self.show_rows(script, rows, summary, self.MEMORY_COLUMNS,
+                       lambda size: "%.1f" % (size / 1048576.0),
+                       lambda size: "%.1f" % (100.0 * size / total))
+
+    def show_rows(self, script, rows, summary, columns, format_value,
+                  format_cumulative=None):
+        """
+        Fill the table with rows under the headings columns; the own and
+        cumulative values are shown with format_value, or the latter
+        with format_cumulative if it is given.
+        """
+        formats = (format_value, format_cumulative or format_value)
+        self.script = script
+        self.rows = rows
+        self.summary.setText(summary)
+
+        self.table.setHorizontalHeaderLabels(columns)
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(0)
+        for (index, row) in enumerate(rows):
+            self.table.insertRow(index)
+            name = QTableWidgetItem(row.function)
+            # the row's place in self.rows survives sorting
+            name.setData(Qt.UserRole, index)
+            if row.belongs_to(script):
+                font = name.font()
+                font.setBold(True)
+                name.setFont(font)
+                name.setToolTip("Defined in the script; click to show "
+                                "the line in the Source tab")
+            self.table.setItem(index, 0, name)
+            self.table.setItem(index, 1, QTableWidgetItem(row.location()))
+            calls = SortKeyItem(row.call_count())
+            calls.setData(Qt.UserRole, row.calls)
+            self.table.setItem(index, 2, calls)
+            for (column, value, format_item) in (
+                    (3, row.own, formats[0]),
+                    (4, row.cumulative, formats[1])):
+                item = SortKeyItem(format_item(value))
+                item.setData(Qt.UserRole, value)
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(index, column, item)
+        self.table.setSortingEnabled(True)
+        self.table.sortItems(4, Qt.DescendingOrder)
+        self.table.resizeColumnsToContents()
+
+    def row_activated(self, table_row, column):
+        row = self.rows[self.table.item(table_row, 0).data(Qt.UserRole)]
+        if row.belongs_to(self.script):
+            self.location_selected.emit(self.script, row.line)
+
+    def open_flamegraph(self):
+        if self.flamegraph is not None:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(self.flamegraph))
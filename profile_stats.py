@@ -0,0 +1,73 @@
+"""
+Summarize the cProfile statistics of a run for the Profile tab
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import os
+
+# functions listed from each of the cumulative and own time rankings
+TOP_FUNCTIONS = 50
+
+
+class ProfileRow(object):
+    """
+    One function of a profile: where it is, how often it was called
+    (calls, with primitive_calls excluding recursive ones) and the
+    seconds spent in it alone (own) and including what it called
+    (cumulative).
+    """
+
+    def __init__(self, key, value):
+        (self.filename, self.line, self.function) = key
+        (self.primitive_calls, self.calls, self.own, self.cumulative,
+         callers) = value
+
+    def location(self):
+        if self.line == 0:
+            # built-in functions have no file
+            return ''
+        return "%s:%d" % (os.path.basename(self.filename), self.line)
+
+    def call_count(self):
+        if self.calls == self.primitive_calls:
+            return str(self.calls)
+        return "%d/%d" % (self.calls, self.primitive_calls)
+
+    def belongs_to(self, script):
+        return self.line > 0 and os.path.abspath(self.filename) == \
+            os.path.abspath(unicode(script))
+
+
+def profile_rows(stats, limit=TOP_FUNCTIONS):
+    """
+    Return the ProfileRows of a pstats.Stats for the functions among the
+    top limit by cumulative time or by own time, highest cumulative time
+    first.
+    """
+    rows = [ProfileRow(key, value) for (key, value) in stats.stats.items()]
+    by_cumulative = sorted(rows, key=lambda row: row.cumulative,
+                           reverse=True)[:limit]
+    by_own = sorted(rows, key=lambda row: row.own, reverse=True)[:limit]
+    chosen = set(by_cumulative) | set(by_own)
+    return sorted(chosen, key=lambda row: row.cumulative, reverse=True)
+
+
+def stats_path(directory, script, started, extension='.pstats'):
+    """
+    Return where the statistics of a run of script started at the
+    datetime started are saved.
+    """
+    stem = os.path.splitext(os.path.basename(unicode(script)))[0]
+    return os.path.join(unicode(directory), "%s-%s%s" % (
+        stem, started.strftime("%Y%m%d-%H%M%S"), extension))
@@ -0,0 +1,122 @@
+"""
+Panel showing the pending, running and finished jobs of the run queue
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+from PyQt4.QtCore import *
+from PyQt4.QtGui import *
+
+from run_queue import PRIORITY_NAMES, PENDING, RUNNING, FAILED
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return ''
+    seconds = int(seconds)
+    return "%d:%02d:%02d" % (seconds / 3600, seconds / 60 % 60, seconds % 60)
+
+
+class QueuePanel(QWidget):
+    """
+    Table of the jobs in a RunQueue with buttons to cancel pending jobs,
+    stop running jobs and clear finished ones.
+    """
+    COLUMNS = ['#', 'Script', 'Priority', 'State', 'Waited', 'Run Time',
+               'Submissions']
+    stop_requested = pyqtSignal()
+
+    def __init__(self, run_queue, parent=None):
+        QWidget.__init__(self, parent)
+        self.run_queue = run_queue
+        self.rows = dict()
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        h_layout = QHBoxLayout()
+        btn_cancel = QPushButton("Cancel Selected")
+        btn_cancel.clicked.connect(self.cancel_selected)
+        h_layout.addWidget(btn_cancel)
+        btn_cancel_all = QPushButton("Cancel Pending")
+        btn_cancel_all.clicked.connect(self.run_queue.cancel_pending)
+        h_layout.addWidget(btn_cancel_all)
+        btn_stop = QPushButton("Stop Running")
+        btn_stop.clicked.connect(self.stop_requested)
+        h_layout.addWidget(btn_stop)
+        btn_clear = QPushButton("Clear Finished")
+        btn_clear.clicked.connect(self.run_queue.clear_finished)
+        h_layout.addWidget(btn_clear)
+        h_layout.addStretch()
+        layout.addLayout(h_layout)
+
+        run_queue.job_added.connect(self.add_job)
+        run_queue.job_changed.connect(self.update_job)
+        run_queue.job_removed.connect(self.remove_job)
+
+        # keep the wait and run times of active jobs current
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.update_active)
+        self.timer.start()
+
+    def add_job(self, number):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        for col in range(len(self.COLUMNS)):
+            self.table.setItem(row, col, QTableWidgetItem())
+        self.rows[number] = row
+        self.update_job(number)
+
+    def update_job(self, number):
+        job = self.run_queue.jobs.get(number)
+        row = self.rows.get(number)
+        if job is None or row is None:
+            return
+        values = [str(job.number), job.script_name(),
+                  PRIORITY_NAMES[job.priority], job.state,
+                  format_seconds(job.wait_time()),
+                  format_seconds(job.run_time()), str(job.submissions)]
+        for (col, value) in enumerate(values):
+            self.table.item(row, col).setText(value)
+        self.table.item(row, 1).setToolTip(job.script)
+        if job.state == FAILED:
+            self.table.item(row, 3).setForeground(QBrush(QColor(Qt.red)))
+            self.table.item(row, 3).setToolTip(job.traceback)
+
+    def remove_job(self, number):
+        row = self.rows.pop(number, None)
+        if row is None:
+            return
+        self.table.removeRow(row)
+        for (n, r) in self.rows.items():
+            if r > row:
+                self.rows[n] = r - 1
+
+    def update_active(self):
+        for (number, job) in self.run_queue.jobs.items():
+            if job.state in (PENDING, RUNNING):
+                self.update_job(number)
+
+    def cancel_selected(self):
+        selected = set(index.row() for index in
+                       self.table.selectionModel().selectedRows())
+        for (number, row) in self.rows.items():
+            if row in selected:
+                self.run_queue.cancel(number)
@@ -0,0 +1,151 @@
+"""
+Load the registered scripts in the background at startup
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import os
+import sqlite3
+import traceback
+from functools import partial
+
+from PyQt4.QtCore import *
+
+from metadata_cache import check_script
+
+# milliseconds to wait for one script before reporting it unavailable
+LOAD_TIMEOUT = 10000
+# worker threads checking scripts at once
+LOAD_THREADS = 8
+
+
+class CheckTaskSignals(QObject):
+    """
+    Signals emitted by a CheckTask; see ScriptJobSignals.
+    """
+    started = pyqtSignal(str)
+    checked = pyqtSignal(object)
+    missing = pyqtSignal(str)
+    failed = pyqtSignal(str, str)
+
+
+class CheckTask(QRunnable):
+    """
+    Check that one script exists and scan it unless its cache entry is
+    still valid.
+    """
+
+    def __init__(self, script, entry):
+        QRunnable.__init__(self)
+        self.script = script
+        self.entry = entry
+        self.signals = CheckTaskSignals()
+
+    def run(self):
+        self.signals.started.emit(self.script)
+        try:
+            if not os.path.exists(self.script):
+                self.signals.missing.emit(self.script)
+                return
+            self.signals.checked.emit(check_script(self.script,
+                                                   self.entry))
+        except:
+            self.signals.failed.emit(self.script, traceback.format_exc())
+
+
+class RegistryLoader(QObject):
+    """
+    Check the registered scripts on a thread pool so a slow file system
+    does not hold up QGIS. Results are reported as they arrive; a script
+    that takes longer than timeout milliseconds once its check has
+    started (time waiting for a free thread does not count) is reported
+    once through script_timed_out, and still through script_loaded
+    should it answer later. finished is emitted when every script has
+    answered or timed out.
+
+    The metadata cache, if given, is only used on the GUI thread: its
+    entries are read before the tasks start and the results recorded as
+    they arrive.
+    """
+    script_loaded = pyqtSignal(str, object)
+    script_missing = pyqtSignal(str)
+    script_failed = pyqtSignal(str, str)
+    script_timed_out = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(self, metadata=None, max_threads=LOAD_THREADS,
+                 timeout=LOAD_TIMEOUT, parent=None):
+        QObject.__init__(self, parent)
+        self.metadata = metadata
+        self.timeout = timeout
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        # scripts not yet answered, with their tasks
+        self.pending = dict()
+        self.timed_out = set()
+        self.done = False
+
+    def load(self, scripts):
+        entries = dict()
+        if self.metadata is not None:
+            entries = self.metadata.entries(scripts)
+        for script in scripts:
+            script = unicode(script)
+            task = CheckTask(script, entries.get(script))
+            # the pool must not delete a task we may still hear from
+            task.setAutoDelete(False)
+            task.signals.started.connect(self.task_started)
+            task.signals.checked.connect(self.checked)
+            task.signals.missing.connect(partial(self.answered,
+                                                 self.script_missing))
+            task.signals.failed.connect(self.failed)
+            self.pending[script] = task
+            self.pool.start(task)
+        self.check_finished()
+
+    def task_started(self, script):
+        QTimer.singleShot(self.timeout, partial(self.check_timeout,
+                                                unicode(script)))
+
+    def checked(self, check):
+        info = check.info
+        if self.metadata is not None:
+            try:
+                info = self.metadata.apply(check)
+            except sqlite3.Error:
+                # the scan is still good without the cache
+                pass
+        self.answered(self.script_loaded, check.script, info)
+
+    def failed(self, script, tb):
+        self.answered(self.script_failed, script, tb)
+
+    def answered(self, signal, script, *args):
+        script = unicode(script)
+        signal.emit(script, *args)
+        self.pending.pop(script, None)
+        self.timed_out.discard(script)
+        self.check_finished()
+
+    def check_timeout(self, script):
+        if script in self.pending and script not in self.timed_out:
+            # the task stays referenced; its thread may still answer
+            self.timed_out.add(script)
+            self.script_timed_out.emit(script)
+            self.check_finished()
+
+    def check_finished(self):
+        # the scripts timed out are always among those pending
+        if not self.done and len(self.pending) == len(self.timed_out):
+            self.done = True
+            self.finished.emit()
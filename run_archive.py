@@ -0,0 +1,246 @@
+"""
+Archive of the output of each script run with an index for looking runs
+up by script and by time
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from run_metrics import RunMetrics
+from script_args import ArgumentError, decode_args, encode_args, \
+    format_args
+
+# file names inside the archive directory
+DATA_FILE = 'runs.dat'
+INDEX_FILE = 'runs.sqlite'
+
+# exit status recorded for a run
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+STATUS_STOPPED = 'stopped'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    script TEXT NOT NULL,
+    args TEXT,
+    started REAL NOT NULL,
+    finished REAL NOT NULL,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    metrics TEXT,
+    name TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_script ON runs (script, started);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+"""
+
+# created once the name column exists, in archives that predate it too
+NAME_INDEX = "CREATE INDEX IF NOT EXISTS runs_name ON runs (name, started)"
+
+
+def script_name(script):
+    """
+    Return the file name of script, split at '/' as well as os.sep.
+    """
+    return script.replace(os.sep, '/').rsplit('/', 1)[-1]
+
+
+class ArchivedRun(object):
+    """
+    A row of the run index. args holds the arguments as stored, see
+    script_args.encode_args, and metrics the RunMetrics of the run, or
+    None for runs archived before they were measured.
+    """
+
+    def __init__(self, row):
+        (self.run_id, self.script, args, self.started, self.finished,
+         self.start_offset, self.end_offset, self.status, metrics) = row[:9]
+        self.args = json.loads(args) if args else None
+        self.metrics = None
+        if metrics:
+            self.metrics = RunMetrics.from_dict(json.loads(metrics))
+
+    def args_text(self):
+        """
+        Return the arguments of the run as they would be written in a
+        call.
+        """
+        if self.args is None:
+            return ''
+        try:
+            return format_args(decode_args(self.args))
+        except ArgumentError:
+            # entered as code in an earlier version; show it as it was
+            return json.dumps(self.args)
+
+    def metrics_text(self):
+        if self.metrics is None:
+            return ''
+        return self.metrics.summary(brief=True)
+
+    def __repr__(self):
+        return "<ArchivedRun %d %s %s>" % (self.run_id, self.script,
+                                           self.status)
+
+
+class RunRecording(object):
+    """
+    Output of a run in progress. Text is compressed as it arrives so a
+    chatty script does not hold its whole output in memory.
+    """
+
+    def __init__(self, script, user_args=None):
+        self.script = unicode(script)
+        self.user_args = user_args
+        self.started = time.time()
+        # RunMetrics of the run, set by whoever measures it
+        self.metrics = None
+        self.compressor = zlib.compressobj()
+        self.chunks = []
+
+    def write(self, text):
+        if isinstance(text, unicode):
+            text = text.encode('utf-8')
+        data = self.compressor.compress(text)
+        if data:
+            self.chunks.append(data)
+
+    def segment(self):
+        """
+        Return the compressed output; the recording is finished.
+        """
+        self.chunks.append(self.compressor.flush())
+        return ''.join(self.chunks)
+
+
+class RunArchive(object):
+    """
+    The runs archived in a directory. Each run's output is one zlib
+    segment appended to DATA_FILE; the sqlite INDEX_FILE records the
+    script, arguments, times, status and the offsets of the segment, so
+    the output of any run is read with one seek.
+
+    Unless create is set, the archive must already exist; ValueError is
+    raised if it does not, so looking runs up never creates one.
+    """
+
+    def __init__(self, directory, create=True):
+        self.directory = directory
+        index_path = os.path.join(directory, INDEX_FILE)
+        if not create and not os.path.isfile(index_path):
+            raise ValueError("No run archive in %s" % directory)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.data_path = os.path.join(directory, DATA_FILE)
+        self.db = sqlite3.connect(index_path)
+        self.db.executescript(SCHEMA)
+        columns = [row[1] for row in
+                   self.db.execute("PRAGMA table_info(runs)")]
+        if 'metrics' not in columns:
+            # archives written before runs were measured
+            with self.db:
+                self.db.execute("ALTER TABLE runs ADD COLUMN metrics TEXT")
+        if 'name' not in columns:
+            # archives written before runs were found by file name
+            with self.db:
+                self.db.execute("ALTER TABLE runs ADD COLUMN name TEXT")
+                self.db.executemany(
+                    "UPDATE runs SET name = ? WHERE id = ?",
+                    [(script_name(script), run_id) for (run_id, script)
+                     in self.db.execute("SELECT id, script FROM runs")])
+        self.db.execute(NAME_INDEX)
+
+    def close(self):
+        self.db.close()
+
+    def add(self, recording, status, finished=None):
+        """
+        Store a finished recording and return its run id.
+        """
+        if finished is None:
+            finished = time.time()
+        segment = recording.segment()
+        with open(self.data_path, 'ab') as data:
+            data.seek(0, os.SEEK_END)
+            start = data.tell()
+            data.write(segment)
+        if recording.user_args is None:
+            args = None
+        else:
+            args = json.dumps(encode_args(recording.user_args))
+        metrics = None
+        if recording.metrics is not None and recording.metrics.finished():
+            metrics = json.dumps(recording.metrics.to_dict())
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO runs (script, args, started, finished, "
+                "start_offset, end_offset, status, metrics, name) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (recording.script, args, recording.started, finished,
+                 start, start + len(segment), status, metrics,
+                 script_name(recording.script)))
+        return cursor.lastrowid
+
+    def run(self, run_id):
+        row = self.db.execute(
+            "SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError("No archived run %s" % run_id)
+        return ArchivedRun(row)
+
+    def output(self, run_id):
+        """
+        Return the output of a run as unicode.
+        """
+        run = self.run(run_id)
+        with open(self.data_path, 'rb') as data:
+            data.seek(run.start_offset)
+            segment = data.read(run.end_offset - run.start_offset)
+        return zlib.decompress(segment).decode('utf-8', 'replace')
+
+    def find(self, script=None, since=None, until=None, limit=None):
+        """
+        Return the runs matching script (a full path or a file name) that
+        started within [since, until), most recent first. Times are
+        seconds since the epoch.
+        """
+        clauses = []
+        params = []
+        if script is not None:
+            if os.sep in script or '/' in script:
+                clauses.append("script = ?")
+                params.append(unicode(script))
+            else:
+                # match on the file name, exactly, using its index
+                clauses.append("name = ?")
+                params.append(unicode(script))
+        if since is not None:
+            clauses.append("started >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("started < ?")
+            params.append(until)
+        sql = "SELECT * FROM runs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY started DESC"
+        if limit:
+            sql += " LIMIT %d" % int(limit)
+        return [ArchivedRun(row) for row in self.db.execute(sql, params)]
@@ -0,0 +1,78 @@
+"""
+Dialog for browsing the archived output of past runs of a script
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import datetime
+import os
+
+from PyQt4.QtCore import *
+from PyQt4.QtGui import *
+
+from queue_panel import format_seconds
+
+
+class RunHistoryDialog(QDialog):
+    """
+    List the archived runs of a script; the output of the selected run
+    is read from the archive when it is selected.
+    """
+    COLUMNS = ['Started', 'Run Time', 'Status', 'Resources', 'Arguments']
+
+    def __init__(self, archive, script, parent=None):
+        QDialog.__init__(self, parent)
+        self.archive = archive
+        self.setWindowTitle("Script Runner - Run History: %s" %
+                            os.path.basename(unicode(script)))
+
+        layout = QVBoxLayout(self)
+        splitter = QSplitter(Qt.Vertical)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.itemSelectionChanged.connect(self.show_output)
+        splitter.addWidget(self.table)
+        self.output = QPlainTextEdit()
+        self.output.setReadOnly(True)
+        self.output.setLineWrapMode(QPlainTextEdit.NoWrap)
+        splitter.addWidget(self.output)
+        layout.addWidget(splitter)
+
+        self.runs = archive.find(unicode(script))
+        for run in self.runs:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            started = datetime.datetime.fromtimestamp(run.started)
+            values = [started.strftime('%Y-%m-%d %H:%M:%S'),
+                      format_seconds(run.finished - run.started),
+                      run.status, run.metrics_text(), run.args_text()]
+            for (column, value) in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        self.table.resizeColumnsToContents()
+
+        self.resize(700, 500)
+        if self.runs:
+            self.table.selectRow(0)
+
+    def show_output(self):
+        rows = self.table.selectionModel().selectedRows()
+        if not rows:
+            self.output.clear()
+            return
+        run = self.runs[rows[0].row()]
+        self.output.setPlainText(self.archive.output(run.run_id))
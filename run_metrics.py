@@ -0,0 +1,220 @@
+"""
+Measure the time, memory and garbage collection of a run
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import gc
+import os
+import sys
+import time
+import weakref
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+# ru_maxrss is in kilobytes except on OS X, where it is in bytes
+if sys.platform == 'darwin':
+    MAXRSS_UNIT = 1
+else:
+    MAXRSS_UNIT = 1024
+
+# getrusage of the calling thread only; Linux has it, Python 2 does not
+# name it
+if resource is not None and sys.platform.startswith('linux'):
+    RUSAGE_THREAD = getattr(resource, 'RUSAGE_THREAD', 1)
+else:
+    RUSAGE_THREAD = None
+
+
+def cpu_seconds(per_thread=False):
+    """
+    Return the user and system CPU time used so far by the process, or
+    by the calling thread if per_thread is set and the platform can tell.
+    """
+    if resource is None:
+        times = os.times()
+        return times[0] + times[1]
+    who = resource.RUSAGE_SELF
+    if per_thread and RUSAGE_THREAD is not None:
+        who = RUSAGE_THREAD
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+
+def peak_rss():
+    """
+    Return the peak resident set size of the process in bytes, or None
+    where getrusage is not available.
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * MAXRSS_UNIT
+
+
+class _Sentinel(object):
+    pass
+
+
+class CollectionCounter(object):
+    """
+    Count the garbage collections made while it is active. A sentinel
+    object in a reference cycle lives until the next collection, whose
+    weakref callback counts it and plants the next sentinel; Python 2
+    has no gc.callbacks to do this directly.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.active = False
+        self.ref = None
+
+    def start(self):
+        self.count = 0
+        self.active = True
+        self.plant()
+
+    def plant(self):
+        sentinel = _Sentinel()
+        sentinel.cycle = sentinel
+        self.ref = weakref.ref(sentinel, self.collected)
+
+    def collected(self, ref):
+        if self.active:
+            self.count += 1
+            self.plant()
+
+    def stop(self):
+        self.active = False
+        self.ref = None
+        return self.count
+
+
+def format_bytes(size):
+    for unit in ('bytes', 'KB', 'MB'):
+        if abs(size) < 1024:
+            if unit == 'bytes':
+                return "%d %s" % (size, unit)
+            return "%.1f %s" % (size, unit)
+        size /= 1024.0
+    return "%.1f GB" % size
+
+
+class RunMetrics(object):
+    """
+    The resources a run used: wall and CPU seconds, how far it raised
+    the peak resident set size of the process (peak_rss_delta, in bytes,
+    None where it cannot be read), the garbage collections made and the
+    change in the number of objects tracked by the garbage collector.
+
+    CPU time is that of the whole process unless per_thread is set, in
+    which case, where the platform allows, only the thread making the
+    run is counted; use it for runs on a worker thread of QGIS. Peak RSS,
+    collections and objects are always process wide.
+    """
+    FIELDS = ['wall', 'cpu', 'peak_rss', 'peak_rss_delta', 'collections',
+              'objects_delta']
+
+    def __init__(self, per_thread=False):
+        self.per_thread = per_thread
+        self.counter = CollectionCounter()
+        self.started = None
+        self.wall = None
+        self.cpu = None
+        self.peak_rss = None
+        self.peak_rss_delta = None
+        self.collections = None
+        self.objects_delta = None
+
+    def start(self):
+        self.started = time.time()
+        self.start_cpu = cpu_seconds(self.per_thread)
+        self.start_rss = peak_rss()
+        self.start_objects = len(gc.get_objects())
+        self.counter.start()
+        return self
+
+    def stop(self):
+        self.wall = time.time() - self.started
+        self.cpu = cpu_seconds(self.per_thread) - self.start_cpu
+        self.collections = self.counter.stop()
+        self.objects_delta = len(gc.get_objects()) - self.start_objects
+        self.peak_rss = peak_rss()
+        if self.peak_rss is not None:
+            self.peak_rss_delta = self.peak_rss - self.start_rss
+        return self
+
+    def measure(self, function, *args, **kwargs):
+        """
+        Call function with the given arguments and return its result,
+        measuring the call. Measured on the thread that calls it, so it
+        can be submitted to an executor in place of function.
+        """
+        self.start()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.stop()
+
+    def finished(self):
+        return self.wall is not None
+
+    def summary(self, brief=False):
+        """
+        Return the metrics as text, for example "wall 2.31 s, CPU 2.05 s,
+        peak RSS +14.2 MB, 3 GC collections, +1520 objects". A brief
+        summary leaves out the collections and objects.
+        """
+        if not self.finished():
+            return "not measured"
+        parts = ["wall %.2f s" % self.wall, "CPU %.2f s" % self.cpu]
+        if self.peak_rss_delta is not None:
+            parts.append("peak RSS +%s" % format_bytes(self.peak_rss_delta))
+        if not brief:
+            parts.append("%d GC collection%s" % (
+                self.collections, '' if self.collections == 1 else 's'))
+            parts.append("%+d objects" % self.objects_delta)
+        return ", ".join(parts)
+
+    def to_dict(self):
+        return dict((name, getattr(self, name)) for name in self.FIELDS)
+
+    @classmethod
+    def from_dict(cls, values):
+        """
+        Return RunMetrics holding the values of to_dict, for example as
+        reported by a script host process; None gives None.
+        """
+        if not values:
+            return None
+        metrics = cls()
+        for name in cls.FIELDS:
+            setattr(metrics, name, values.get(name))
+        return metrics
+
+    def __repr__(self):
+        return "<RunMetrics %s>" % self.summary()
+
+
+def completion_message(script_name, metrics, brief=False):
+    """
+    Return the line reporting that a run of script_name completed, with
+    its metrics if it was measured.
+    """
+    if metrics is None or not metrics.finished():
+        return "Completed script: %s" % script_name
+    return "Completed script: %s (%s)" % (script_name,
+                                          metrics.summary(brief))
@@ -0,0 +1,215 @@
+"""
+A queue of script runs with a concurrency limit, priorities and
+coalescing of duplicate submissions
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import heapq
+import json
+import os
+import time
+import traceback
+
+from PyQt4.QtCore import *
+
+from script_args import encode_args
+
+# priority classes; lower values run first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITY_NAMES = ['High', 'Normal', 'Low']
+
+# job states
+PENDING = 'pending'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+STOPPED = 'stopped'
+CANCELLED = 'cancelled'
+
+
+def job_key(script, user_args):
+    """
+    Return the key used to detect identical submissions: the absolute
+    script path and a canonical form of the arguments.
+    """
+    return (os.path.abspath(str(script)),
+            json.dumps(encode_args(user_args), sort_keys=True))
+
+
+class QueuedJob(object):
+    """
+    A script run waiting in, or taken from, the RunQueue.
+    """
+
+    def __init__(self, number, script, user_args, priority):
+        self.number = number
+        self.script = script
+        self.user_args = user_args
+        self.priority = priority
+        self.key = job_key(script, user_args)
+        self.state = PENDING
+        # number of submissions merged into this job
+        self.submissions = 1
+        self.submitted = time.time()
+        self.started = None
+        self.ended = None
+        self.traceback = ''
+
+    def script_name(self):
+        return os.path.basename(str(self.script))
+
+    def wait_time(self):
+        """Seconds spent waiting in the queue."""
+        end = self.started
+        if end is None:
+            end = self.ended or time.time()
+        return end - self.submitted
+
+    def run_time(self):
+        """Seconds spent running, or None if the job has not started."""
+        if self.started is None:
+            return None
+        return (self.ended or time.time()) - self.started
+
+    def is_done(self):
+        return self.state not in (PENDING, RUNNING)
+
+
+class RunQueue(QObject):
+    """
+    Schedule queued jobs. At most max_concurrent jobs run at once;
+    pending jobs are started by priority and then in submission order.
+    A submission identical to a job that is still pending is merged
+    into that job.
+
+    launcher is called with a QueuedJob to start it. The owner reports
+    the outcome with job_done(); if launcher raises, the job fails.
+    """
+    job_added = pyqtSignal(int)
+    job_changed = pyqtSignal(int)
+    job_removed = pyqtSignal(int)
+    queue_idle = pyqtSignal()
+
+    def __init__(self, launcher, max_concurrent=1, parent=None):
+        QObject.__init__(self, parent)
+        self.launcher = launcher
+        self.max_concurrent = max_concurrent
+        self.jobs = dict()
+        # heap of (priority, sequence, job number); entries for jobs that
+        # are no longer pending, or whose priority changed, are skipped
+        self.heap = []
+        self.pending = dict()
+        self.running = set()
+        self.next_number = 1
+        self.sequence = 0
+
+    def enqueue(self, script, user_args=None, priority=PRIORITY_NORMAL):
+        """
+        Add a run of script to the queue and return its job number. If
+        an identical run is pending, return the number of that job
+        instead, raising its priority if needed.
+        """
+        key = job_key(script, user_args)
+        if key in self.pending:
+            job = self.jobs[self.pending[key]]
+            job.submissions += 1
+            if priority < job.priority:
+                job.priority = priority
+                self.push(job)
+            self.job_changed.emit(job.number)
+        else:
+            job = QueuedJob(self.next_number, script, user_args, priority)
+            self.next_number += 1
+            self.jobs[job.number] = job
+            self.pending[key] = job.number
+            self.push(job)
+            self.job_added.emit(job.number)
+        self.schedule()
+        return job.number
+
+    def push(self, job):
+        self.sequence += 1
+        heapq.heappush(self.heap, (job.priority, self.sequence, job.number))
+
+    def pop_pending(self):
+        while self.heap:
+            (priority, seq, number) = heapq.heappop(self.heap)
+            job = self.jobs.get(number)
+            if (job is not None and job.state == PENDING and
+                    job.priority == priority):
+                return job
+        return None
+
+    def schedule(self):
+        """
+        Start pending jobs while there is room under the limit.
+        """
+        while len(self.running) < self.max_concurrent:
+            job = self.pop_pending()
+            if job is None:
+                break
+            del self.pending[job.key]
+            job.state = RUNNING
+            job.started = time.time()
+            self.running.add(job.number)
+            self.job_changed.emit(job.number)
+            try:
+                self.launcher(job)
+            except:
+                self.job_done(job.number, FAILED, traceback.format_exc())
+        if not self.running and not self.pending:
+            self.queue_idle.emit()
+
+    def job_done(self, number, state, tb=''):
+        """
+        Record the outcome of a running job and start the next one.
+        """
+        job = self.jobs.get(number)
+        if job is None or job.state != RUNNING:
+            return
+        job.state = state
+        job.ended = time.time()
+        job.traceback = tb
+        self.running.discard(number)
+        self.job_changed.emit(number)
+        self.schedule()
+
+    def cancel(self, number):
+        """Cancel a pending job. Running jobs are not affected."""
+        job = self.jobs.get(number)
+        if job is not None and job.state == PENDING:
+            del self.pending[job.key]
+            job.state = CANCELLED
+            job.ended = time.time()
+            self.job_changed.emit(number)
+
+    def cancel_pending(self):
+        for number in self.pending.values():
+            self.cancel(number)
+
+    def clear_finished(self):
+        """Forget jobs that are done."""
+        for number in [n for (n, job) in self.jobs.items()
+                       if job.is_done()]:
+            del self.jobs[number]
+            self.job_removed.emit(number)
+
+    def set_max_concurrent(self, max_concurrent):
+        self.max_concurrent = max(1, max_concurrent)
+        self.schedule()
+
+    def is_idle(self):
+        return not self.running and not self.pending
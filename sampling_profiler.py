@@ -0,0 +1,207 @@
+"""
+Sampling profiler: the stack of a running script is read at a fixed
+rate from a background thread and collected as collapsed stacks
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import re
+import sys
+import thread
+import threading
+import time
+
+from profile_stats import ProfileRow, TOP_FUNCTIONS
+
+# samples taken per second unless configured
+DEFAULT_RATE = 100
+MIN_RATE = 1
+MAX_RATE = 1000
+
+# file extension of saved collapsed stacks
+COLLAPSED_EXTENSION = '.folded'
+
+# a frame of a collapsed stack: "function (path:line)"
+FRAME_PATTERN = re.compile(
+    r'^(?P<function>.*) \((?P<path>.*):(?P<line>\d+)\)$')
+
+
+class SamplingProfiler(object):
+    """
+    Profile a call by sampling the stack of the thread making it rate
+    times a second. Unlike cProfile nothing is added to each function
+    call, so a script making millions of small calls runs at its usual
+    speed; the cost is one stack walk per sample on the sampling thread.
+
+    stacks maps each stack seen, a tuple of (path, first line, function)
+    from the outermost frame in, to the number of samples it was seen
+    in. Frames outside the profiled call are left out.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE):
+        self.rate = rate
+        self.interval = 1.0 / rate
+        self.stacks = dict()
+        self.samples = 0
+        self.elapsed = 0.0
+        self.thread_id = None
+        self.base = None
+        self.sampling = False
+        self.sampler = None
+        # (path, first line, function) of each code object sampled
+        self.keys = dict()
+
+    def runcall(self, function, *args, **kwargs):
+        """
+        Call function with the given arguments, sampling the thread it
+        runs on, and return its result.
+        """
+        self.thread_id = thread.get_ident()
+        self.base = sys._getframe()
+        self.start()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.stop()
+            self.base = None
+
+    def start(self):
+        self.sampling = True
+        self.started = time.time()
+        self.sampler = threading.Thread(target=self.sample_loop,
+                                        name="ScriptRunner sampler")
+        self.sampler.daemon = True
+        self.sampler.start()
+
+    def stop(self):
+        self.sampling = False
+        self.sampler.join()
+        self.sampler = None
+        self.elapsed += time.time() - self.started
+
+    def sample_loop(self):
+        while self.sampling:
+            time.sleep(self.interval)
+            if self.sampling:
+                self.sample()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        keys = self.keys
+        stack = []
+        while frame is not None and frame is not self.base:
+            code = frame.f_code
+            key = keys.get(code)
+            if key is None:
+                key = keys[code] = (code.co_filename, code.co_firstlineno,
+                                    code.co_name)
+            stack.append(key)
+            frame = frame.f_back
+        if frame is None or not stack or stack[-1] in OWN_FRAMES:
+            # outside the call, or in runcall itself
+            return
+        stack.reverse()
+        stack = tuple(stack)
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+
+
+# frames of the profiler that may be sampled around the call
+OWN_FRAMES = set((code.co_filename, code.co_firstlineno, code.co_name)
+                 for code in (SamplingProfiler.start.__func__.__code__,
+                              SamplingProfiler.stop.__func__.__code__))
+
+
+class SampleRow(ProfileRow):
+    """
+    One function of a sampled profile: the samples in which it was
+    running itself (own) and those in which it was on the stack at all
+    (cumulative). calls holds the cumulative count, for sorting.
+    """
+
+    def __init__(self, key):
+        (self.filename, self.line, self.function) = key
+        self.own = 0
+        self.cumulative = 0
+
+    @property
+    def calls(self):
+        return self.cumulative
+
+    def call_count(self):
+        return str(self.cumulative)
+
+
+def sample_rows(stacks, limit=TOP_FUNCTIONS):
+    """
+    Return the SampleRows of the functions among the top limit by
+    cumulative or by own samples, most cumulative samples first.
+    """
+    rows = dict()
+    for (stack, count) in stacks.iteritems():
+        for key in set(stack):
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = SampleRow(key)
+            row.cumulative += count
+        rows[stack[-1]].own += count
+    rows = rows.values()
+    by_cumulative = sorted(rows, key=lambda row: row.cumulative,
+                           reverse=True)[:limit]
+    by_own = sorted(rows, key=lambda row: row.own, reverse=True)[:limit]
+    chosen = set(by_cumulative) | set(by_own)
+    return sorted(chosen, key=lambda row: row.cumulative, reverse=True)
+
+
+def frame_label(key):
+    (path, line, function) = key
+    # semicolons separate the frames of a collapsed stack
+    return ("%s (%s:%d)" % (function, path, line)).replace(';', ',')
+
+
+def write_collapsed(path, stacks):
+    """
+    Write stacks in the collapsed format read by flamegraph.pl and
+    speedscope: one line per stack, frames from the outermost in
+    separated by semicolons, then the number of samples.
+    """
+    with open(path, 'w') as collapsed:
+        for (stack, count) in sorted(stacks.iteritems()):
+            line = ";".join(frame_label(key) for key in stack)
+            if isinstance(line, unicode):
+                line = line.encode('utf-8')
+            collapsed.write("%s %d\n" % (line, count))
+
+
+def read_collapsed(path):
+    """
+    Return the stacks of a file written by write_collapsed.
+    """
+    stacks = dict()
+    with open(path, 'r') as collapsed:
+        for line in collapsed:
+            (frames, _, count) = line.rstrip('\n').rpartition(' ')
+            if not frames:
+                continue
+            stack = []
+            for label in frames.split(';'):
+                match = FRAME_PATTERN.match(label)
+                if match is None:
+                    stack.append((label, 0, label))
+                else:
+                    stack.append((match.group('path'),
+                                  int(match.group('line')),
+                                  match.group('function')))
+            stack = tuple(stack)
+            stacks[stack] = stacks.get(stack, 0) + int(count)
+    return stacks
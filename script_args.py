@@ -0,0 +1,238 @@
+"""
+Parse and check the arguments entered for a script's run_script
+function without running any of the text as code
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+Arguments are passed around as a user_args dict: 'args' is the list of
+positional values after iface and 'keywords' a dict of keyword values.
+Values are only ever read with ast.literal_eval, so they can be numbers,
+strings, tuples, lists, dicts, booleans and None.
+"""
+import ast
+
+from script_scanner import UnknownDefault
+
+# name under which the last used values of a script are stored
+LAST_USED = ''
+
+
+class ArgumentError(ValueError):
+    """
+    An argument value that cannot be used; the message says which one
+    and why.
+    """
+
+
+def parse_literal(text):
+    """
+    Return the Python literal in text. Raises ArgumentError if it is
+    not one.
+    """
+    try:
+        return ast.literal_eval(text.strip())
+    except (ValueError, SyntaxError):
+        raise ArgumentError("%s is not a valid value" % text.strip())
+
+
+def has_default(default):
+    return default is not None and not isinstance(default, UnknownDefault)
+
+
+def coerce_value(name, value, default):
+    """
+    Convert value to the type of the argument's default, where the
+    conversion loses nothing: an int where a float is expected, a list
+    where a tuple is expected and so on. Raises ArgumentError if value
+    does not fit at all. Arguments without a usable default take value
+    as it is.
+    """
+    if not has_default(default):
+        return value
+    if isinstance(default, bool):
+        if isinstance(value, bool):
+            return value
+        if value in (0, 1):
+            return bool(value)
+        if isinstance(value, basestring) and \
+                value.lower() in ('true', 'false', 'yes', 'no'):
+            return value.lower() in ('true', 'yes')
+        raise ArgumentError("%s expects True or False, not %r"
+                            % (name, value))
+    if isinstance(default, (int, long, float)):
+        if isinstance(value, basestring):
+            try:
+                value = parse_literal(value)
+            except ArgumentError:
+                pass
+        if isinstance(value, bool) or \
+                not isinstance(value, (int, long, float)):
+            raise ArgumentError("%s expects a number, not %r"
+                                % (name, value))
+        if isinstance(default, float):
+            return float(value)
+        return value
+    if isinstance(default, basestring):
+        if not isinstance(value, basestring):
+            raise ArgumentError("%s expects a string, not %r"
+                                % (name, value))
+        return value
+    if isinstance(default, (tuple, list)):
+        if not isinstance(value, (tuple, list)):
+            raise ArgumentError("%s expects a %s, not %r"
+                                % (name, type(default).__name__, value))
+        return type(default)(value)
+    if isinstance(default, dict) and not isinstance(value, dict):
+        raise ArgumentError("%s expects a dict, not %r" % (name, value))
+    return value
+
+
+def parse_argument(name, text, default=None):
+    """
+    Return the value of an argument entered as text. Where the default
+    is a string, text that is not a quoted string is taken as it stands,
+    so a path or a word need not be quoted.
+    """
+    if isinstance(default, basestring):
+        try:
+            value = parse_literal(text)
+        except ArgumentError:
+            return text.strip()
+        if not isinstance(value, basestring):
+            return text.strip()
+        return value
+    try:
+        value = parse_literal(text)
+    except ArgumentError:
+        raise ArgumentError("The value of %s is not valid; strings must be "
+                            "quoted" % name)
+    return coerce_value(name, value, default)
+
+
+def parse_keywords(text):
+    """
+    Return the dict of keyword arguments entered as comma separated
+    name=value pairs. Raises ArgumentError if text is not made of such
+    pairs with literal values.
+    """
+    if not text.strip():
+        return dict()
+    try:
+        call = ast.parse("f(%s)" % text, mode='eval').body
+    except SyntaxError:
+        call = None
+    if not isinstance(call, ast.Call) or call.args or call.starargs or \
+            call.kwargs:
+        raise ArgumentError("Keyword arguments must be name=value pairs: "
+                            "%s" % text)
+    keywords = dict()
+    for keyword in call.keywords:
+        try:
+            keywords[keyword.arg] = ast.literal_eval(keyword.value)
+        except ValueError:
+            raise ArgumentError("The value of %s is not a valid value"
+                                % keyword.arg)
+    return keywords
+
+
+def argument_defaults(argspec):
+    """
+    Return the defaults of the arguments of argspec, by name.
+    """
+    if not argspec.defaults:
+        return dict()
+    named = argspec.args[len(argspec.args) - len(argspec.defaults):]
+    return dict(zip(named, argspec.defaults))
+
+
+def build_user_args(argspec, texts, keywords_text=None):
+    """
+    Return the user_args for a run_script with signature argspec from
+    the text entered for each argument (a dict by name) and for the
+    keyword arguments. An argument left empty is not passed, so
+    run_script uses its default; arguments after it are passed by
+    keyword. Raises ArgumentError for a missing or invalid value.
+    """
+    defaults = argument_defaults(argspec)
+    args = []
+    keywords = dict()
+    positional = True
+    for name in argspec.args[1:]:
+        text = texts.get(name, '').strip()
+        if not text:
+            if name not in defaults:
+                raise ArgumentError("A value is needed for %s" % name)
+            positional = False
+            continue
+        value = parse_argument(name, text, defaults.get(name))
+        if positional:
+            args.append(value)
+        elif name.startswith('.'):
+            raise ArgumentError("Tuple parameters cannot be left empty")
+        else:
+            keywords[name] = value
+    if keywords_text:
+        extra = parse_keywords(keywords_text)
+        if argspec.keywords is None and extra:
+            raise ArgumentError("run_script does not accept the argument(s) "
+                                "%s" % ', '.join(sorted(extra)))
+        for name in extra:
+            if name in argspec.args:
+                raise ArgumentError("%s is given twice" % name)
+        keywords.update(extra)
+    return {'args': args, 'keywords': keywords}
+
+
+def encode_args(user_args):
+    """
+    Return user_args with each value replaced by its repr, so it can be
+    stored or sent as JSON without losing tuples or unicode strings.
+    """
+    if user_args is None:
+        return None
+    return {'args': [repr(value) for value in user_args['args']],
+            'keywords': dict((name, repr(value)) for (name, value)
+                             in (user_args['keywords'] or {}).items())}
+
+
+def decode_args(state):
+    """
+    Return the user_args encoded by encode_args. Arguments stored by
+    earlier versions, as the text entered and a keywords string, are
+    read too.
+    """
+    if state is None:
+        return None
+    keywords = state.get('keywords')
+    if keywords is None:
+        keywords = dict()
+    elif isinstance(keywords, basestring):
+        keywords = parse_keywords(keywords)
+    else:
+        keywords = dict((str(name), parse_literal(text))
+                        for (name, text) in keywords.items())
+    return {'args': [parse_literal(text) for text in state['args']],
+            'keywords': keywords}
+
+
+def format_args(user_args):
+    """
+    Return user_args as they would be written in a call, for display.
+    """
+    if user_args is None:
+        return ''
+    parts = [repr(value) for value in user_args['args']]
+    keywords = user_args['keywords'] or {}
+    parts.extend("%s=%r" % (name, keywords[name])
+                 for name in sorted(keywords))
+    return ', '.join(parts)
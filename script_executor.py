@@ -0,0 +1,155 @@
+"""
+Execute scripts on a worker thread so the QGIS GUI stays responsive
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import ctypes
+import thread
+import traceback
+
+from PyQt4.QtCore import *
+
+
+class ScriptStopped(BaseException):
+    """
+    Raised inside a worker thread when the user stops a running script.
+    Derived from BaseException so a bare "except Exception" in a user
+    script does not swallow it.
+    """
+    pass
+
+
+class ScriptJobSignals(QObject):
+    """
+    Signals emitted by a ScriptJob. QRunnable is not a QObject, so the
+    signals live on this helper, which is created on the GUI thread.
+    """
+    started = pyqtSignal(int)
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(int, str)
+    stopped = pyqtSignal(int)
+
+
+class ScriptJob(QRunnable):
+    """
+    A callable to be run by the ScriptExecutor thread pool.
+    """
+
+    def __init__(self, job_id, func, args, kwargs):
+        QRunnable.__init__(self)
+        self.job_id = job_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.thread_id = None
+        self.stop_requested = False
+        self.signals = ScriptJobSignals()
+
+    def run(self):
+        self.thread_id = thread.get_ident()
+        self.signals.started.emit(self.job_id)
+        try:
+            if self.stop_requested:
+                raise ScriptStopped()
+            self.func(*self.args, **self.kwargs)
+        except ScriptStopped:
+            self.signals.stopped.emit(self.job_id)
+        except:
+            self.signals.failed.emit(self.job_id, traceback.format_exc())
+        else:
+            self.signals.finished.emit(self.job_id)
+        finally:
+            self.thread_id = None
+
+    def stop(self):
+        """
+        Ask the job to stop by raising ScriptStopped in its thread. The
+        exception is delivered the next time the thread executes Python
+        bytecode, so a script blocked in a long C++ call stops only once
+        that call returns.
+        """
+        self.stop_requested = True
+        if self.thread_id is not None:
+            ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                ctypes.c_long(self.thread_id),
+                ctypes.py_object(ScriptStopped))
+
+
+class ScriptExecutor(QObject):
+    """
+    Run callables on a QThreadPool and report their start, finish,
+    failure and stop back to the GUI thread through signals.
+    """
+    job_started = pyqtSignal(int)
+    job_finished = pyqtSignal(int)
+    job_failed = pyqtSignal(int, str)
+    job_stopped = pyqtSignal(int)
+
+    def __init__(self, max_threads=1, parent=None):
+        QObject.__init__(self, parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.jobs = dict()
+        self.next_id = 1
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue func(*args, **kwargs) for execution and return the job id.
+        """
+        job = ScriptJob(self.next_id, func, args, kwargs)
+        self.next_id += 1
+        # keep a reference until the job is done; the pool must not
+        # delete it while we may still call stop()
+        job.setAutoDelete(False)
+        job.signals.started.connect(self.job_started)
+        job.signals.finished.connect(self.job_done)
+        job.signals.failed.connect(self.job_done_with_error)
+        job.signals.stopped.connect(self.job_done_stopped)
+        self.jobs[job.job_id] = job
+        self.pool.start(job)
+        return job.job_id
+
+    def stop(self, job_id=None):
+        """
+        Stop the given job, or all active jobs if job_id is None.
+        """
+        if job_id is None:
+            job_ids = self.jobs.keys()
+        else:
+            job_ids = [job_id]
+        for jid in job_ids:
+            if jid in self.jobs:
+                self.jobs[jid].stop()
+
+    def active_jobs(self):
+        """Return the ids of jobs that are queued or running."""
+        return sorted(self.jobs.keys())
+
+    def is_busy(self):
+        return len(self.jobs) > 0
+
+    def set_max_threads(self, max_threads):
+        self.pool.setMaxThreadCount(max_threads)
+
+    def job_done(self, job_id):
+        self.jobs.pop(job_id, None)
+        self.job_finished.emit(job_id)
+
+    def job_done_with_error(self, job_id, tb):
+        self.jobs.pop(job_id, None)
+        self.job_failed.emit(job_id, tb)
+
+    def job_done_stopped(self, job_id):
+        self.jobs.pop(job_id, None)
+        self.job_stopped.emit(job_id)
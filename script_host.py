@@ -0,0 +1,212 @@
+"""
+Child process entry point used to run a script out of process.
+
+Usage:
+    python -u script_host.py --result RESULT_FILE [--args JSON]
+        [--profile PROFILE_FILE [--sample-rate HZ | --memory]] SCRIPT
+    python -u script_host.py --worker
+
+The script is imported in a headless QgsApplication and its run_script
+function is called with a HeadlessIface. Output goes to stdout and
+stderr; the exit status and traceback are written to RESULT_FILE as
+JSON:
+
+    {"script": ..., "status": "ok" | "error", "traceback": ...,
+     "metrics": see run_metrics.RunMetrics.to_dict}
+
+With --worker, QGIS is initialized once and jobs are read from stdin,
+one JSON object per line:
+
+    {"script": ..., "args": JSON encoded arguments, "output": OUTPUT_FILE}
+
+READY_LINE is written to stdout once QGIS is up. The output of each job
+goes to its OUTPUT_FILE and its result, with the seconds it took and
+its metrics, is written to stdout as a line starting with RESULT_PREFIX.
+The worker exits when stdin is closed.
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import argparse
+import cProfile
+import json
+import os
+import sys
+import time
+import traceback
+
+from headless import init_qgis, exit_qgis, HeadlessIface
+from memory_profile import MemoryProfiler
+from run_metrics import RunMetrics
+from sampling_profiler import SamplingProfiler, write_collapsed
+from script_args import decode_args
+from script_runtime import call_run_script, import_script
+
+# marks the result lines a worker writes to stdout
+RESULT_PREFIX = 'SCRIPTRUNNER-RESULT '
+# written by a worker once QGIS is initialized
+READY_LINE = 'SCRIPTRUNNER-READY'
+
+
+class OutputFile(object):
+    """
+    File that script output is redirected to; unicode is written as
+    UTF-8.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def write(self, text):
+        if isinstance(text, unicode):
+            text = text.encode('utf-8')
+        self.file.write(text)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def write_result(result_file, result):
+    if result_file:
+        with open(result_file, 'w') as f:
+            json.dump(result, f)
+
+
+def save_profile(profiler, path):
+    if isinstance(profiler, SamplingProfiler):
+        write_collapsed(path, profiler.stacks)
+    elif isinstance(profiler, MemoryProfiler):
+        profiler.save(path)
+    else:
+        profiler.dump_stats(path)
+
+
+def run(script, user_args=None, fresh=False, profile=None, sample_rate=None,
+        memory=False):
+    """
+    Import script and call its run_script function. Returns a result
+    dict with the status, the RunMetrics of the call (as a dict) and, on
+    failure, the traceback. With fresh set the script is loaded again
+    rather than reused. If profile is a path, the call is profiled and
+    the statistics saved there: the cProfile statistics or, given a
+    sample_rate, the collapsed stacks of the sampling profiler or, with
+    memory set, the report of the memory profiler.
+    """
+    result = {'script': script, 'status': 'ok', 'traceback': None,
+              'metrics': None}
+    metrics = RunMetrics()
+    try:
+        user_script = import_script(os.path.abspath(script), fresh=fresh)
+        if profile:
+            if sample_rate:
+                profiler = SamplingProfiler(sample_rate)
+            elif memory:
+                profiler = MemoryProfiler(script)
+            else:
+                profiler = cProfile.Profile()
+            try:
+                metrics.measure(profiler.runcall, call_run_script,
+                                user_script, HeadlessIface(), user_args)
+            finally:
+                save_profile(profiler, profile)
+        else:
+            metrics.measure(call_run_script, user_script, HeadlessIface(),
+                            user_args)
+    except:
+        result['status'] = 'error'
+        result['traceback'] = traceback.format_exc()
+        sys.stderr.write(result['traceback'])
+    if metrics.finished():
+        result['metrics'] = metrics.to_dict()
+    return result
+
+
+def serve(jobs, results):
+    """
+    Run the jobs read from the file jobs until it ends, writing their
+    results to results. Each job runs in a fresh module so runs of one
+    script do not see each other's module state.
+    """
+    results.write(READY_LINE + '\n')
+    results.flush()
+    for line in iter(jobs.readline, ''):
+        job = json.loads(line)
+        output = OutputFile(job['output'])
+        saved = (sys.stdout, sys.stderr)
+        (sys.stdout, sys.stderr) = (output, output)
+        start = time.time()
+        try:
+            result = run(job['script'], decode_args(job['args']), True)
+        finally:
+            (sys.stdout, sys.stderr) = saved
+            output.close()
+        result['seconds'] = time.time() - start
+        results.write(RESULT_PREFIX + json.dumps(result) + '\n')
+        results.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run a Script Runner script in a headless QGIS")
+    parser.add_argument('--result', help="file to write the JSON result to")
+    parser.add_argument('--args', help="JSON encoded arguments for the "
+                        "script's run_script function")
+    parser.add_argument('--profile', help="file to save the cProfile "
+                        "statistics of the run to")
+    parser.add_argument('--sample-rate', type=int,
+                        help="use the sampling profiler, taking this many "
+                        "samples a second, and save the collapsed stacks "
+                        "to the --profile file")
+    parser.add_argument('--memory', action='store_true',
+                        help="profile memory use and save the report to "
+                        "the --profile file")
+    parser.add_argument('--worker', action='store_true',
+                        help="run the jobs read from stdin")
+    parser.add_argument('script', nargs='?')
+    options = parser.parse_args(argv)
+    if not options.worker and not options.script:
+        parser.error("a script is needed unless --worker is given")
+
+    user_args = None
+    if options.args:
+        user_args = decode_args(json.loads(options.args))
+
+    try:
+        app = init_qgis()
+    except:
+        if options.worker:
+            sys.stderr.write(traceback.format_exc())
+            return 1
+        write_result(options.result, {'script': options.script,
+                                      'status': 'error',
+                                      'traceback': traceback.format_exc()})
+        return 1
+    if options.worker:
+        serve(sys.stdin, sys.stdout)
+        exit_qgis(app)
+        return 0
+    result = run(options.script, user_args, profile=options.profile,
+                 sample_rate=options.sample_rate, memory=options.memory)
+    sys.stdout.flush()
+    write_result(options.result, result)
+    exit_qgis(app)
+    if result['status'] == 'ok':
+        return 0
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Load scripts from their paths under unique module names without leaving
+their directories on sys.path
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import hashlib
+import imp
+import os
+import re
+import sys
+import threading
+
+# prefix of the module names given to scripts
+MODULE_PREFIX = 'scriptrunner_script_'
+
+# directories put on sys.path by script_path, with their users
+_path_users = dict()
+_path_lock = threading.Lock()
+
+
+def module_name(script):
+    """
+    Return the module name for the script at path. It is derived from
+    the absolute path, so it is the same in every session and two
+    scripts with the same file name in different directories do not
+    collide.
+    """
+    path = os.path.abspath(unicode(script))
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:10]
+    return "%s%s_%s" % (MODULE_PREFIX, re.sub(r'\W', '_', stem), digest)
+
+
+def is_script_module(name):
+    return name.startswith(MODULE_PREFIX)
+
+
+class script_path(object):
+    """
+    Context manager putting a script's directory at the front of
+    sys.path while the script is loaded or run, so it can import the
+    helper modules next to it. Uses are counted, so overlapping runs
+    from one directory (on several threads) keep it until the last one
+    ends.
+    """
+
+    def __init__(self, script_dir):
+        self.script_dir = script_dir
+
+    def __enter__(self):
+        with _path_lock:
+            users = _path_users.get(self.script_dir, 0)
+            if users == 0 and self.script_dir not in sys.path:
+                sys.path.insert(0, self.script_dir)
+            elif users == 0:
+                # already on sys.path for some other reason; leave it
+                users = -1
+            if users >= 0:
+                _path_users[self.script_dir] = users + 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with _path_lock:
+            users = _path_users.get(self.script_dir)
+            if users is None:
+                return False
+            if users == 1:
+                del _path_users[self.script_dir]
+                if self.script_dir in sys.path:
+                    sys.path.remove(self.script_dir)
+            else:
+                _path_users[self.script_dir] = users - 1
+        return False
+
+
+class ScriptLoader(object):
+    """
+    Load scripts by path. Each script becomes the module
+    module_name(script) in sys.modules. With fresh set, every load runs
+    the script in a new module, so nothing from an earlier run survives;
+    otherwise the module is loaded once and reused until reloaded.
+
+    Code comes from the BytecodeCache, if one is given.
+    """
+
+    def __init__(self, bytecode_cache=None, fresh=False):
+        self.bytecode_cache = bytecode_cache
+        self.fresh = fresh
+
+    def load(self, script):
+        """
+        Return the module of the script at path, loading it if needed.
+        """
+        name = module_name(script)
+        if not self.fresh and name in sys.modules:
+            return sys.modules[name]
+        return self.execute(script, imp.new_module(name))
+
+    def reload(self, module):
+        """
+        Run the script of a loaded module again in the same module, as
+        reload() does for an ordinary module.
+        """
+        return self.execute(module.__file__, module)
+
+    def code(self, path):
+        if self.bytecode_cache is not None:
+            return self.bytecode_cache.code(path)
+        with open(path, 'rU') as src:
+            source = src.read()
+        return compile(source, path, 'exec', 0, True)
+
+    def execute(self, script, module):
+        path = os.path.abspath(unicode(script))
+        code = self.code(path)
+        module.__file__ = path
+        previous = sys.modules.get(module.__name__)
+        sys.modules[module.__name__] = module
+        try:
+            with script_path(os.path.dirname(path)):
+                exec code in module.__dict__
+        except:
+            if previous is None:
+                del sys.modules[module.__name__]
+            else:
+                sys.modules[module.__name__] = previous
+            raise
+        return module
@@ -0,0 +1,97 @@
+"""
+Helpers for calling the run_script function of a user script
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import ast
+import inspect
+import os
+
+from script_args import ArgumentError, argument_defaults, coerce_value, \
+    parse_argument
+from script_loader import ScriptLoader, script_path
+
+
+def call_run_script(user_script, iface, user_args=None):
+    """
+    Call the run_script function of user_script, passing iface and the
+    arguments collected by the ArgsDialog (if any).
+
+    user_args is either None or a dict as built by
+    script_args.build_user_args.
+
+    The script's directory is on sys.path during the call, for helper
+    modules imported by run_script.
+    """
+    with script_path(os.path.dirname(user_script.__file__)):
+        if user_args is None:
+            user_script.run_script(iface)
+        else:
+            user_script.run_script(iface, *user_args['args'],
+                                   **(user_args['keywords'] or {}))
+
+
+def import_script(script, bytecode_cache=None, fresh=False):
+    """
+    Load the script from its path and return the module. See
+    ScriptLoader for the module name it gets and the meaning of fresh.
+    """
+    return ScriptLoader(bytecode_cache, fresh).load(script)
+
+
+def parse_value(text):
+    """
+    Return the Python literal in text, or text itself if it is not a
+    literal (so unquoted strings such as paths can be given on the
+    command line).
+    """
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def user_args_from_pairs(user_script, pairs):
+    """
+    Build the user_args dict expected by call_run_script from a list of
+    (name, value) string pairs. Pairs naming a positional parameter of
+    run_script fill that parameter, converted to the type of its default;
+    the rest are passed as keywords. Raises ArgumentError (a ValueError)
+    if a positional parameter is missing, a value does not fit its
+    default or a keyword is given to a run_script that does not accept
+    **kwargs.
+    """
+    argspec = inspect.getargspec(user_script.run_script)
+    defaults = argument_defaults(argspec)
+    values = dict()
+    for (name, text) in pairs:
+        if isinstance(defaults.get(name), basestring):
+            values[name] = parse_argument(name, text, defaults[name])
+        else:
+            values[name] = coerce_value(name, parse_value(text),
+                                        defaults.get(name))
+    args = []
+    for name in argspec.args[1:]:
+        if name in values:
+            args.append(values.pop(name))
+        elif name in defaults:
+            args.append(defaults[name])
+        else:
+            raise ArgumentError("missing value for argument '%s'" % name)
+    if values and argspec.keywords is None:
+        raise ArgumentError("run_script does not accept the argument(s) "
+                            "%s" % ', '.join(sorted(values)))
+    if not args and not values:
+        return None
+    return {'args': args, 'keywords': values}
@@ -0,0 +1,248 @@
+"""
+Static scanner that reads what Script Runner needs to know about a
+script from its source, without importing it
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import ast
+import inspect
+import os
+
+
+class UnknownDefault(object):
+    """
+    Stands in for a parameter default that is not a literal and so can
+    only be known by running the script.
+    """
+
+    def __repr__(self):
+        return '<expression>'
+
+
+class ScriptInfo(object):
+    """
+    What the scanner found in a script.
+
+    has_run_script is True if the module defines or binds run_script at
+    the top level. If it is a plain def, args, varargs, keywords and
+    defaults describe its parameters as inspect.getargspec would and
+    signature_known is True; if run_script is bound some other way (an
+    import or an assignment) its parameters are only known at run time.
+
+    classes is a list of (class name, [method names]) and functions a
+    list of function names, both in source order. imports lists the
+    modules the script may import, anywhere in its code; for "from a
+    import b" both a and a.b are listed since b may be a module, and
+    relative imports keep their leading dots. error holds the message
+    of a syntax error, in which case nothing else is filled in.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.has_run_script = False
+        self.signature_known = False
+        self.args = []
+        self.varargs = None
+        self.keywords = None
+        self.defaults = None
+        self.docstring = None
+        self.classes = []
+        self.functions = []
+        self.imports = []
+        self.error = None
+
+    def uses_args(self):
+        """
+        True if run_script takes arguments besides iface that can be
+        entered in the ArgsDialog. A run_script whose signature is unknown
+        is assumed to take none.
+        """
+        return self.signature_known and (
+            len(self.args) > 1 or self.keywords is not None)
+
+    def may_use_args(self):
+        """
+        True if run_script takes arguments or might; a run_script bound
+        by an import or assignment has to be inspected at run time.
+        """
+        return self.uses_args() or (self.has_run_script and
+                                    not self.signature_known)
+
+    def argspec(self):
+        """
+        Return the signature of run_script as an inspect.ArgSpec, or None
+        if it is not known.
+        """
+        if not self.signature_known:
+            return None
+        return inspect.ArgSpec(self.args, self.varargs, self.keywords,
+                               self.defaults)
+
+    def to_dict(self):
+        """
+        Return the scan as a dict that can be stored as JSON. Defaults
+        are kept as their repr so tuples and strings survive the trip.
+        """
+        state = dict(self.__dict__)
+        if self.defaults is not None:
+            state['defaults'] = [repr(value) for value in self.defaults]
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        info = cls(state['path'])
+        info.__dict__.update(state)
+        if info.defaults is not None:
+            info.defaults = tuple(parse_default(text)
+                                  for text in info.defaults)
+        info.classes = [(name, methods) for (name, methods) in info.classes]
+        info.imports = state.get('imports', [])
+        return info
+
+
+def parse_default(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return UnknownDefault()
+
+
+def literal_default(node):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        return UnknownDefault()
+
+
+def scan_arguments(info, func):
+    arguments = func.args
+    info.signature_known = True
+    # tuple parameters (def f((a, b))) have no single name
+    info.args = [arg.id if isinstance(arg, ast.Name) else '.%d' % index
+                 for (index, arg) in enumerate(arguments.args)]
+    info.varargs = arguments.vararg
+    info.keywords = arguments.kwarg
+    info.defaults = None
+    if arguments.defaults:
+        info.defaults = tuple(literal_default(node)
+                              for node in arguments.defaults)
+
+
+def bound_names(node):
+    """
+    Return the names bound at the top level by an import or assignment.
+    """
+    names = []
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        for alias in node.names:
+            names.append((alias.asname or alias.name).split('.')[0])
+    elif isinstance(node, ast.Assign):
+        for target in node.targets:
+            names.extend(sub.id for sub in ast.walk(target)
+                         if isinstance(sub, ast.Name))
+    return names
+
+
+def imported_modules(tree):
+    """
+    Return the sorted names of the modules imported anywhere in tree.
+    """
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            # relative imports keep their leading dots
+            base = '.' * (node.level or 0) + (node.module or '')
+            if node.module:
+                names.add(base)
+            if base and not base.endswith('.'):
+                base += '.'
+            names.update(base + alias.name
+                         for alias in node.names if alias.name != '*')
+    return sorted(names)
+
+
+def scan_source(source, path='<string>'):
+    """
+    Scan the source of a script and return a ScriptInfo.
+    """
+    info = ScriptInfo(path)
+    try:
+        tree = ast.parse(source, path)
+    except (SyntaxError, TypeError) as e:
+        info.error = str(e)
+        return info
+    info.docstring = ast.get_docstring(tree)
+    if isinstance(info.docstring, str):
+        # a plain string literal is in the encoding of the source
+        try:
+            info.docstring = info.docstring.decode('utf-8')
+        except UnicodeDecodeError:
+            info.docstring = info.docstring.decode('latin-1')
+    info.imports = imported_modules(tree)
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            info.functions.append(node.name)
+            if node.name == 'run_script':
+                info.has_run_script = True
+                scan_arguments(info, node)
+        elif isinstance(node, ast.ClassDef):
+            methods = [item.name for item in node.body
+                       if isinstance(item, ast.FunctionDef)]
+            info.classes.append((node.name, methods))
+        elif 'run_script' in bound_names(node):
+            # the last binding wins, as it would when the module runs
+            info.has_run_script = True
+            info.signature_known = False
+    return info
+
+
+def outline_html(script, info):
+    """
+    Return the HTML shown on the Info tab for a scanned script.
+    """
+    (script_dir, script_name) = os.path.split(script)
+    doc_string = info.docstring
+    if doc_string is None:
+        doc_string = "You Have no Docstring. You really should add one..."
+    else:
+        doc_string = doc_string.replace('\n', '<br>')
+    html = "<h4>%s</h4><h4>Doc String:</h4>%s" % (script, doc_string)
+    if info.error:
+        html += "<h4>Error:</h4>%s" % info.error
+
+    # classes and methods
+    html += "<h4>Classes and Methods for %s</h4><ul>" % script_name
+    for (cls, methods) in info.classes:
+        html += "<li>%s</li>" % cls
+        html += "<ul>"
+        for meth in methods:
+            html += "<li>%s</li>" % meth
+        html += "</ul>"
+    html += "</ul>"
+    html += "<h4>Functions in %s</h4><ul>" % script_name
+    for func in info.functions:
+        html += "<li>%s</li>" % func
+    html += "</ul>"
+    return html
+
+
+def scan_script(path):
+    """
+    Scan the script at path. Raises IOError if it cannot be read.
+    """
+    with open(path, 'rU') as script:
+        source = script.read()
+    return scan_source(source, path)
@@ -0,0 +1,134 @@
+"""
+Watch the registered scripts for changes made outside Script Runner
+
+ScriptRunner - A QGIS plugin that runs scripts to automate QGIS tasks.
+
+Date: 2026-10-18
+Copyright: (C) 2012-2026 by GeoApt LLC
+Email: gsherman@geoapt.com
+
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+"""
+import os
+
+from PyQt4.QtCore import *
+
+from metadata_cache import file_digest
+
+# milliseconds without further events before changes are looked at
+DEBOUNCE_INTERVAL = 400
+
+
+class ScriptWatcher(QObject):
+    """
+    Watch scripts and the directories holding them. Events are collected
+    until none has arrived for DEBOUNCE_INTERVAL, then each script
+    involved is hashed and script_changed is emitted only if its content
+    differs from the last hash seen. A save that writes a new file and
+    renames it over the old one fires several events and drops the file
+    from the watch list; watching the directory catches the rename and
+    the file is watched again.
+
+    script_missing is emitted once for a watched script that is gone
+    once events have settled. When it exists again, script_changed is
+    emitted whatever its content, as it may be restored unchanged.
+    """
+    script_changed = pyqtSignal(str)
+    script_missing = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        QObject.__init__(self, parent)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.file_event)
+        self.watcher.directoryChanged.connect(self.directory_event)
+        self.debounce = QTimer(self)
+        self.debounce.setSingleShot(True)
+        self.debounce.setInterval(DEBOUNCE_INTERVAL)
+        self.debounce.timeout.connect(self.settle)
+        # digest of each watched script; None until it is known
+        self.digests = dict()
+        self.changed = set()
+        # scripts reported through script_missing and not seen since
+        self.missing = set()
+
+    def add(self, script, digest=None):
+        """
+        Watch script. digest is the hash of its current content, if the
+        caller knows it; otherwise the first change is always reported.
+        """
+        script = unicode(script)
+        self.digests[script] = digest
+        self.watch(script)
+
+    def remove(self, script):
+        script = unicode(script)
+        self.digests.pop(script, None)
+        self.changed.discard(script)
+        self.missing.discard(script)
+        if script in self.watcher.files():
+            self.watcher.removePath(script)
+        directory = os.path.dirname(script)
+        if not [other for other in self.digests
+                if os.path.dirname(other) == directory]:
+            if directory in self.watcher.directories():
+                self.watcher.removePath(directory)
+
+    def watch(self, script):
+        if os.path.exists(script) and script not in self.watcher.files():
+            self.watcher.addPath(script)
+        directory = os.path.dirname(script)
+        if os.path.isdir(directory) and \
+                directory not in self.watcher.directories():
+            self.watcher.addPath(directory)
+
+    def file_event(self, path):
+        path = unicode(path)
+        if path in self.digests:
+            self.changed.add(path)
+            self.debounce.start()
+
+    def directory_event(self, path):
+        directory = unicode(path)
+        for script in self.digests:
+            if os.path.dirname(script) == directory:
+                # only a script that lost its watch (it was replaced or
+                # removed) needs a look; edits in place fire file_event
+                if script not in self.watcher.files():
+                    self.changed.add(script)
+                    self.debounce.start()
+
+    def refresh(self, script):
+        """
+        Hash script now and return True if its content changed since the
+        last hash.
+        """
+        script = unicode(script)
+        try:
+            digest = file_digest(script)
+        except (IOError, OSError):
+            return False
+        changed = digest != self.digests.get(script)
+        self.digests[script] = digest
+        return changed
+
+    def settle(self):
+        changed = self.changed
+        self.changed = set()
+        for script in sorted(changed):
+            if script not in self.digests:
+                continue
+            if not os.path.exists(script):
+                if script not in self.missing:
+                    self.missing.add(script)
+                    self.script_missing.emit(script)
+                continue
+            self.watch(script)
+            restored = script in self.missing
+            self.missing.discard(script)
+            if self.refresh(script) or restored:
+                self.script_changed.emit(script)
@@ -15,12 +15,15 @@ the Free Software Foundation; either version 2 of the License, or
 
 import sys
 import traceback
+import cProfile
+import pstats
 import os
 import platform
 import subprocess
-import re
 import inspect
 import datetime
+import sqlite3
+from functools import partial
 
 if platform.system() == 'Windows':
     import win32api
@@ -47,6 +50,63 @@ from scriptrunner_help import *
 from syntax import *
 # ars dialog
 from argsdialog import ArgsDialog
+# background execution of scripts
+from script_executor import ScriptExecutor
+from process_executor import ProcessExecutor
+# queue of script runs
+from run_queue import RunQueue, PRIORITY_NAMES, PRIORITY_NORMAL, \
+    FINISHED, FAILED, STOPPED
+from queue_panel import QueuePanel
+# asynchronous log writer
+from log_writer import LogWriter
+# per-run output archive
+from run_archive import RunArchive, RunRecording, STATUS_OK, \
+    STATUS_ERROR, STATUS_STOPPED
+from run_history_dialog import RunHistoryDialog
+from script_runtime import call_run_script
+
+from run_metrics import RunMetrics, completion_message
+# loads scripts by path under their own module names
+from script_loader import ScriptLoader
+# reads run_script and the script outline from source
+from script_scanner import scan_script
+# scanner results kept between sessions
+from metadata_cache import MetadataCache
+# checks the stored scripts in the background at startup
+from registry_loader import RegistryLoader
+# builds the Info and Source tabs in the background
+from info_loader import InfoLoader, PREFETCH_NEIGHBORS
+from large_source import LargeSourceView, LARGE_FILE_KB
+# notices scripts edited outside Script Runner
+from script_watcher import ScriptWatcher
+# reloads scripts with their helper modules
+from hot_reload import HotReloader
+# compiled scripts kept under the user profile
+from bytecode_cache import BytecodeCache, Precompiler
+# parameter sweeps run on a pool of headless workers
+from batch import write_summary
+from batch_dialog import BatchDialog
+from batch_pool import BatchPool
+from script_args import format_args
+# cProfile runs and the Profile tab
+from profile_stats import profile_rows, stats_path
+from profile_panel import ProfilePanel
+from sampling_profiler import SamplingProfiler, COLLAPSED_EXTENSION, \
+    DEFAULT_RATE, read_collapsed, sample_rows, write_collapsed
+from flamegraph import write_flamegraph
+from memory_profile import MemoryProfiler, MemoryReport, MEMORY_EXTENSION, \
+    memory_rows, memory_summary
+
+# milliseconds after the scripts are loaded before precompiling them
+PRECOMPILE_DELAY = 5000
+
+# archive status of a queued job from its final queue state
+QUEUE_STATUS = {FINISHED: STATUS_OK, FAILED: STATUS_ERROR,
+                STOPPED: STATUS_STOPPED}
+
+# file extension of the statistics saved by each kind of profiler
+PROFILE_EXTENSIONS = {'cprofile': '.pstats', 'sampling': COLLAPSED_EXTENSION,
+                      'memory': MEMORY_EXTENSION}
 
 # for remote pydev debug (remove prior to production)
 #import debug_settings
@@ -68,17 +128,20 @@ class ScriptRunner:
 
         self.settings = QSettings()
         self.fetch_settings()
-        if self.log_output:
-            # open the logfile using mode based on user preference
-
-            if self.log_overwrite:
-                mode = 'w'
-            else:
-                mode = 'a'
-
-            self.log_file = open(os.path.join(str(self.log_dir),
-                                              "scriptrunner.log"), mode)
+        self.log_writer = None
+        self.start_log_writer()
+        self.run_archive = None
+        self.open_run_archive()
+        # output of the runs in progress, archived by log_results
+        self.recordings = []
+        self.recording = None
+        self.queue_recordings = dict()
+        # (script, profiler, stats path) of a profiled background run
+        self.running_profile = None
+        # RunMetrics of the last run that finished
+        self.last_metrics = None
         self.last_args = ''
+        self.stdout_redirects = 0
 
         self.plugin_dir = QFileInfo(
             QgsApplication.qgisUserDbFilePath()).path() + \
@@ -139,6 +202,48 @@ class ScriptRunner:
         self.toolbar.addAction(self.run_action)
         self.run_action.triggered.connect(self.dispatch_script)
 
+        # action for running a script under cProfile
+        self.profile_action = QAction(
+            self.mw.style().standardIcon(QStyle.SP_FileDialogInfoView),
+            "Run with Profiler", self.mw)
+        self.toolbar.addAction(self.profile_action)
+        self.profile_action.triggered.connect(
+            lambda: self.dispatch_script(True))
+
+        # action for running a script under the memory profiler
+        self.memory_action = QAction(
+            self.mw.style().standardIcon(QStyle.SP_DriveHDIcon),
+            "Run with Memory Profile", self.mw)
+        self.toolbar.addAction(self.memory_action)
+        self.memory_action.triggered.connect(
+            lambda: self.dispatch_script('memory'))
+
+        # action for stopping a script running in the background
+        self.stop_action = QAction(
+            self.mw.style().standardIcon(QStyle.SP_MediaStop),
+            "Stop Script", self.mw)
+        self.toolbar.addAction(self.stop_action)
+        self.stop_action.triggered.connect(self.stop_script)
+        self.stop_action.setEnabled(False)
+
+        # action for adding the selected scripts to the run queue
+        self.enqueue_action = QAction(
+            self.mw.style().standardIcon(QStyle.SP_FileDialogDetailedView),
+            "Add Selected Scripts to Run Queue", self.mw)
+        self.toolbar.addAction(self.enqueue_action)
+        self.enqueue_action.triggered.connect(self.enqueue_scripts)
+
+        # action for running a script over a sweep of its arguments
+        self.batch_action = QAction(
+            self.mw.style().standardIcon(QStyle.SP_FileDialogListView),
+            "Run Batch...", self.mw)
+        self.toolbar.addAction(self.batch_action)
+        self.batch_action.triggered.connect(self.run_batch)
+
+        # action for browsing the archived output of past runs
+        self.history_action = QAction("Show Run History", self.mw)
+        self.history_action.triggered.connect(self.show_run_history)
+
         # action for running a script with arguments - deprecated
         #self.run_with_args_action = QAction(QIcon(":plugins/scriptrunner/run_args_icon"),
         #                                    "Run script with arguments", self.mw)
@@ -206,15 +311,26 @@ class ScriptRunner:
 
         self.scriptList = QListWidget()
         self.scriptList.setSortingEnabled(True)
+        # allow several scripts to be selected for the run queue
+        self.scriptList.setSelectionMode(QAbstractItemView.ExtendedSelection)
         # connect double click to info slot
         #self.scriptList.itemDoubleClicked.connect(self.item_info)
         self.scriptList.currentItemChanged.connect(self.current_script_changed)
         self.scriptList.customContextMenuRequested.connect(
             self.show_context_menu)
         self.scriptList.setContextMenuPolicy(Qt.CustomContextMenu)
+        # set up the run queue and its dock
+        self.setup_run_queue()
+
         ## Context menu for the scriptList
         self.context_menu = QMenu(self.scriptList)
         self.context_menu.addAction(self.run_action)
+        self.context_menu.addAction(self.profile_action)
+        self.context_menu.addAction(self.memory_action)
+        self.context_menu.addAction(self.stop_action)
+        self.context_menu.addAction(self.enqueue_action)
+        self.context_menu.addAction(self.batch_action)
+        self.context_menu.addAction(self.history_action)
         #self.context_menu.addAction(self.run_with_args_action)
         self.context_menu.addAction(self.remove_action)
         self.context_menu.addAction(self.reload_action)
@@ -224,6 +340,7 @@ class ScriptRunner:
         self.context_menu.addSeparator()
         self.context_menu.addAction(self.clear_action)
         self.context_menu.addAction(self.toggle_console_action)
+        self.context_menu.addAction(self.queue_dock.toggleViewAction())
 
         self.splitter.addWidget(self.scriptList)
 
@@ -234,7 +351,12 @@ class ScriptRunner:
 
         self.textBrowserSource = QTextBrowser()
         self.tabWidget.addTab(self.textBrowserSource, "Source")
-        highlighter = PythonHighlighter(self.textBrowserSource.document())
+        self.source_highlighter = PythonHighlighter(
+            self.textBrowserSource.document())
+
+        self.profile_panel = ProfilePanel()
+        self.profile_panel.location_selected.connect(self.show_source_line)
+        self.tabWidget.addTab(self.profile_panel, "Profile")
 
         self.textBrowserAbout = QTextBrowser()
         self.textBrowserAbout.setHtml(htmlabout())
@@ -244,6 +366,8 @@ class ScriptRunner:
         self.tabWidget.setMinimumHeight(320)
 
         self.splitter.addWidget(self.tabWidget)
+        # the Source tab is only filled in when it is shown
+        self.tabWidget.currentChanged.connect(self.tab_changed)
         # set the sizes for the splitter
         split_size = [150, 350]
         self.splitter.setSizes(split_size)
@@ -252,6 +376,10 @@ class ScriptRunner:
         self.stdout_dock = QDockWidget(self.mw)
         self.stdout_dock.setWindowTitle("Script Runner - Output Console")
         self.stdout_textedit = StdoutTextEdit()
+        self.stdout_textedit.new_output.connect(self.output_posted)
+        if self.log_writer is not None and self.log_writer.error:
+            # it failed before there was a console to report it
+            self.stdout_textedit.write("%s\n" % self.log_writer.error, True)
         self.stdout_dock.setWidget(self.stdout_textedit)
         self.mw.addDockWidget(Qt.BottomDockWidgetArea, self.stdout_dock)
 
@@ -261,47 +389,186 @@ class ScriptRunner:
 
         self.configure_console()
 
+        # executor used when scripts run in the background
+        self.executor = ScriptExecutor(1, self.mw)
+        self.executor.job_finished.connect(self.background_script_finished)
+        self.executor.job_failed.connect(self.background_script_failed)
+        self.executor.job_stopped.connect(self.background_script_stopped)
+        # executor used when scripts run in a separate process
+        self.process_executor = ProcessExecutor(self.host_python, self.mw)
+        self.process_executor.job_finished.connect(
+            self.background_script_finished)
+        self.process_executor.job_failed.connect(
+            self.background_script_failed)
+        self.process_executor.job_stopped.connect(
+            self.background_script_stopped)
+        self.process_executor.output.connect(self.process_output)
+        # worker pool for batches, with its progress in the status bar
+        self.batch_pool = BatchPool(self.host_python, self.mw)
+        self.batch_pool.run_finished.connect(self.batch_run_finished)
+        self.batch_pool.progress.connect(self.batch_progress)
+        self.batch_pool.finished.connect(self.batch_finished)
+        self.batch_progress_bar = QProgressBar()
+        self.batch_progress_bar.setMaximumWidth(200)
+        self.batch_progress_bar.setVisible(False)
+        self.batch_stop_button = QToolButton()
+        self.batch_stop_button.setIcon(
+            self.mw.style().standardIcon(QStyle.SP_MediaStop))
+        self.batch_stop_button.setToolTip("Stop Batch")
+        self.batch_stop_button.setVisible(False)
+        self.batch_stop_button.clicked.connect(self.batch_pool.stop)
+        self.main_window.statusbar.addPermanentWidget(
+            self.batch_progress_bar)
+        self.main_window.statusbar.addPermanentWidget(
+            self.batch_stop_button)
+        # timer to keep the status bar current during a background run
+        self.run_timer = QTimer(self.mw)
+        self.run_timer.setInterval(1000)
+        self.run_timer.timeout.connect(self.update_run_status)
+
+        self.open_metadata_cache()
+        self.open_bytecode_cache()
+        # the page shown on the Info tab, and the one whose source the
+        # Source tab holds
+        self.info_page = None
+        self.source_page = None
+        self.info_loader = InfoLoader(self.metadata, self.mw)
+        self.info_loader.set_large_file_size(self.large_file_kb * 1024)
+        self.info_loader.page_ready.connect(self.show_page)
+        self.info_loader.page_failed.connect(self.page_failed)
+        # shows scripts over the large file size on the Source tab
+        self.large_source = LargeSourceView(self.textBrowserSource, self.mw)
+        self.script_watcher = ScriptWatcher(self.mw)
+        self.script_watcher.script_changed.connect(self.script_file_changed)
+        self.script_watcher.script_missing.connect(self.script_file_missing)
+
         if len(self.list_of_scripts) == 0:
             # make the help tab visible if no scripts are loaded
-            self.tabWidget.setCurrentIndex(2)
+            self.tabWidget.setCurrentWidget(self.textBrowserAbout)
         else:
-            pop_list = []
             # add the list of scripts fetched from settings
-            for script in self.list_of_scripts:
-                if os.path.exists(script):
-                    full_path = script
-                    (script_dir, script_name) = os.path.split(full_path)
-                    (has_run_method, uses_args) = self.have_run_method(full_path)
-                    if has_run_method:
-                        if uses_args:
-                            script_name += '**'
-                        item = QListWidgetItem(script_name, self.scriptList)
-                        item.setToolTip(script)
-                    else:
-                        self.stdout_textedit.write(
-                            "WARNING: Script %s is missing the run_script method"
-                            "---not loaded\n" % full_path, True)
-                else:
-                    self.stdout_textedit.write(
-                        "WARNING: Your previously loaded script %s does not exist "
-                        "and cannot be loaded. It will be removed from your "
-                        "list of stored scripts.\n" % script, True)
-                    pop_list.append(script)
-            for script in pop_list:
-                #self.stdout_textedit.write("Removed %s from the list of "
-                #  "loaded scripts.\n" % script)
-                self.list_of_scripts.pop(
-                   self.list_of_scripts.index(script))
-                self.update_settings()
-
-            self.stdout_textedit.ensureCursorVisible()
+            self.load_registry()
 
         self.scriptList.setCurrentRow(0)
 
+    def load_registry(self):
+        """
+        List the stored scripts at once, disabled until they are checked,
+        and check them in the background. Each item is filled in as its
+        script answers.
+        """
+        self.loading_items = dict()
+        self.missing_scripts = []
+        for script in self.list_of_scripts:
+            (script_dir, script_name) = os.path.split(script)
+            item = QListWidgetItem("%s (loading)" % script_name,
+                                   self.scriptList)
+            item.setToolTip(script)
+            item.setFlags(item.flags() & ~Qt.ItemIsEnabled)
+            self.loading_items[unicode(script)] = item
+        self.registry_loader = RegistryLoader(self.metadata, parent=self.mw)
+        self.registry_loader.script_loaded.connect(
+            self.registry_script_loaded)
+        self.registry_loader.script_missing.connect(
+            self.registry_script_missing)
+        self.registry_loader.script_failed.connect(
+            self.registry_script_failed)
+        self.registry_loader.script_timed_out.connect(
+            self.registry_script_timed_out)
+        self.registry_loader.finished.connect(self.registry_loaded)
+        self.registry_loader.load(self.list_of_scripts)
+
+    def registry_script_loaded(self, script, script_info):
+        item = self.loading_items.pop(unicode(script), None)
+        if item is None:
+            return
+        (script_dir, script_name) = os.path.split(unicode(script))
+        if script_info.error:
+            # keep it listed so it can be fixed and reloaded
+            self.stdout_textedit.write(
+                "WARNING: Script %s has an error: %s\n" %
+                (script, script_info.error), True)
+        if script_info.has_run_script or script_info.error:
+            if script_info.uses_args():
+                script_name += '**'
+            item.setText(script_name)
+            item.setFlags(item.flags() | Qt.ItemIsEnabled)
+            self.script_watcher.add(script, self.cached_digest(script))
+            if item is self.scriptList.currentItem():
+                self.current_script_changed()
+        else:
+            self.stdout_textedit.write(
+                "WARNING: Script %s is missing the run_script method"
+                "---not loaded\n" % script, True)
+            self.scriptList.takeItem(self.scriptList.row(item))
+
+    def registry_script_missing(self, script):
+        self.stdout_textedit.write(
+            "WARNING: Your previously loaded script %s does not exist "
+            "and cannot be loaded. It will be removed from your "
+            "list of stored scripts.\n" % script, True)
+        item = self.loading_items.pop(unicode(script), None)
+        if item is not None:
+            self.scriptList.takeItem(self.scriptList.row(item))
+        self.missing_scripts.append(script)
+        if self.registry_loader.done:
+            # it timed out before; registry_loaded has already run
+            self.remove_missing_scripts()
+
+    def registry_script_failed(self, script, tb_text):
+        self.stdout_textedit.write(
+            "WARNING: Script %s could not be read:\n%s" % (script, tb_text),
+            True)
+        self.registry_script_unavailable(script)
+
+    def registry_script_timed_out(self, script):
+        self.stdout_textedit.write(
+            "WARNING: Script %s did not answer in time. It will be listed "
+            "if it becomes available.\n" % script, True)
+        self.registry_script_unavailable(script)
+
+    def registry_script_unavailable(self, script):
+        item = self.loading_items.get(unicode(script))
+        if item is not None:
+            (script_dir, script_name) = os.path.split(unicode(script))
+            item.setText("%s (unavailable)" % script_name)
+
+    def registry_loaded(self):
+        """
+        All stored scripts have answered or timed out. Missing ones are
+        removed from the settings in one write.
+        """
+        self.remove_missing_scripts()
+        self.stdout_textedit.ensureCursorVisible()
+        self.flush_metadata_cache()
+        # compile the scripts once QGIS has settled down
+        QTimer.singleShot(PRECOMPILE_DELAY, self.start_precompile)
+
+    def remove_missing_scripts(self):
+        if self.missing_scripts:
+            for script in self.missing_scripts:
+                if script in self.list_of_scripts:
+                    self.list_of_scripts.remove(script)
+            self.missing_scripts = []
+            self.update_settings()
+
     def unload(self):
         """
         Cleanup the QGIS GUI by removing the plugin menu item and icon.
         """
+        self.executor.stop()
+        self.process_executor.stop()
+        self.batch_pool.stop()
+        self.run_queue.cancel_pending()
+        self.stop_queued_jobs()
+        self.stop_log_writer()
+        self.close_run_archive()
+        self.info_loader.stop()
+        self.info_loader.metadata = None
+        self.large_source.stop()
+        self.close_metadata_cache()
+        if self.precompiler is not None:
+            self.precompiler.stop()
         self.iface.removePluginMenu("&ScriptRunner", self.action)
         self.iface.removeToolBarIcon(self.action)
 
@@ -328,16 +595,24 @@ class ScriptRunner:
         Add a script to the list of scripts that can be executed.
         """
         # check to see if we have a run method without importing the script
-        run_method_check = self.have_run_method(script)
-        if run_method_check[0]:  # self.have_run_method(script):
+        script_info = self.script_info(script)
+        if script_info.error:
+            QMessageBox.information(
+                None, "Error",
+                "Your script could not be read:\n%s\n"
+                "Adding the script failed." % script_info.error)
+            self.main_window.statusbar.showMessage(
+                "Failed to add: %s - %s" % (script, script_info.error))
+        elif script_info.has_run_script:
             (script_dir, script_name) = os.path.split(str(script))
-            if run_method_check[1]:
+            if script_info.uses_args():
                 script_name += '**'
             item = QListWidgetItem(script_name, self.scriptList)
             item.setToolTip(script)
             self.main_window.statusbar.showMessage(
                 "Added script: %s" % script)
             self.list_of_scripts.append(script)
+            self.script_watcher.add(script, self.cached_digest(script))
             self.update_settings()
 
         else:
@@ -363,6 +638,7 @@ class ScriptRunner:
                 self.list_of_scripts.pop(
                     self.list_of_scripts.index(item.toolTip()))
                 self.update_settings()
+                self.script_watcher.remove(item.toolTip())
                 self.scriptList.takeItem(self.scriptList.currentRow())
 
 
@@ -376,19 +652,25 @@ class ScriptRunner:
                 script = item.toolTip()
                 (script_dir, script_name) = os.path.split(str(script))
                 (user_module, ext) = os.path.splitext(script_name)
-                if user_module in sys.modules:
-                    reload(sys.modules[user_module])
+                # reloads what changed in the script and its helpers
+                report = self.hot_reloader.reload_script(script)
+                if report is not None:
+                    self.report_reload(script_name, report)
                     self.main_window.statusbar.showMessage(
                         "Reloaded script: %s" % script)
-                    (has_run_method, uses_args) = self.have_run_method(script)
-                    if has_run_method:
+                    if not self.script_watcher.refresh(script):
+                        # unchanged since the list and tabs were updated
+                        return
+                    script_info = self.script_info(script)
+                    if script_info.has_run_script:
                         # set state of the run with args button
                         #self.run_with_args_action.setEnabled(uses_args)
-                        if uses_args:
+                        if script_info.uses_args():
                             # has keyword args: add ** to the name
                             item.setText("%s**" % script_name)
                         else:
                             item.setText(script_name)
+                        self.info_loader.invalidate(script)
                         self.info()
                     else:
                         QMessageBox.warning(
@@ -406,117 +688,265 @@ class ScriptRunner:
                   "There was an error reloading %s because of the following error :\n%s" % (script, str(e)))
 
 
+    def report_reload(self, script_name, report):
+        """
+        Write the modules reloaded for a script to the console.
+        """
+        if not report:
+            self.stdout_textedit.write(
+                "Reload %s: nothing changed\n" % script_name)
+            return
+        total = 0.0
+        for (name, seconds) in report:
+            self.stdout_textedit.write(
+                "Reloaded %s (%.1f ms)\n" % (name, seconds * 1000))
+            total += seconds
+        self.stdout_textedit.write(
+            "Reload %s: %d module(s) in %.1f ms\n" %
+            (script_name, len(report), total * 1000))
+
+    def script_item(self, script):
+        """
+        Return the list item of script, or None.
+        """
+        for row in range(self.scriptList.count()):
+            item = self.scriptList.item(row)
+            if unicode(item.toolTip()) == unicode(script):
+                return item
+        return None
+
+    def cached_digest(self, script):
+        """
+        Return the content hash of script recorded in the metadata cache,
+        or None.
+        """
+        if self.metadata is not None:
+            try:
+                entry = self.metadata.entry(script)
+            except sqlite3.Error:
+                entry = None
+            if entry is not None:
+                return entry[2]
+        return None
+
+    def script_file_changed(self, script):
+        """
+        A script's content changed on disk: rescan it and refresh its
+        list entry, and the Info and Source tabs if it is selected.
+        """
+        item = self.script_item(script)
+        if item is None or not item.flags() & Qt.ItemIsEnabled:
+            return
+        script_info = self.script_info(script)
+        (script_dir, script_name) = os.path.split(unicode(script))
+        if script_info.uses_args():
+            script_name += '**'
+        item.setText(script_name)
+        self.info_loader.invalidate(script)
+        if item is self.scriptList.currentItem():
+            self.info()
+        self.main_window.statusbar.showMessage(
+            "Script changed on disk: %s" % script)
+
+    def script_file_missing(self, script):
+        item = self.script_item(script)
+        if item is not None:
+            (script_dir, script_name) = os.path.split(unicode(script))
+            item.setText("%s (missing)" % script_name)
+        self.stdout_textedit.write(
+            "WARNING: Script %s was removed or renamed\n" % script, True)
+
     def info(self):
         """
         Display information about the script, including the docstring,
-        classes, methods, and functions.
+        classes, methods, and functions. The script is scanned, not
+        imported, on a worker thread; show_page displays the result.
         """
         item = self.scriptList.currentItem()
         if item is not None:  # in case no currentitem and none was passed
-            try:
-                script = item.toolTip()
-                (script_dir, script_name) = os.path.split(str(script))
-                (user_module, ext) = os.path.splitext(script_name)
-                if script_dir not in sys.path:
-                    sys.path.append(script_dir)
-                if not user_module in sys.modules:
-                    __import__(user_module)
-
-                # add the doc string to the info page
-                doc_string = inspect.getdoc(sys.modules[user_module])
-                if doc_string is None:
-                    doc_string = \
-                        "You Have no Docstring. You really should add one..."
-                else:
-                    doc_string = doc_string.replace('\n', '<br>')
-                html = "<h4>%s</h4><h4>Doc String:</h4>%s" % (script, doc_string)
-
-                # populate the source tab
-                highlighter = PythonHighlighter(self.textBrowserSource.document())
-                source = self.get_source(script)
-                if source:
-                    self.textBrowserSource.setPlainText(self.get_source(script))
-                    #self.textBrowserSource.setHtml(self.get_source(script)) - deprecated
-
-                    classes = inspect.getmembers(
-                        sys.modules[user_module], inspect.isclass)
-
-                    # populate classes and methdods
-
-                    html += "<h4>Classes and Methods for %s</h4><ul>" % script_name
-
-                    for cls in classes:
-                        modinfo = inspect.getmodule(cls[1])
-                        if modinfo:
-                            if modinfo.__name__ == user_module:
-                                html += "<li>%s</li>" % cls[0]
-                                html += "<ul>"
-                                for meth in inspect.getmembers(cls[1],
-                                                               inspect.ismethod):
-                                    html += "<li>%s</li>" % meth[0]
-                                html += "</ul></ul>"
-                    functions = inspect.getmembers(
-                        sys.modules[user_module], inspect.isfunction)
-                    html += "<h4>Functions in %s</h4><ul>" % script_name
-                    for func in functions:
-                        modinfo = inspect.getmodule(func[1])
-                        if modinfo.__name__ == user_module:
-                            html += "<li>%s</li>" % func[0]
-                    html += "</ul>"
-
-                    self.textBrowser.setHtml(html)
-                    #self.tabWidget.setCurrentIndex(0)
-                else:
-                    QMessageBox.warning(
-                            None,
-                            "%s is Missing" % script,
-                            "The script %s has disappeared. Perhaps it was "
-                            "moved or deleted?" % script)
-            except Exception as e:
-                QMessageBox.warning(None, "Error Fetching Script Info",
-                  "There was an error getting the information for %s because of the following error :\n%s" % (script, str(e)))
+            self.info_loader.load(item.toolTip())
 
+    def neighbor_scripts(self, item):
+        """
+        Return the scripts listed next to item, nearest first, to be
+        loaded ahead of time.
+        """
+        row = self.scriptList.row(item)
+        scripts = []
+        for offset in range(1, PREFETCH_NEIGHBORS + 1):
+            for neighbor in (row + offset, row - offset):
+                other = self.scriptList.item(neighbor)
+                if other is not None and other.flags() & Qt.ItemIsEnabled:
+                    scripts.append(other.toolTip())
+        return scripts
+
+    def show_page(self, page):
+        """
+        Show an InfoPage on the Info tab, and on the Source tab if that
+        is the one showing, unless the selection has moved on.
+        """
+        item = self.scriptList.currentItem()
+        if item is None or unicode(item.toolTip()) != page.script:
+            return
+        if page is not self.info_page:
+            self.info_page = page
+            self.textBrowser.setHtml(page.html)
+        if self.tabWidget.currentWidget() is self.textBrowserSource:
+            self.show_source()
+
+    def show_source(self):
+        """
+        Fill the Source tab with the source of the page shown, unless it
+        already holds it. A large script is loaded in chunks without the
+        highlighter, which would format the whole document at once.
+        """
+        page = self.info_page
+        if page is None or self.source_page is page:
+            return
+        self.source_page = page
+        if page.large:
+            self.source_highlighter.setDocument(None)
+            try:
+                self.large_source.show(page.script)
+            except (IOError, OSError, ValueError) as e:
+                self.textBrowserSource.setPlainText(
+                    "The source of %s could not be read: %s" %
+                    (page.script, e))
+            return
+        self.large_source.stop()
+        self.textBrowserSource.setPlainText(page.source)
+        if self.source_highlighter.document() is None:
+            self.source_highlighter.setDocument(
+                self.textBrowserSource.document())
+
+    def clear_info(self):
+        self.info_page = None
+        self.source_page = None
+        self.large_source.stop()
+        self.textBrowserSource.setPlainText('')
+        self.textBrowser.setPlainText('')
+
+    def tab_changed(self, index):
+        if self.tabWidget.widget(index) is self.textBrowserSource:
+            self.show_source()
+
+    def page_failed(self, script, tb_text):
+        item = self.scriptList.currentItem()
+        if item is None or unicode(item.toolTip()) != unicode(script):
+            return
+        if not os.path.exists(unicode(script)):
+            QMessageBox.warning(
+                    None,
+                    "%s is Missing" % script,
+                    "The script %s has disappeared. Perhaps it was "
+                    "moved or deleted?" % script)
+        else:
+            error = tb_text.strip().splitlines()[-1]
+            QMessageBox.warning(None, "Error Fetching Script Info",
+              "There was an error getting the information for %s because of the following error :\n%s" % (script, error))
 
-    def get_source(self, script):
+    def open_metadata_cache(self):
+        """
+        Open the cache of scanned scripts in the QGIS settings directory.
+        Without it scripts are scanned each time they are needed.
+        """
         try:
-            src = open(script, 'r')
-            source = src.read()
-            src.close()
-            return source
-        except:
-            return None
+            self.metadata = MetadataCache(os.path.join(
+                unicode(QgsApplication.qgisSettingsDirPath()),
+                "scriptrunner", "metadata.sqlite"))
+        except (OSError, sqlite3.Error):
+            self.metadata = None
+            print traceback.format_exc()
+
+    def open_bytecode_cache(self):
+        """
+        Open the cache of compiled scripts in the QGIS settings directory.
+        """
+        self.precompiler = None
+        try:
+            self.bytecode_cache = BytecodeCache(os.path.join(
+                unicode(QgsApplication.qgisSettingsDirPath()),
+                "scriptrunner", "bytecode"))
+        except OSError:
+            self.bytecode_cache = None
+            print traceback.format_exc()
+        self.script_loader = ScriptLoader(self.bytecode_cache,
+                                          self.fresh_namespace)
+        self.hot_reloader = HotReloader(self.script_loader)
+
+    def start_precompile(self):
+        """
+        Compile the registered scripts into the bytecode cache on a
+        background thread, so their first run skips compiling them.
+        """
+        if self.bytecode_cache is None or self.precompiler is not None:
+            return
+        self.precompiler = Precompiler(self.bytecode_cache,
+                                       self.list_of_scripts)
+        self.precompiler.start()
+
+    def flush_metadata_cache(self):
+        if self.metadata is not None:
+            try:
+                self.metadata.flush()
+                self.metadata.prune()
+            except sqlite3.Error:
+                print traceback.format_exc()
 
-    def dispatch_script(self):
+    def close_metadata_cache(self):
+        if self.metadata is not None:
+            self.flush_metadata_cache()
+            self.metadata.close()
+            self.metadata = None
+
+    def script_info(self, script):
+        """
+        Return the ScriptInfo for script, from the metadata cache when it
+        is still valid.
+        """
+        if self.metadata is not None:
+            try:
+                return self.metadata.scan(script)
+            except sqlite3.Error:
+                # e.g. the cache is locked by another QGIS
+                pass
+        return scan_script(script)
+
+    def dispatch_script(self, profile=False):
+        if self.executor.is_busy() or self.process_executor.is_busy():
+            # one background run at a time; its state is in self
+            return
         item = self.scriptList.currentItem()
-        if item is not None:
-            script = str(item.text())
-            if script[-2:] == '**':
-                self.run_with_args()
+        # scripts still being loaded are disabled
+        if item is not None and item.flags() & Qt.ItemIsEnabled:
+            # scan again; the script may have changed since it was listed
+            script_info = self.script_info(item.toolTip())
+            if script_info.may_use_args():
+                self.run_with_args(profile)
             else:
-                self.run_script(None)
+                self.run_script(None, profile)
 
-    def run_with_args(self):
+    def run_with_args(self, profile=False):
         # get the args
         script_args = self.get_script_args()
         #print "script args:"
         #print script_args
 
         if script_args is not None:
-            args_dlg = ArgsDialog(self.get_script_args(), self.script_name())
-            args = args_dlg.show_dialog()
+            args = self.ask_script_args(
+                self.scriptList.currentItem().toolTip(), script_args)
             if args is not None:
-                self.run_script(args)
-        else:  # this else block is probably unreachable
-            args = None
-            QMessageBox.information(
-                None,
-                "No Arguments",
-                "Your script accepts no arguments. "
-                "Use the Run Script button to run it.")
+                self.run_script(args, profile)
+        else:
+            # run_script turned out to take only iface
+            self.run_script(None, profile)
 
-    def run_script(self, user_args):
+    def run_script(self, user_args, profile=False):
         """
-        Run the currently selected script.
+        Run the currently selected script, under the profiler chosen in
+        the preferences if profile is set, or the memory profiler if it
+        is 'memory'. With sampling of every run turned on, other runs are
+        sampled.
         """
         # get the selected item from the list
         item = self.scriptList.currentItem()
@@ -526,62 +956,633 @@ class ScriptRunner:
             self.main_window.statusbar.showMessage(
                 "Running script: %s" % script)
 
-            # get the path and add it to sys.path
             (script_dir, script_name) = os.path.split(str(script))
 
-            if script_dir not in sys.path:
-                sys.path.append(script_dir)
-            (user_module, ext) = os.path.splitext(script_name)
-
-            user_script = __import__(user_module)
+            profiler_kind = self.profiler_for_run(profile)
+            if self.run_mode == 'process':
+                # the script is never imported into the QGIS process
+                profile_path = None
+                if profiler_kind is not None:
+                    try:
+                        profile_path = self.profile_path(
+                            script, PROFILE_EXTENSIONS[profiler_kind])
+                    except OSError:
+                        print traceback.format_exc()
+                        return
+                    self.running_profile = (script, None, profile_path,
+                                            profile)
+                self.recording = self.start_recording(script, user_args)
+                self.run_in_process(script, script_name, script_dir,
+                                    user_args, profile_path, profiler_kind)
+                return
+
+            user_script = self.import_script(script)
+            profiler = None
+            if profiler_kind == 'sampling':
+                profiler = SamplingProfiler(self.sample_rate)
+            elif profiler_kind == 'memory':
+                profiler = MemoryProfiler(script)
+            elif profiler_kind is not None:
+                profiler = cProfile.Profile()
+
+            if self.run_mode == 'thread':
+                if profiler is not None:
+                    self.running_profile = (script, profiler, None, profile)
+                self.recording = self.start_recording(script, user_args)
+                self.run_in_thread(user_script, script_name, script_dir,
+                                   user_args, profiler)
+                return
 
-            abnormal_exit = False
             self.last_traceback = ''
+            recording = self.start_recording(script, user_args)
+            metrics = recording.metrics = RunMetrics()
+            status = STATUS_OK
             try:
                 # grab stdout
-                self.old_stdout = sys.stdout
-                sys.stdout = self.stdout
-                if self.clear_console:
-                    self.stdout.setPlainText('')
+                self.redirect_stdout()
                 print "----------%s----------" % datetime.datetime.now()
                 print "Running %s in: %s" % (script_name, script_dir)
-                #print user_args  # for debug
-                #print type(user_args)
-                if type(user_args) is not dict:
-                    user_script.run_script(self.iface)
+                if profiler is not None:
+                    metrics.measure(profiler.runcall, call_run_script,
+                                    user_script, self.iface, user_args)
                 else:
-                    func = "user_script.run_script(self.iface, "
-                    #func += ",' ".join(user_args['args'])
-                    for ar in user_args['args']:
-                        func += "%s, " % ar
-                    func = func[:-2]
-                    if user_args['keywords'] is not None:
-                        kwlist = "dict(%s)" % user_args['keywords']
-                        kwargs = eval(kwlist)
-                        func += ", **kwargs)"
-                    else:
-                        func += ")"
-                    #print "func is %s" % func
-                    exec(func)
+                    metrics.measure(call_run_script, user_script,
+                                    self.iface, user_args)
             except:
-                # show traceback
-                tb = TracebackDialog()
-                tb.ui.teTraceback.setTextColor(QColor(Qt.red))
-                self.last_traceback = traceback.format_exc()
-                tb.ui.teTraceback.setText(traceback.format_exc())
-                tb.show()
-                tb.exec_()
-                abnormal_exit = True
-                print "\n%s\nAbnormal termination" % self.last_traceback
-                #QMessageBox.information(None, "Error", traceback.format_exc())
+                status = STATUS_ERROR
+                self.report_traceback(traceback.format_exc())
             finally:
-                print "Completed script: %s" % script_name
-                sys.stdout = self.old_stdout
-                if self.log_output:
-                    self.log_file.flush()
+                print completion_message(script_name, metrics)
+                self.restore_stdout()
+                self.log_results(recording, status)
+            self.last_metrics = metrics
+            if profiler is not None:
+                self.show_profile(script, profiler, select=profile)
 
             self.main_window.statusbar.showMessage(
-                "Completed script: %s" % script_name)
+                completion_message(script_name, metrics, brief=True))
+
+    def run_in_thread(self, user_script, script_name, script_dir, user_args,
+                      profiler=None):
+        """
+        Run the script on a worker thread, under profiler if one is
+        given. Completion is reported through the executor signals.
+        """
+        self.last_traceback = ''
+        self.redirect_stdout()
+        print "----------%s----------" % datetime.datetime.now()
+        print "Running %s in: %s (background)" % (script_name, script_dir)
+        self.running_script = script_name
+        self.run_started = datetime.datetime.now()
+        # measured on the worker thread; QGIS keeps the GUI thread busy
+        metrics = self.recording.metrics = RunMetrics(per_thread=True)
+        if profiler is not None:
+            self.executor.submit(metrics.measure, profiler.runcall,
+                                 call_run_script, user_script, self.iface,
+                                 user_args)
+        else:
+            self.executor.submit(metrics.measure, call_run_script,
+                                 user_script, self.iface, user_args)
+        self.start_background_run()
+
+    def run_in_process(self, script, script_name, script_dir, user_args,
+                       profile_path=None, profiler_kind=None):
+        """
+        Run the script in a child process with a headless QGIS. Output
+        of the child is streamed to the console as it arrives. If
+        profile_path is given the child profiles the run with the
+        profiler_kind of profiler_for_run and saves the statistics
+        there.
+        """
+        self.last_traceback = ''
+        self.redirect_stdout()
+        print "----------%s----------" % datetime.datetime.now()
+        print "Running %s in: %s (separate process)" % (script_name,
+                                                         script_dir)
+        self.running_script = script_name
+        sample_rate = None
+        if profiler_kind == 'sampling':
+            sample_rate = self.sample_rate
+        self.process_executor.submit(script, user_args, profile_path,
+                                     sample_rate, profiler_kind == 'memory')
+        self.start_background_run()
+
+    def start_background_run(self):
+        self.run_started = datetime.datetime.now()
+        self.set_run_actions_enabled(False)
+        self.stop_action.setEnabled(True)
+        self.run_timer.start()
+        self.update_run_status()
+
+    def set_run_actions_enabled(self, enabled):
+        for action in (self.run_action, self.profile_action,
+                       self.memory_action):
+            action.setEnabled(enabled)
+
+    def process_output(self, job_id, text, is_stderr):
+        self.stdout.write(text, is_stderr)
+
+    def stop_script(self):
+        """
+        Stop the script running in the background or in a separate
+        process.
+        """
+        if self.executor.is_busy() or self.process_executor.is_busy():
+            self.main_window.statusbar.showMessage(
+                "Stopping script: %s" % self.running_script)
+            self.executor.stop()
+            self.process_executor.stop()
+
+    def update_run_status(self):
+        elapsed = datetime.datetime.now() - self.run_started
+        self.main_window.statusbar.showMessage(
+            "Running script: %s (%s elapsed)" %
+            (self.running_script, str(elapsed).split('.')[0]))
+
+    def background_script_finished(self, job_id):
+        self.end_background_run(STATUS_OK, job_id)
+
+    def background_script_failed(self, job_id, tb_text):
+        self.report_traceback(tb_text)
+        self.end_background_run(STATUS_ERROR, job_id)
+
+    def background_script_stopped(self, job_id):
+        print "\nScript stopped by user"
+        self.end_background_run(STATUS_STOPPED, job_id)
+
+    def end_background_run(self, status, job_id):
+        self.run_timer.stop()
+        metrics = self.recording.metrics
+        if metrics is None:
+            # measured by the script host process
+            metrics = self.recording.metrics = \
+                self.process_executor.take_metrics(job_id)
+        print completion_message(self.running_script, metrics)
+        self.restore_stdout()
+        self.log_results(self.recording, status)
+        self.recording = None
+        self.last_metrics = metrics
+        self.set_run_actions_enabled(True)
+        self.stop_action.setEnabled(False)
+        self.main_window.statusbar.showMessage(
+            completion_message(self.running_script, metrics, brief=True))
+        if self.running_profile is not None:
+            (script, profiler, path, select) = self.running_profile
+            self.running_profile = None
+            self.show_profile(script, profiler, path, select)
+
+    def profiler_for_run(self, profile):
+        """
+        Return the profiler a run is made under: 'memory' for Run with
+        Memory Profile, the one chosen in the preferences ('cprofile' or
+        'sampling') for Run with Profiler, 'sampling' for other runs if
+        every run is sampled, else None.
+        """
+        if profile == 'memory':
+            return 'memory'
+        if profile:
+            return self.profiler
+        if self.sample_all_runs:
+            return 'sampling'
+        return None
+
+    def profile_path(self, script, extension='.pstats'):
+        """
+        Return a new path, ending in extension (see PROFILE_EXTENSIONS),
+        for the profile statistics of a run of script: in the log
+        directory, next to the log, when logging to disk, otherwise under
+        the QGIS settings directory.
+        """
+        if self.log_output and self.log_dir:
+            directory = unicode(self.log_dir)
+        else:
+            directory = os.path.join(
+                unicode(QgsApplication.qgisSettingsDirPath()),
+                "scriptrunner", "profiles")
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        return stats_path(directory, script, datetime.datetime.now(),
+                          extension)
+
+    def show_profile(self, script, profiler=None, path=None, select=True):
+        """
+        Show the profile of a run in the Profile tab, switching to it if
+        select is set, and save its statistics. The statistics come from
+        profiler or, for a run in a separate process, from the file the
+        child saved at path.
+        """
+        if isinstance(profiler, SamplingProfiler) or \
+                (profiler is None and path.endswith(COLLAPSED_EXTENSION)):
+            self.show_samples(script, profiler, path, select)
+            return
+        if isinstance(profiler, MemoryProfiler) or \
+                (profiler is None and path.endswith(MEMORY_EXTENSION)):
+            self.show_memory(script, profiler, path, select)
+            return
+        stats = None
+        try:
+            if profiler is not None:
+                stats = pstats.Stats(profiler)
+                path = self.profile_path(script)
+                stats.dump_stats(path)
+            else:
+                stats = pstats.Stats(path)
+        except (IOError, OSError, EOFError, ValueError, TypeError):
+            if stats is None:
+                # nothing was recorded, or the child did not get as far
+                # as saving it
+                self.stdout_textedit.write(
+                    "No profile was recorded for %s\n" % script, True)
+                return
+            # shown even though it could not be saved
+            self.stdout_textedit.write(traceback.format_exc(), True)
+            path = None
+        self.profile_panel.show_profile(script, profile_rows(stats),
+                                        stats.total_tt, path)
+        if select:
+            self.tabWidget.setCurrentWidget(self.profile_panel)
+        if path is not None:
+            self.stdout_textedit.write("Profile saved to %s\n" % path)
+
+    def show_samples(self, script, profiler=None, path=None, select=True):
+        """
+        Show the hottest frames of a sampled run in the Profile tab and
+        write its collapsed stacks and flame graph. The stacks come from
+        profiler or, for a run in a separate process, from the file the
+        child saved at path.
+        """
+        try:
+            if profiler is not None:
+                stacks = profiler.stacks
+                rate = profiler.rate
+            else:
+                stacks = read_collapsed(path)
+                rate = self.sample_rate
+        except (IOError, ValueError):
+            self.stdout_textedit.write(
+                "No samples were recorded for %s\n" % script, True)
+            return
+        samples = sum(stacks.itervalues())
+        flamegraph = None
+        try:
+            if profiler is not None:
+                path = self.profile_path(script, COLLAPSED_EXTENSION)
+                write_collapsed(path, stacks)
+            flamegraph = os.path.splitext(path)[0] + '.html'
+            write_flamegraph(flamegraph, stacks,
+                             os.path.basename(unicode(script)),
+                             "%d samples at %d a second." % (samples, rate))
+        except (IOError, OSError):
+            # shown even though it could not be saved
+            self.stdout_textedit.write(traceback.format_exc(), True)
+            path = None
+            flamegraph = None
+        self.profile_panel.show_samples(script, sample_rows(stacks), samples,
+                                        rate, path, flamegraph)
+        if select:
+            self.tabWidget.setCurrentWidget(self.profile_panel)
+        if flamegraph is not None:
+            self.stdout_textedit.write("Flame graph saved to %s\n"
+                                       % flamegraph)
+
+    def show_memory(self, script, profiler=None, path=None, select=True):
+        """
+        Show where a run allocated memory in the Profile tab and save the
+        report. It comes from profiler or, for a run in a separate
+        process, from the file the child saved at path.
+        """
+        profile = profiler
+        if profiler is None:
+            try:
+                profile = MemoryReport.load(path)
+            except (IOError, ValueError, KeyError):
+                self.stdout_textedit.write(
+                    "No memory profile was recorded for %s\n" % script,
+                    True)
+                return
+        else:
+            try:
+                path = self.profile_path(script, MEMORY_EXTENSION)
+                profiler.save(path)
+            except (IOError, OSError):
+                # shown even though it could not be saved
+                self.stdout_textedit.write(traceback.format_exc(), True)
+                path = None
+        summary = memory_summary(profile)
+        self.profile_panel.show_memory(
+            script, memory_rows(profile.sites),
+            sum(size for (size, objects) in profile.sites.itervalues()),
+            summary, path)
+        if select:
+            self.tabWidget.setCurrentWidget(self.profile_panel)
+        self.stdout_textedit.write("Memory profile of %s: %s\n" % (
+            os.path.basename(unicode(script)), summary))
+
+    def show_source_line(self, script, line):
+        """
+        Show line of script in the Source tab.
+        """
+        item = self.script_item(script)
+        if item is None:
+            return
+        if item is not self.scriptList.currentItem():
+            self.scriptList.setCurrentItem(item)
+        try:
+            self.show_page(self.info_loader.load_now(script))
+        except (IOError, OSError):
+            return
+        self.tabWidget.setCurrentWidget(self.textBrowserSource)
+        self.show_source()
+        if self.info_page.large:
+            # selected once that far has been loaded
+            self.large_source.go_to_line(line)
+            return
+        block = self.textBrowserSource.document().findBlockByNumber(
+            line - 1)
+        cursor = QTextCursor(block)
+        cursor.select(QTextCursor.LineUnderCursor)
+        self.textBrowserSource.setTextCursor(cursor)
+        self.textBrowserSource.ensureCursorVisible()
+
+    def run_batch(self):
+        """
+        Run the current script once for each combination of the values
+        set up in the BatchDialog, on a pool of worker processes.
+        """
+        item = self.scriptList.currentItem()
+        if item is None or not item.flags() & Qt.ItemIsEnabled:
+            return
+        if self.batch_pool.is_running():
+            QMessageBox.information(None, "Run Batch",
+                                    "Wait for the batch in progress to "
+                                    "finish, or stop it.")
+            return
+        script = item.toolTip()
+        script_name = os.path.basename(unicode(script))
+        script_args = self.get_script_args(script)
+        if script_args is None:
+            QMessageBox.information(
+                None, "Run Batch",
+                "A batch varies the arguments of run_script, but the "
+                "run_script of %s takes no arguments besides iface."
+                % script_name)
+            return
+        output_dir = self.batch_directory(script)
+        batch_dlg = BatchDialog(script_args, script_name, output_dir,
+                                QThread.idealThreadCount(), self.mw)
+        batch = batch_dlg.show_dialog()
+        if batch is None:
+            return
+        (runs, workers) = batch
+        try:
+            os.makedirs(output_dir)
+        except OSError as e:
+            QMessageBox.warning(None, "Run Batch",
+                                "The batch output folder %s could not be "
+                                "created:\n%s" % (output_dir, e.strerror))
+            return
+        self.batch_runs = runs
+        self.batch_summary = os.path.join(output_dir, "summary.csv")
+        self.batch_started = datetime.datetime.now()
+        self.batch_pool.python = self.host_python
+        self.stdout_textedit.write(
+            "Running batch of %s: %d run(s) on %d worker process(es)\n"
+            % (script_name, len(runs), min(workers, len(runs))))
+        self.batch_progress_bar.setVisible(True)
+        self.batch_stop_button.setVisible(True)
+        self.batch_pool.start(script, runs, workers)
+
+    def batch_directory(self, script):
+        """
+        Return a new directory for the output of a batch of script: in
+        the batches directory under the log directory when logging to
+        disk, otherwise under the QGIS settings directory.
+        """
+        if self.log_output and self.log_dir:
+            base = os.path.join(unicode(self.log_dir), "batches")
+        else:
+            base = os.path.join(
+                unicode(QgsApplication.qgisSettingsDirPath()),
+                "scriptrunner", "batches")
+        stem = os.path.splitext(os.path.basename(unicode(script)))[0]
+        return os.path.join(base, "%s-%s" % (
+            stem, datetime.datetime.now().strftime("%Y%m%d-%H%M%S")))
+
+    def batch_run_finished(self, run):
+        seconds = ''
+        if run.seconds is not None:
+            seconds = " in %.1f s" % run.seconds
+        self.stdout_textedit.write(
+            "Batch run %d: %s%s (%s)\n" % (run.number, run.status, seconds,
+                                           format_args(run.user_args)))
+        if run.traceback:
+            self.stdout_textedit.write(run.traceback, True)
+
+    def batch_progress(self, done, total, failed):
+        self.batch_progress_bar.setMaximum(total)
+        self.batch_progress_bar.setValue(done)
+        elapsed = datetime.datetime.now() - self.batch_started
+        self.main_window.statusbar.showMessage(
+            "Batch: %d of %d run(s) done, %d failed (%s elapsed)"
+            % (done, total, failed, str(elapsed).split('.')[0]))
+
+    def batch_finished(self):
+        self.batch_progress_bar.setVisible(False)
+        self.batch_stop_button.setVisible(False)
+        try:
+            write_summary(self.batch_summary, self.batch_runs)
+        except (IOError, OSError):
+            print traceback.format_exc()
+            return
+        self.stdout_textedit.write("Batch summary written to %s\n"
+                                   % self.batch_summary)
+
+    def import_script(self, script):
+        """
+        Load the script and record the modules it loaded from its
+        directory for reload_script.
+        """
+        user_script = self.script_loader.load(script)
+        self.hot_reloader.record(script)
+        return user_script
+
+    def redirect_stdout(self, clear=True):
+        """
+        Send stdout to the console. Calls are counted so overlapping runs
+        (queued jobs) restore stdout only when the last one completes.
+        """
+        if self.stdout_redirects == 0:
+            self.old_stdout = sys.stdout
+            sys.stdout = self.stdout
+        self.stdout_redirects += 1
+        if clear and self.clear_console:
+            self.stdout.clear_output()
+
+    def restore_stdout(self):
+        self.stdout_redirects -= 1
+        if self.stdout_redirects == 0:
+            sys.stdout = self.old_stdout
+        if self.log_writer is not None:
+            self.log_writer.flush()
+
+    def report_traceback(self, tb_text):
+        """
+        Show the traceback in a dialog and echo it to the console.
+        """
+        tb = TracebackDialog()
+        tb.ui.teTraceback.setTextColor(QColor(Qt.red))
+        self.last_traceback = tb_text
+        tb.ui.teTraceback.setText(tb_text)
+        tb.show()
+        tb.exec_()
+        print "\n%s\nAbnormal termination" % self.last_traceback
+        #QMessageBox.information(None, "Error", traceback.format_exc())
+
+    def setup_run_queue(self):
+        """
+        Create the run queue, the executors it uses and its dock.
+        """
+        self.run_queue = RunQueue(self.start_queued_job, 1, self.mw)
+        # executor job ids mapped to queue job numbers
+        self.queue_threads = dict()
+        self.queue_processes = dict()
+
+        self.queue_thread_executor = ScriptExecutor(1, self.mw)
+        self.queue_process_executor = ProcessExecutor(self.host_python,
+                                                      self.mw)
+        for (executor, job_map) in (
+                (self.queue_thread_executor, self.queue_threads),
+                (self.queue_process_executor, self.queue_processes)):
+            executor.job_finished.connect(
+                partial(self.queue_executor_done, job_map, FINISHED))
+            executor.job_failed.connect(
+                partial(self.queue_executor_done, job_map, FAILED))
+            executor.job_stopped.connect(
+                partial(self.queue_executor_done, job_map, STOPPED))
+        self.queue_process_executor.output.connect(self.process_output)
+
+        self.queue_panel = QueuePanel(self.run_queue)
+        self.queue_panel.stop_requested.connect(self.stop_queued_jobs)
+        self.queue_dock = QDockWidget(self.mw)
+        self.queue_dock.setWindowTitle("Script Runner - Run Queue")
+        self.queue_dock.setObjectName("ScriptRunnerRunQueue")
+        self.queue_dock.setWidget(self.queue_panel)
+        self.mw.addDockWidget(Qt.BottomDockWidgetArea, self.queue_dock)
+        self.queue_dock.setVisible(False)
+        self.configure_run_queue()
+
+    def configure_run_queue(self):
+        # scripts run on the GUI thread can only run one at a time
+        if self.run_mode == 'gui':
+            self.run_queue.set_max_concurrent(1)
+        else:
+            self.run_queue.set_max_concurrent(self.queue_concurrency)
+        self.queue_thread_executor.set_max_threads(self.queue_concurrency)
+        self.queue_process_executor.python = self.host_python
+
+    def enqueue_scripts(self):
+        """
+        Add the selected scripts to the run queue, prompting for the
+        arguments of those that accept them.
+        """
+        items = self.scriptList.selectedItems()
+        if not items:
+            return
+        (priority_name, ok) = QInputDialog.getItem(
+            None, "Add to Run Queue", "Priority for the selected scripts:",
+            PRIORITY_NAMES, PRIORITY_NORMAL, False)
+        if not ok:
+            return
+        priority = PRIORITY_NAMES.index(str(priority_name))
+        for item in items:
+            script = item.toolTip()
+            user_args = None
+            script_info = self.script_info(script)
+            if script_info.may_use_args():
+                script_args = self.get_script_args(script)
+                if script_args is not None:
+                    user_args = self.ask_script_args(script, script_args)
+                    if user_args is None:
+                        # cancelled; skip this script
+                        continue
+            self.run_queue.enqueue(script, user_args, priority)
+        self.queue_dock.setVisible(True)
+        self.main_window.statusbar.showMessage(
+            "Queued %d script(s)" % len(items))
+
+    def start_queued_job(self, job):
+        """
+        Start a job taken from the run queue using the current run mode.
+        """
+        user_script = None
+        if self.run_mode != 'process':
+            user_script = self.import_script(job.script)
+        recording = self.start_recording(job.script, job.user_args)
+        self.queue_recordings[job.number] = recording
+        self.redirect_stdout(False)
+        print "Queue job %d: running %s" % (job.number, job.script)
+        try:
+            if self.run_mode == 'process':
+                job_id = self.queue_process_executor.submit(job.script,
+                                                            job.user_args)
+                self.queue_processes[job_id] = job.number
+            elif self.run_mode == 'thread':
+                recording.metrics = RunMetrics(per_thread=True)
+                job_id = self.queue_thread_executor.submit(
+                    recording.metrics.measure, call_run_script, user_script,
+                    self.iface, job.user_args)
+                self.queue_threads[job_id] = job.number
+        except:
+            # the queue marks the job failed; undo what was set up for it
+            self.restore_stdout()
+            del self.queue_recordings[job.number]
+            self.recordings.remove(recording)
+            raise
+        if self.run_mode not in ('process', 'thread'):
+            # run once control returns to the event loop so the queue
+            # panel is updated before the script takes over the GUI thread
+            QTimer.singleShot(0, partial(self.run_queued_job, job.number,
+                                         user_script))
+
+    def run_queued_job(self, number, user_script):
+        job = self.run_queue.jobs[number]
+        metrics = self.queue_recordings[number].metrics = RunMetrics()
+        try:
+            metrics.measure(call_run_script, user_script, self.iface,
+                            job.user_args)
+        except:
+            self.queued_job_done(number, FAILED, traceback.format_exc())
+        else:
+            self.queued_job_done(number, FINISHED)
+
+    def queue_executor_done(self, job_map, state, job_id, tb=''):
+        number = job_map.pop(job_id)
+        if job_map is self.queue_processes:
+            self.queue_recordings[number].metrics = \
+                self.queue_process_executor.take_metrics(job_id)
+        self.queued_job_done(number, state, tb)
+
+    def queued_job_done(self, number, state, tb=''):
+        """
+        Report the outcome of a queued job. Tracebacks go to the console
+        and the queue panel rather than a dialog, so a failed job does
+        not hold up the rest of the queue.
+        """
+        job = self.run_queue.jobs[number]
+        recording = self.queue_recordings.pop(number)
+        if tb:
+            print "\n%s" % tb
+        print "Queue job %d: %s %s" % (number, state, job.script_name())
+        if recording.metrics is not None and recording.metrics.finished():
+            print "Queue job %d: %s" % (number, recording.metrics.summary())
+            self.last_metrics = recording.metrics
+        self.restore_stdout()
+        self.log_results(recording, QUEUE_STATUS.get(state, STATUS_ERROR))
+        self.run_queue.job_done(number, state, tb)
+
+    def stop_queued_jobs(self):
+        self.queue_thread_executor.stop()
+        self.queue_process_executor.stop()
 
     def run(self):
         """
@@ -589,38 +1590,19 @@ class ScriptRunner:
         """
         self.mw.show()
 
-    def have_run_method(self, script_path):
-        """
-        Parse the script to make sure it has a run_script function
-        before allowing it to be added to the list of scripts.
-        """
-        script = open(script_path, 'r')
-        pattern = re.compile('\s*def run_script\(*')
-        run_method = False
-        uses_args = False
-        for line in script:
-            if pattern.search(line):
-                run_method = True
-                # check to see if this script uses keyword args
-                parts = line.split(',')
-                if len(parts) > 1:
-                    #uses_args =  line.find('**') != -1
-                    uses_args = True
-                    break
-        script.close()
-        return run_method, uses_args
-
     def current_script_changed(self):
         # check to see if it uses args
         item = self.scriptList.currentItem()
-        if item:
+        # scripts still being loaded are disabled
+        if item and item.flags() & Qt.ItemIsEnabled:
             label = str(item.text())
             if self.auto_display:
-                self.info()
+                # loaded once the selection settles
+                self.info_loader.select(item.toolTip(),
+                                        self.neighbor_scripts(item))
         else:
             # clear the info and source tabs
-            self.textBrowserSource.setPlainText('')
-            self.textBrowser.setPlainText('')
+            self.clear_info()
 
 
     def update_settings(self):
@@ -634,7 +1616,7 @@ class ScriptRunner:
                                self.list_of_scripts)
 
     def sweep_console(self):
-        self.stdout_textedit.setPlainText('')
+        self.stdout_textedit.clear_output()
 
     def set_preferences(self):
         prefs_dlg = PreferencesDialog()
@@ -642,12 +1624,23 @@ class ScriptRunner:
         if prefs_dlg.exec_() == QDialog.Accepted:
             self.fetch_settings()
             self.configure_console()
+            # pick up a changed log directory, mode or rotation
+            self.stop_log_writer()
+            self.start_log_writer()
+            self.close_run_archive()
+            self.open_run_archive()
+            self.process_executor.python = self.host_python
+            self.script_loader.fresh = self.fresh_namespace
+            self.configure_run_queue()
+            self.info_loader.set_large_file_size(self.large_file_kb * 1024)
 
     def fetch_settings(self):
         self.auto_display = self.settings.value(
             "ScriptRunner/auto_display", True, type=bool)
         self.clear_console = self.settings.value(
             "ScriptRunner/clear_console", True, type=bool)
+        self.console_max_lines = self.settings.value(
+            "ScriptRunner/console_max_lines", 10000, type=int)
         self.show_console = self.settings.value(
             "ScriptRunner/show_console", True, type=bool)
         self.log_output = self.settings.value(
@@ -656,29 +1649,134 @@ class ScriptRunner:
             "ScriptRunner/log_directory", "/tmp")
         self.log_overwrite = self.settings.value(
             "ScriptRunner/log_overwrite", False, type=bool)
+        self.log_max_size = self.settings.value(
+            "ScriptRunner/log_max_size_mb", 0, type=int)
+        self.log_rotate_hours = self.settings.value(
+            "ScriptRunner/log_rotate_hours", 0, type=int)
+        self.log_backup_count = self.settings.value(
+            "ScriptRunner/log_backup_count", 5, type=int)
+        self.log_compress = self.settings.value(
+            "ScriptRunner/log_compress", False, type=bool)
+        self.log_fsync = self.settings.value(
+            "ScriptRunner/log_fsync", "never", type=unicode)
         self.use_custom_editor = self.settings.value(
             "ScriptRunner/use_custom_editor", False, type=bool)
         self.custom_editor = self.settings.value(
             "ScriptRunner/custom_editor", "")
+        self.run_mode = self.settings.value(
+            "ScriptRunner/run_mode", "gui")
+        self.host_python = self.settings.value(
+            "ScriptRunner/host_python", "")
+        self.fresh_namespace = self.settings.value(
+            "ScriptRunner/fresh_namespace", False, type=bool)
+        self.profiler = self.settings.value(
+            "ScriptRunner/profiler", "cprofile", type=unicode)
+        self.sample_rate = self.settings.value(
+            "ScriptRunner/sample_rate", DEFAULT_RATE, type=int)
+        self.sample_all_runs = self.settings.value(
+            "ScriptRunner/sample_all_runs", False, type=bool)
+        self.queue_concurrency = self.settings.value(
+            "ScriptRunner/queue_concurrency", 1, type=int)
+        self.large_file_kb = self.settings.value(
+            "ScriptRunner/large_file_kb", LARGE_FILE_KB, type=int)
+
+    def start_log_writer(self):
+        """
+        Start the thread that writes scriptrunner.log, if logging to disk
+        is enabled.
+        """
+        if not self.log_output:
+            return
+        self.log_writer = LogWriter(
+            os.path.join(str(self.log_dir), "scriptrunner.log"),
+            overwrite=self.log_overwrite,
+            max_bytes=self.log_max_size * 1024 * 1024,
+            rotate_hours=self.log_rotate_hours,
+            backup_count=self.log_backup_count,
+            compress=self.log_compress,
+            fsync=self.log_fsync,
+            on_error=self.log_writer_failed)
+        self.log_writer.start()
+
+    def log_writer_failed(self, message):
+        """
+        Report that scriptrunner.log cannot be written. Called on the
+        writer thread, maybe before initGui has made the console; the
+        console is safe to write from any thread.
+        """
+        console = getattr(self, 'stdout_textedit', None)
+        if console is not None:
+            console.write("%s\n" % message, True)
+
+    def stop_log_writer(self):
+        if self.log_writer is not None:
+            self.log_writer.close()
+            self.log_writer = None
 
     def configure_console(self):
         self.stdout = self.stdout_textedit
-        self.stdout.new_output.connect(self.output_posted)
+        self.stdout.set_max_lines(self.console_max_lines)
         self.stdout.show()
 
         # set the visibility of the console based on user preference
         self.stdout_dock.setVisible(self.show_console)
 
-    def log_results(self, script_dir, script_name, output):
-        # open the logfile using mode based on user preference
-        if self.log_overwrite:
-            mode = 'w'
-        else:
-            mode = 'a'
+    def open_run_archive(self):
+        """
+        Open the archive of run output in the runs directory under the
+        log directory, if logging to disk is enabled.
+        """
+        if not self.log_output:
+            return
+        try:
+            self.run_archive = RunArchive(
+                os.path.join(unicode(self.log_dir), "runs"))
+        except (OSError, IOError, sqlite3.Error):
+            self.run_archive = None
+            print traceback.format_exc()
+
+    def close_run_archive(self):
+        if self.run_archive is not None:
+            self.run_archive.close()
+            self.run_archive = None
+
+    def show_run_history(self):
+        item = self.scriptList.currentItem()
+        if item is None:
+            return
+        if self.run_archive is None:
+            QMessageBox.information(
+                None, "Run History",
+                "Run output is archived when logging to disk is enabled. "
+                "Use Preferences to turn it on.")
+            return
+        history_dlg = RunHistoryDialog(self.run_archive, item.toolTip(),
+                                       self.mw)
+        history_dlg.exec_()
+
+    def start_recording(self, script, user_args):
+        """
+        Start collecting the console output of a run for the archive.
+        """
+        recording = RunRecording(script, user_args)
+        self.recordings.append(recording)
+        return recording
 
-        log_file = open(os.path.join(str(self.log_dir),
-                                     "%s.log" % script_name), mode)
-        log_file.close()
+    def log_results(self, recording, status):
+        """
+        Archive the output of a finished run. Runs that overlap (queued
+        jobs run concurrently) share the console, so each one's archived
+        output also holds whatever the others printed meanwhile.
+        """
+        # output still batched in the console belongs to this run
+        self.stdout.flush()
+        self.recordings.remove(recording)
+        if self.run_archive is None:
+            return
+        try:
+            self.run_archive.add(recording, status)
+        except (OSError, IOError, sqlite3.Error):
+            print traceback.format_exc()
 
     def show_context_menu(self, pos):
         #self.context_menu.popup(point)
@@ -755,21 +1853,22 @@ class ScriptRunner:
     def close_window(self):
         self.mw.hide()
 
-    def get_script_args(self):
+    def get_script_args(self, script=None):
         """
-        Get the args for the scripts run_script function
+        Get the args for the run_script function of script, or of the
+        current script if none is given.
         """
-        item = self.scriptList.currentItem()
-        if item is not None:  # in case no currentitem and none was passed
-            script = item.toolTip()
-            (script_dir, script_name) = os.path.split(str(script))
-            (user_module, ext) = os.path.splitext(script_name)
-            if script_dir not in sys.path:
-                sys.path.append(script_dir)
-            if not user_module in sys.modules:
-                __import__(user_module)
-            script_args = inspect.getargspec(
-                sys.modules[user_module].run_script)
+        if script is None:
+            item = self.scriptList.currentItem()
+            if item is not None:
+                script = item.toolTip()
+        if script is not None:  # in case no currentitem and none was passed
+            script_args = self.script_info(script).argspec()
+            if script_args is None:
+                # run_script is imported or assigned, so only the module
+                # itself knows its arguments
+                script_args = inspect.getargspec(
+                    self.import_script(script).run_script)
             #print "script_args is ", script_args
 
             # check to see if we have args in addition to 'iface'
@@ -778,6 +1877,16 @@ class ScriptRunner:
             else:
                 return None
 
+    def ask_script_args(self, script, script_args):
+        """
+        Show the ArgsDialog for script and return the arguments entered,
+        or None if it was cancelled. Presets and the last used arguments
+        are kept in the metadata cache.
+        """
+        args_dlg = ArgsDialog(script_args, os.path.basename(unicode(script)),
+                              unicode(script), self.metadata)
+        return args_dlg.show_dialog()
+
     def script_name(self):
         """Return the script name."""
         item = self.scriptList.currentItem()
@@ -791,13 +1900,11 @@ class ScriptRunner:
     #@pyqtSlot(str)
     def output_posted(self, text):
         #QMessageBox.information(None, "New Stdout", text)
-        if self.log_output:
-            try:
-                self.log_file.write(text)
-            except:
-                print traceback.format_exc()
-            finally:
-                sys.__stdout__.flush()
+        # the writer thread does the disk I/O
+        if self.log_writer is not None:
+            self.log_writer.write(unicode(text))
+        for recording in self.recordings:
+            recording.write(unicode(text))
 
     def restore_window_position(self):
         # TODO fix after sorting out how to do it @ api v2
@@ -14,7 +14,11 @@ the Free Software Foundation; either version 2 of the License, or
 (at your option) any later version.
 
 """
+import itertools
 import sys
+import thread
+import threading
+import time
 
 #from PyQt4 import QtCore, QtGui
 #from PyQt4.QtCore import Qt, pyqtSignal, QString
@@ -23,13 +27,28 @@ from PyQt4.QtGui import *
 #from PyQt4.QtGui import QTextCursor
 
 import __init__ as plugin_metatdata
+from console_history import ConsoleHistory, HistoryPager
 
 
 class StdoutTextEdit(QTextEdit):
     """
-    This class is the stdout widget for Script Runner
+    This class is the stdout widget for Script Runner.
+
+    write() may be called from any thread. Text is queued and appended to
+    the document in coalesced chunks by a timer on the GUI thread, at most
+    once per FRAME_INTERVAL milliseconds.
+
+    With a line limit set, the oldest lines are moved to a ConsoleHistory
+    on disk and can be browsed with the HistoryPager. In tail mode the
+    console follows new output; while the user has scrolled up, new output
+    is held back instead of rendered until the view returns to the bottom.
     """
     new_output = pyqtSignal(str)
+    # asks the GUI thread to schedule a drain of the queued output
+    drain_requested = pyqtSignal()
+
+    # minimum time between two updates of the document, in milliseconds
+    FRAME_INTERVAL = 40
 
     def __init__(self):
         """
@@ -41,16 +60,203 @@ class StdoutTextEdit(QTextEdit):
         self.cursor = QTextCursor(self.textCursor())
         self.setTextCursor(self.cursor)
 
+        self.normal_format = QTextCharFormat()
+        self.warning_format = QTextCharFormat()
+        self.warning_format.setForeground(QBrush(QColor(Qt.red)))
+
+        # queued (text, warning) tuples, guarded by lock
+        self.lock = threading.Lock()
+        self.pending = []
+        self.drain_scheduled = False
+        self.gui_thread_id = thread.get_ident()
+        self.last_drain = 0.0
+
+        self.drain_timer = QTimer(self)
+        self.drain_timer.setSingleShot(True)
+        self.drain_timer.setInterval(self.FRAME_INTERVAL)
+        self.drain_timer.timeout.connect(self.drain)
+        self.drain_requested.connect(self.drain_timer.start,
+                                     Qt.QueuedConnection)
+
+        # 0 for no limit
+        self.max_lines = 0
+        self.history = ConsoleHistory()
+        self.tail_mode = True
+        # set while the user has scrolled away from the bottom in tail mode
+        self.paused = False
+        # (warning, text) runs held back while paused
+        self.held = []
+        self.held_lines = 0
+        self.verticalScrollBar().actionTriggered.connect(self.user_scrolled)
+        self.verticalScrollBar().valueChanged.connect(self.scrolled)
+
     def write(self, text, warning=False):
-        cursor = QTextCursor(self.textCursor())
-        cursor.movePosition(QTextCursor.End)
-        self.setTextCursor(cursor)
-        if warning:
-            self.setTextColor(QColor(Qt.red))
-            self.insertPlainText(text)
+        with self.lock:
+            self.pending.append((text, warning))
+            schedule = not self.drain_scheduled
+            self.drain_scheduled = True
+
+        if thread.get_ident() != self.gui_thread_id:
+            if schedule:
+                self.drain_requested.emit()
+            return
+
+        if schedule:
+            self.drain_timer.start()
+        # a script running on the GUI thread keeps the event loop from
+        # running the timer, so drain here once a frame has elapsed and
+        # let Qt repaint
+        if (time.time() - self.last_drain) * 1000 >= self.FRAME_INTERVAL:
+            self.drain()
+            QCoreApplication.processEvents()
+
+    def flush(self):
+        """
+        Append all queued output now. Called from another thread, e.g. by
+        a script running in the background, only ask the GUI thread to do
+        it; the document belongs to the GUI thread.
+        """
+        if thread.get_ident() != self.gui_thread_id:
+            self.drain_requested.emit()
+            return
+        self.drain()
+
+    def drain(self):
+        """
+        Append the queued output to the document and emit it as one chunk
+        on new_output.
+        """
+        with self.lock:
+            chunks = self.pending
+            self.pending = []
+            self.drain_scheduled = False
+        self.drain_timer.stop()
+        self.last_drain = time.time()
+        if not chunks:
+            return
+
+        runs = []
+        # one run per sequence of normal or warning text
+        for (warning, group) in itertools.groupby(chunks, lambda c: c[1]):
+            runs.append((warning,
+                         u''.join(self.to_unicode(t) for (t, w) in group)))
+        self.new_output.emit(u''.join(text for (warning, text) in runs))
+
+        if self.paused:
+            self.held.extend(runs)
+            self.held_lines += sum(text.count(u'\n') for (w, text) in runs)
+            if self.max_lines and self.held_lines > self.max_lines:
+                self.spill_held()
         else:
-            self.insertPlainText(text)
-        self.ensureCursorVisible()
-        QCoreApplication.processEvents()
-        sys.__stdout__.flush()
-        self.new_output.emit(str(text))
+            self.render(runs)
+
+    def to_unicode(self, text):
+        if isinstance(text, str):
+            return text.decode('utf-8', 'replace')
+        return unicode(text)
+
+    def render(self, runs):
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for (warning, text) in runs:
+            if warning:
+                cursor.insertText(text, self.warning_format)
+            else:
+                cursor.insertText(text, self.normal_format)
+        cursor.endEditBlock()
+        self.trim()
+
+        if self.tail_mode:
+            self.moveCursor(QTextCursor.End)
+            self.ensureCursorVisible()
+
+    def trim(self):
+        """
+        Move the lines over the limit from the top of the document to the
+        history.
+        """
+        excess = self.document().blockCount() - self.max_lines
+        if not self.max_lines or excess <= 0:
+            return
+        block = self.document().findBlockByNumber(excess)
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(block.position(), QTextCursor.KeepAnchor)
+        self.history.append(unicode(cursor.selection().toPlainText()))
+        cursor.removeSelectedText()
+
+    def spill_held(self):
+        """
+        More output is held back than the console may show: move what is
+        shown, and all but the newest held lines, to the history.
+        """
+        if not self.document().isEmpty():
+            self.history.append(unicode(self.toPlainText()) + u'\n')
+            self.setPlainText('')
+        text = u''.join(t for (w, t) in self.held)
+        lines = text.split(u'\n')
+        keep = lines[-self.max_lines:]
+        self.history.append(u'\n'.join(lines[:-self.max_lines]) + u'\n')
+        self.held = [(False, u'\n'.join(keep))]
+        self.held_lines = len(keep) - 1
+
+    def user_scrolled(self, action):
+        # actionTriggered is emitted before the scroll bar value changes
+        QTimer.singleShot(0, self.check_scroll_position)
+
+    def scrolled(self, value):
+        if self.paused and value >= self.verticalScrollBar().maximum():
+            self.check_scroll_position()
+
+    def check_scroll_position(self):
+        """
+        Pause rendering while the user is scrolled away from the bottom in
+        tail mode; render the held output once they return.
+        """
+        scroll_bar = self.verticalScrollBar()
+        self.paused = (self.tail_mode and
+                       scroll_bar.value() < scroll_bar.maximum())
+        if self.held and not self.paused:
+            held = self.held
+            self.held = []
+            self.held_lines = 0
+            self.render(held)
+
+    def set_max_lines(self, max_lines):
+        self.max_lines = max_lines
+        self.trim()
+
+    def set_tail_mode(self, tail_mode):
+        self.tail_mode = tail_mode
+        self.check_scroll_position()
+        if tail_mode:
+            self.moveCursor(QTextCursor.End)
+            self.ensureCursorVisible()
+
+    def clear_output(self):
+        """
+        Clear the console, including any held back output and the
+        history.
+        """
+        self.held = []
+        self.held_lines = 0
+        self.paused = False
+        self.history.clear()
+        self.setPlainText('')
+
+    def show_history(self):
+        pager = HistoryPager(self.history, self)
+        pager.exec_()
+
+    def contextMenuEvent(self, event):
+        menu = self.createStandardContextMenu()
+        menu.addSeparator()
+        tail_action = menu.addAction("Follow Output")
+        tail_action.setCheckable(True)
+        tail_action.setChecked(self.tail_mode)
+        tail_action.toggled.connect(self.set_tail_mode)
+        history_action = menu.addAction(
+            "Show Earlier Output (%d lines)..." % self.history.line_count())
+        history_action.setEnabled(self.history.line_count() > 0)
+        history_action.triggered.connect(self.show_history)
+        menu.exec_(event.globalPos())
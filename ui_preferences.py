@@ -17,7 +17,7 @@ except AttributeError:
 class Ui_PrefsDialog(object):
     def setupUi(self, PrefsDialog):
         PrefsDialog.setObjectName(_fromUtf8("PrefsDialog"))
-        PrefsDialog.resize(547, 354)
+        PrefsDialog.resize(547, 562)
         self.gridLayout_4 = QtGui.QGridLayout(PrefsDialog)
         self.gridLayout_4.setObjectName(_fromUtf8("gridLayout_4"))
         self.groupBox = QtGui.QGroupBox(PrefsDialog)
@@ -47,6 +47,81 @@ class Ui_PrefsDialog(object):
         self.tbSetEditorPath.setObjectName(_fromUtf8("tbSetEditorPath"))
         self.horizontalLayout.addWidget(self.tbSetEditorPath)
         self.gridLayout_2.addLayout(self.horizontalLayout, 2, 0, 1, 1)
+        self.horizontalLayout_2 = QtGui.QHBoxLayout()
+        self.horizontalLayout_2.setObjectName(_fromUtf8("horizontalLayout_2"))
+        self.lblRunMode = QtGui.QLabel(self.groupBox)
+        self.lblRunMode.setObjectName(_fromUtf8("lblRunMode"))
+        self.horizontalLayout_2.addWidget(self.lblRunMode)
+        self.cbxRunMode = QtGui.QComboBox(self.groupBox)
+        self.cbxRunMode.setObjectName(_fromUtf8("cbxRunMode"))
+        self.cbxRunMode.addItem(_fromUtf8(""))
+        self.cbxRunMode.addItem(_fromUtf8(""))
+        self.cbxRunMode.addItem(_fromUtf8(""))
+        self.horizontalLayout_2.addWidget(self.cbxRunMode)
+        self.gridLayout_2.addLayout(self.horizontalLayout_2, 3, 0, 1, 1)
+        self.horizontalLayout_3 = QtGui.QHBoxLayout()
+        self.horizontalLayout_3.setObjectName(_fromUtf8("horizontalLayout_3"))
+        self.lblHostPython = QtGui.QLabel(self.groupBox)
+        self.lblHostPython.setObjectName(_fromUtf8("lblHostPython"))
+        self.horizontalLayout_3.addWidget(self.lblHostPython)
+        self.leHostPython = QtGui.QLineEdit(self.groupBox)
+        self.leHostPython.setObjectName(_fromUtf8("leHostPython"))
+        self.horizontalLayout_3.addWidget(self.leHostPython)
+        self.gridLayout_2.addLayout(self.horizontalLayout_3, 4, 0, 1, 1)
+        self.horizontalLayout_4 = QtGui.QHBoxLayout()
+        self.horizontalLayout_4.setObjectName(_fromUtf8("horizontalLayout_4"))
+        self.lblQueueConcurrency = QtGui.QLabel(self.groupBox)
+        self.lblQueueConcurrency.setObjectName(_fromUtf8("lblQueueConcurrency"))
+        self.horizontalLayout_4.addWidget(self.lblQueueConcurrency)
+        self.sbQueueConcurrency = QtGui.QSpinBox(self.groupBox)
+        self.sbQueueConcurrency.setMinimum(1)
+        self.sbQueueConcurrency.setMaximum(64)
+        self.sbQueueConcurrency.setObjectName(_fromUtf8("sbQueueConcurrency"))
+        self.horizontalLayout_4.addWidget(self.sbQueueConcurrency)
+        spacerItem3 = QtGui.QSpacerItem(40, 20, QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Minimum)
+        self.horizontalLayout_4.addItem(spacerItem3)
+        self.gridLayout_2.addLayout(self.horizontalLayout_4, 5, 0, 1, 1)
+        self.cbFreshNamespace = QtGui.QCheckBox(self.groupBox)
+        self.cbFreshNamespace.setObjectName(_fromUtf8("cbFreshNamespace"))
+        self.gridLayout_2.addWidget(self.cbFreshNamespace, 6, 0, 1, 1)
+        self.horizontalLayoutProfiler = QtGui.QHBoxLayout()
+        self.horizontalLayoutProfiler.setObjectName(_fromUtf8("horizontalLayoutProfiler"))
+        self.lblProfiler = QtGui.QLabel(self.groupBox)
+        self.lblProfiler.setObjectName(_fromUtf8("lblProfiler"))
+        self.horizontalLayoutProfiler.addWidget(self.lblProfiler)
+        self.cbxProfiler = QtGui.QComboBox(self.groupBox)
+        self.cbxProfiler.setObjectName(_fromUtf8("cbxProfiler"))
+        self.cbxProfiler.addItem(_fromUtf8(""))
+        self.cbxProfiler.addItem(_fromUtf8(""))
+        self.horizontalLayoutProfiler.addWidget(self.cbxProfiler)
+        self.lblSampleRate = QtGui.QLabel(self.groupBox)
+        self.lblSampleRate.setObjectName(_fromUtf8("lblSampleRate"))
+        self.horizontalLayoutProfiler.addWidget(self.lblSampleRate)
+        self.sbSampleRate = QtGui.QSpinBox(self.groupBox)
+        self.sbSampleRate.setMinimum(1)
+        self.sbSampleRate.setMaximum(1000)
+        self.sbSampleRate.setProperty("value", 100)
+        self.sbSampleRate.setObjectName(_fromUtf8("sbSampleRate"))
+        self.horizontalLayoutProfiler.addWidget(self.sbSampleRate)
+        spacerItem4 = QtGui.QSpacerItem(40, 20, QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Minimum)
+        self.horizontalLayoutProfiler.addItem(spacerItem4)
+        self.gridLayout_2.addLayout(self.horizontalLayoutProfiler, 7, 0, 1, 1)
+        self.cbSampleAllRuns = QtGui.QCheckBox(self.groupBox)
+        self.cbSampleAllRuns.setObjectName(_fromUtf8("cbSampleAllRuns"))
+        self.gridLayout_2.addWidget(self.cbSampleAllRuns, 8, 0, 1, 1)
+        self.horizontalLayoutLargeFile = QtGui.QHBoxLayout()
+        self.horizontalLayoutLargeFile.setObjectName(_fromUtf8("horizontalLayoutLargeFile"))
+        self.lblLargeFile = QtGui.QLabel(self.groupBox)
+        self.lblLargeFile.setObjectName(_fromUtf8("lblLargeFile"))
+        self.horizontalLayoutLargeFile.addWidget(self.lblLargeFile)
+        self.sbLargeFile = QtGui.QSpinBox(self.groupBox)
+        self.sbLargeFile.setMaximum(1048576)
+        self.sbLargeFile.setProperty("value", 1024)
+        self.sbLargeFile.setObjectName(_fromUtf8("sbLargeFile"))
+        self.horizontalLayoutLargeFile.addWidget(self.sbLargeFile)
+        spacerItem5 = QtGui.QSpacerItem(40, 20, QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Minimum)
+        self.horizontalLayoutLargeFile.addItem(spacerItem5)
+        self.gridLayout_2.addLayout(self.horizontalLayoutLargeFile, 9, 0, 1, 1)
         self.gridLayout_4.addWidget(self.groupBox, 0, 0, 1, 1)
         self.groupBoxOutput = QtGui.QGroupBox(PrefsDialog)
         self.groupBoxOutput.setObjectName(_fromUtf8("groupBoxOutput"))
@@ -74,7 +149,7 @@ class Ui_PrefsDialog(object):
         self.cbOverwriteLogFile.setObjectName(_fromUtf8("cbOverwriteLogFile"))
         self.gridLayout.addWidget(self.cbOverwriteLogFile, 1, 1, 1, 2)
         self.layoutWidget1 = QtGui.QWidget(self.groupBoxOutput)
-        self.layoutWidget1.setGeometry(QtCore.QRect(8, 40, 352, 80))
+        self.layoutWidget1.setGeometry(QtCore.QRect(8, 40, 520, 80))
         self.layoutWidget1.setObjectName(_fromUtf8("layoutWidget1"))
         self.gridLayout_3 = QtGui.QGridLayout(self.layoutWidget1)
         self.gridLayout_3.setMargin(0)
@@ -86,15 +161,65 @@ class Ui_PrefsDialog(object):
         self.cbClearConsole.setMinimumSize(QtCore.QSize(350, 0))
         self.cbClearConsole.setObjectName(_fromUtf8("cbClearConsole"))
         self.gridLayout_3.addWidget(self.cbClearConsole, 1, 0, 1, 1)
+        self.horizontalLayout_5 = QtGui.QHBoxLayout()
+        self.horizontalLayout_5.setObjectName(_fromUtf8("horizontalLayout_5"))
+        self.lblConsoleMaxLines = QtGui.QLabel(self.layoutWidget1)
+        self.lblConsoleMaxLines.setObjectName(_fromUtf8("lblConsoleMaxLines"))
+        self.horizontalLayout_5.addWidget(self.lblConsoleMaxLines)
+        self.sbConsoleMaxLines = QtGui.QSpinBox(self.layoutWidget1)
+        self.sbConsoleMaxLines.setMaximum(10000000)
+        self.sbConsoleMaxLines.setSingleStep(1000)
+        self.sbConsoleMaxLines.setObjectName(_fromUtf8("sbConsoleMaxLines"))
+        self.horizontalLayout_5.addWidget(self.sbConsoleMaxLines)
+        self.gridLayout_3.addLayout(self.horizontalLayout_5, 1, 1, 1, 1)
         self.cbLogToDisk = QtGui.QCheckBox(self.layoutWidget1)
         self.cbLogToDisk.setObjectName(_fromUtf8("cbLogToDisk"))
         self.gridLayout_3.addWidget(self.cbLogToDisk, 2, 0, 1, 1)
         self.gridLayout_4.addWidget(self.groupBoxOutput, 1, 0, 1, 1)
+        self.groupBoxLogRotation = QtGui.QGroupBox(PrefsDialog)
+        self.groupBoxLogRotation.setObjectName(_fromUtf8("groupBoxLogRotation"))
+        self.gridLayout_5 = QtGui.QGridLayout(self.groupBoxLogRotation)
+        self.gridLayout_5.setObjectName(_fromUtf8("gridLayout_5"))
+        self.lblLogMaxSize = QtGui.QLabel(self.groupBoxLogRotation)
+        self.lblLogMaxSize.setObjectName(_fromUtf8("lblLogMaxSize"))
+        self.gridLayout_5.addWidget(self.lblLogMaxSize, 0, 0, 1, 1)
+        self.sbLogMaxSize = QtGui.QSpinBox(self.groupBoxLogRotation)
+        self.sbLogMaxSize.setMaximum(100000)
+        self.sbLogMaxSize.setObjectName(_fromUtf8("sbLogMaxSize"))
+        self.gridLayout_5.addWidget(self.sbLogMaxSize, 0, 1, 1, 1)
+        self.lblLogRotateHours = QtGui.QLabel(self.groupBoxLogRotation)
+        self.lblLogRotateHours.setObjectName(_fromUtf8("lblLogRotateHours"))
+        self.gridLayout_5.addWidget(self.lblLogRotateHours, 0, 2, 1, 1)
+        self.sbLogRotateHours = QtGui.QSpinBox(self.groupBoxLogRotation)
+        self.sbLogRotateHours.setMaximum(8760)
+        self.sbLogRotateHours.setObjectName(_fromUtf8("sbLogRotateHours"))
+        self.gridLayout_5.addWidget(self.sbLogRotateHours, 0, 3, 1, 1)
+        self.lblLogBackupCount = QtGui.QLabel(self.groupBoxLogRotation)
+        self.lblLogBackupCount.setObjectName(_fromUtf8("lblLogBackupCount"))
+        self.gridLayout_5.addWidget(self.lblLogBackupCount, 1, 0, 1, 1)
+        self.sbLogBackupCount = QtGui.QSpinBox(self.groupBoxLogRotation)
+        self.sbLogBackupCount.setMaximum(999)
+        self.sbLogBackupCount.setProperty("value", 5)
+        self.sbLogBackupCount.setObjectName(_fromUtf8("sbLogBackupCount"))
+        self.gridLayout_5.addWidget(self.sbLogBackupCount, 1, 1, 1, 1)
+        self.cbLogCompress = QtGui.QCheckBox(self.groupBoxLogRotation)
+        self.cbLogCompress.setObjectName(_fromUtf8("cbLogCompress"))
+        self.gridLayout_5.addWidget(self.cbLogCompress, 1, 2, 1, 2)
+        self.lblLogFsync = QtGui.QLabel(self.groupBoxLogRotation)
+        self.lblLogFsync.setObjectName(_fromUtf8("lblLogFsync"))
+        self.gridLayout_5.addWidget(self.lblLogFsync, 2, 0, 1, 1)
+        self.cbxLogFsync = QtGui.QComboBox(self.groupBoxLogRotation)
+        self.cbxLogFsync.setObjectName(_fromUtf8("cbxLogFsync"))
+        self.cbxLogFsync.addItem(_fromUtf8(""))
+        self.cbxLogFsync.addItem(_fromUtf8(""))
+        self.cbxLogFsync.addItem(_fromUtf8(""))
+        self.gridLayout_5.addWidget(self.cbxLogFsync, 2, 1, 1, 3)
+        self.gridLayout_4.addWidget(self.groupBoxLogRotation, 2, 0, 1, 1)
         self.buttonBox = QtGui.QDialogButtonBox(PrefsDialog)
         self.buttonBox.setOrientation(QtCore.Qt.Horizontal)
         self.buttonBox.setStandardButtons(QtGui.QDialogButtonBox.Cancel|QtGui.QDialogButtonBox.Ok)
         self.buttonBox.setObjectName(_fromUtf8("buttonBox"))
-        self.gridLayout_4.addWidget(self.buttonBox, 2, 0, 1, 1)
+        self.gridLayout_4.addWidget(self.buttonBox, 3, 0, 1, 1)
 
         self.retranslateUi(PrefsDialog)
         QtCore.QObject.connect(self.buttonBox, QtCore.SIGNAL(_fromUtf8("accepted()")), PrefsDialog.accept)
@@ -114,11 +239,52 @@ class Ui_PrefsDialog(object):
         self.leCustomEditorPath.setToolTip(QtGui.QApplication.translate("PrefsDialog", "Full path to your editor application", None, QtGui.QApplication.UnicodeUTF8))
         self.leCustomEditorPath.setPlaceholderText(QtGui.QApplication.translate("PrefsDialog", "Full path to your edtior", None, QtGui.QApplication.UnicodeUTF8))
         self.tbSetEditorPath.setText(QtGui.QApplication.translate("PrefsDialog", "...", None, QtGui.QApplication.UnicodeUTF8))
+        self.lblRunMode.setText(QtGui.QApplication.translate("PrefsDialog", "Run scripts", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbxRunMode.setToolTip(QtGui.QApplication.translate("PrefsDialog", "Scripts that work with the map canvas or other GUI elements must run in the QGIS GUI thread.", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbxRunMode.setItemText(0, QtGui.QApplication.translate("PrefsDialog", "In the QGIS GUI thread", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbxRunMode.setItemText(1, QtGui.QApplication.translate("PrefsDialog", "In a background thread", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbxRunMode.setItemText(2, QtGui.QApplication.translate("PrefsDialog", "In a separate headless QGIS process", None, QtGui.QApplication.UnicodeUTF8))
+        self.lblHostPython.setText(QtGui.QApplication.translate("PrefsDialog", "Python for separate processes", None, QtGui.QApplication.UnicodeUTF8))
+        self.leHostPython.setToolTip(QtGui.QApplication.translate("PrefsDialog", "Python interpreter used to run scripts in a separate process. Leave empty to use the default.", None, QtGui.QApplication.UnicodeUTF8))
+        self.leHostPython.setPlaceholderText(QtGui.QApplication.translate("PrefsDialog", "python", None, QtGui.QApplication.UnicodeUTF8))
+        self.lblQueueConcurrency.setText(QtGui.QApplication.translate("PrefsDialog", "Maximum number of queued scripts running at once", None, QtGui.QApplication.UnicodeUTF8))
+        self.sbQueueConcurrency.setToolTip(QtGui.QApplication.translate("PrefsDialog", "Scripts run in the QGIS GUI thread always run one at a time.", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbFreshNamespace.setToolTip(QtGui.QApplication.translate("PrefsDialog", "Load the script again for every run so no module level state is left over from an earlier run.", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbFreshNamespace.setText(QtGui.QApplication.translate("PrefsDialog", "Run each script in a fresh module namespace", None, QtGui.QApplication.UnicodeUTF8))
+        self.lblProfiler.setText(QtGui.QApplication.translate("PrefsDialog", "Run with Profiler uses", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbxProfiler.setToolTip(QtGui.QApplication.translate("PrefsDialog", "cProfile records every function call, which slows down scripts making many small calls. The sampling profiler reads the stack of the script at intervals and adds little overhead.", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbxProfiler.setItemText(0, QtGui.QApplication.translate("PrefsDialog", "cProfile (every call)", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbxProfiler.setItemText(1, QtGui.QApplication.translate("PrefsDialog", "Sampling profiler", None, QtGui.QApplication.UnicodeUTF8))
+        self.lblSampleRate.setText(QtGui.QApplication.translate("PrefsDialog", "Samples per second", None, QtGui.QApplication.UnicodeUTF8))
+        self.sbSampleRate.setToolTip(QtGui.QApplication.translate("PrefsDialog", "Higher rates give more detail for short runs at a higher overhead.", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbSampleAllRuns.setToolTip(QtGui.QApplication.translate("PrefsDialog", "Sample every run with the sampling profiler and save its flame graph, without switching to the Profile tab.", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbSampleAllRuns.setText(QtGui.QApplication.translate("PrefsDialog", "Sample all runs", None, QtGui.QApplication.UnicodeUTF8))
+        self.lblLargeFile.setText(QtGui.QApplication.translate("PrefsDialog", "Show the source of scripts larger than", None, QtGui.QApplication.UnicodeUTF8))
+        self.sbLargeFile.setToolTip(QtGui.QApplication.translate("PrefsDialog", "Larger scripts are read in chunks and only the part on screen is highlighted, so the Source tab stays responsive. 0 turns this off.", None, QtGui.QApplication.UnicodeUTF8))
+        self.sbLargeFile.setSpecialValueText(QtGui.QApplication.translate("PrefsDialog", "Never", None, QtGui.QApplication.UnicodeUTF8))
+        self.sbLargeFile.setSuffix(QtGui.QApplication.translate("PrefsDialog", " KB in large file mode", None, QtGui.QApplication.UnicodeUTF8))
         self.groupBoxOutput.setTitle(QtGui.QApplication.translate("PrefsDialog", "Output and Logging", None, QtGui.QApplication.UnicodeUTF8))
         self.label.setText(QtGui.QApplication.translate("PrefsDialog", "Log directory", None, QtGui.QApplication.UnicodeUTF8))
         self.tbSetLogDirectory.setText(QtGui.QApplication.translate("PrefsDialog", "...", None, QtGui.QApplication.UnicodeUTF8))
         self.cbOverwriteLogFile.setText(QtGui.QApplication.translate("PrefsDialog", "Overwrite log file each time the script is run", None, QtGui.QApplication.UnicodeUTF8))
         self.cbShowConsole.setText(QtGui.QApplication.translate("PrefsDialog", "Show console at startup", None, QtGui.QApplication.UnicodeUTF8))
         self.cbClearConsole.setText(QtGui.QApplication.translate("PrefsDialog", "Clear console before running a script", None, QtGui.QApplication.UnicodeUTF8))
+        self.lblConsoleMaxLines.setText(QtGui.QApplication.translate("PrefsDialog", "Maximum lines", None, QtGui.QApplication.UnicodeUTF8))
+        self.sbConsoleMaxLines.setToolTip(QtGui.QApplication.translate("PrefsDialog", "Older lines are moved to disk and can be viewed from the console context menu", None, QtGui.QApplication.UnicodeUTF8))
+        self.sbConsoleMaxLines.setSpecialValueText(QtGui.QApplication.translate("PrefsDialog", "No limit", None, QtGui.QApplication.UnicodeUTF8))
         self.cbLogToDisk.setText(QtGui.QApplication.translate("PrefsDialog", "Log script output to disk", None, QtGui.QApplication.UnicodeUTF8))
+        self.groupBoxLogRotation.setTitle(QtGui.QApplication.translate("PrefsDialog", "Log Rotation", None, QtGui.QApplication.UnicodeUTF8))
+        self.lblLogMaxSize.setText(QtGui.QApplication.translate("PrefsDialog", "Rotate at", None, QtGui.QApplication.UnicodeUTF8))
+        self.sbLogMaxSize.setSpecialValueText(QtGui.QApplication.translate("PrefsDialog", "Any size", None, QtGui.QApplication.UnicodeUTF8))
+        self.sbLogMaxSize.setSuffix(QtGui.QApplication.translate("PrefsDialog", " MB", None, QtGui.QApplication.UnicodeUTF8))
+        self.lblLogRotateHours.setText(QtGui.QApplication.translate("PrefsDialog", "or every", None, QtGui.QApplication.UnicodeUTF8))
+        self.sbLogRotateHours.setSpecialValueText(QtGui.QApplication.translate("PrefsDialog", "Never", None, QtGui.QApplication.UnicodeUTF8))
+        self.sbLogRotateHours.setSuffix(QtGui.QApplication.translate("PrefsDialog", " hours", None, QtGui.QApplication.UnicodeUTF8))
+        self.lblLogBackupCount.setText(QtGui.QApplication.translate("PrefsDialog", "Old logs to keep", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbLogCompress.setText(QtGui.QApplication.translate("PrefsDialog", "Compress old logs", None, QtGui.QApplication.UnicodeUTF8))
+        self.lblLogFsync.setText(QtGui.QApplication.translate("PrefsDialog", "Force log to disk", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbxLogFsync.setToolTip(QtGui.QApplication.translate("PrefsDialog", "Forcing the log to disk protects it from a crash at the cost of speed", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbxLogFsync.setItemText(0, QtGui.QApplication.translate("PrefsDialog", "Never", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbxLogFsync.setItemText(1, QtGui.QApplication.translate("PrefsDialog", "At the end of each script", None, QtGui.QApplication.UnicodeUTF8))
+        self.cbxLogFsync.setItemText(2, QtGui.QApplication.translate("PrefsDialog", "After every write", None, QtGui.QApplication.UnicodeUTF8))
 